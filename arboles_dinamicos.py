@@ -0,0 +1,150 @@
+"""
+Reparación incremental de árboles de caminos mínimos cuando cambia una conexión
+La red es no dirigida, así que un cambio en la conexión a - b afecta los arcos a -> b y b -> a.
+- Si el tramo mejora (conexión nueva o más liviana) se propaga la mejora desde sus
+  extremos con Dijkstra, tocando solo las ciudades que mejoran.
+- Si empeora (conexión eliminada o más pesada) solo cambian las ciudades del subárbol
+  que colgaba de ese tramo: se invalidan, se vuelven a sembrar desde sus vecinos fuera
+  del subárbol y se resuelven con Dijkstra sobre el subárbol.
+Los árboles son listas (distancias, predecesores) como las de dijkstra_csr y se modifican en el lugar;
+las tablas todos-contra-todos se reparan igual, solo en los orígenes cuyo árbol cambia.
+"""
+import heapq
+
+import numpy as np
+
+def peso_entre(offsets, destinos, pesos, u, v, arista=None, excluidas=()):
+    """Menor peso entre los arcos u -> v (sin las conexiones excluidas); inf si no hay"""
+    mejor = float('inf')
+    for i in range(offsets[u], offsets[u + 1]):
+        if destinos[i] == v and pesos[i] < mejor and (not excluidas or arista[i] not in excluidas):
+            mejor = pesos[i]
+    return mejor
+
+def _propagar(offsets, destinos, pesos, dist, previo, cola, cambiados, arista=None, excluidas=()):
+    """Dijkstra desde una cola ya sembrada; solo actualiza las ciudades que mejoran"""
+    while cola:
+        d, u = heapq.heappop(cola)
+        if d > dist[u]:
+            continue
+        for i in range(offsets[u], offsets[u + 1]):
+            if excluidas and arista[i] in excluidas:
+                continue
+            v = destinos[i]
+            nueva = d + pesos[i]
+            if nueva < dist[v]:
+                dist[v] = nueva
+                previo[v] = u
+                cambiados.add(v)
+                heapq.heappush(cola, (nueva, v))
+
+def reparar_disminucion(offsets, destinos, pesos, dist, previo, a, b, peso):
+    """El tramo a - b ahora pesa peso (menos que antes); devuelve las ciudades que mejoraron"""
+    cola = []
+    cambiados = set()
+    for x, y in ((a, b), (b, a)):
+        if dist[x] + peso < dist[y]:
+            dist[y] = dist[x] + peso
+            previo[y] = x
+            cambiados.add(y)
+            heapq.heappush(cola, (dist[y], y))
+    _propagar(offsets, destinos, pesos, dist, previo, cola, cambiados)
+    return cambiados
+
+def indice_hijos(previo):
+    """Hijos de cada ciudad en el árbol como (orden, límites): hijos de x = orden[límites[x + 1]:límites[x + 2]]"""
+    padres = np.asarray(previo, dtype=np.int64) + 1  # -1 (sin padre) pasa a 0
+    orden = np.argsort(padres, kind='stable')
+    limites = np.zeros(len(padres) + 2, dtype=np.int64)
+    np.cumsum(np.bincount(padres, minlength=len(padres) + 1), out=limites[1:])
+    return orden.tolist(), limites.tolist()
+
+def _subarbol(hijos, raiz):
+    """Ciudades que cuelgan de raiz en el árbol (incluida raiz)"""
+    orden, limites = hijos
+    subarbol = [raiz]
+    for x in subarbol:  # la lista crece mientras se recorre (búsqueda en anchura)
+        subarbol.extend(orden[limites[x + 1]:limites[x + 2]])
+    return subarbol
+
+def reparar_aumento(offsets, destinos, pesos, dist, previo, a, b, peso, arista=None, excluidas=(),
+                    hijos=None):
+    """
+    El tramo a - b ahora pesa peso (más que antes, inf si ya no existe)
+    Las conexiones excluidas se tratan como inexistentes (sirve para simular fallas
+    sin modificar el grafo). hijos: indice_hijos(previo) ya calculado, para reutilizarlo
+    entre varias reparaciones del mismo árbol. Devuelve las ciudades cuya distancia cambió
+    """
+    infinito = float('inf')
+    raiz = -1
+    for x, y in ((a, b), (b, a)):
+        # solo importa si el tramo es parte del árbol y ya no sostiene la distancia de y
+        if previo[y] == x and dist[x] + peso > dist[y]:
+            raiz = y
+    if raiz < 0:
+        return set()
+
+    afectadas = _subarbol(hijos if hijos is not None else indice_hijos(previo), raiz)
+    en_subarbol = set(afectadas)
+    anteriores = {x: dist[x] for x in afectadas}
+    for x in afectadas:
+        dist[x] = infinito
+        previo[x] = -1
+
+    # sembrar cada ciudad del subárbol desde sus vecinos que quedaron fuera de él
+    cola = []
+    for x in afectadas:
+        mejor, padre = infinito, -1
+        for i in range(offsets[x], offsets[x + 1]):
+            if excluidas and arista[i] in excluidas:
+                continue
+            z = destinos[i]
+            if z in en_subarbol:
+                continue
+            candidata = dist[z] + pesos[i]
+            if candidata < mejor:
+                mejor, padre = candidata, z
+        if padre >= 0:
+            dist[x] = mejor
+            previo[x] = padre
+            cola.append((mejor, x))
+    heapq.heapify(cola)
+    _propagar(offsets, destinos, pesos, dist, previo, cola, set(), arista, excluidas)
+    return {x for x in afectadas if dist[x] != anteriores[x]}
+
+def reparar_arbol(offsets, destinos, pesos, dist, previo, a, b, peso_antes, peso_despues):
+    """Repara un árbol cuando el peso del tramo a - b pasa de peso_antes a peso_despues"""
+    if peso_despues < peso_antes:
+        return reparar_disminucion(offsets, destinos, pesos, dist, previo, a, b, peso_despues)
+    if peso_despues > peso_antes:
+        return reparar_aumento(offsets, destinos, pesos, dist, previo, a, b, peso_despues)
+    return set()
+
+def fuentes_afectadas(distancias, predecesores, a, b, peso_antes, peso_despues):
+    """
+    Orígenes cuyo árbol cambia cuando el tramo a - b pasa de peso_antes a peso_despues
+    distancias/predecesores: matrices n x n donde la fila s es el árbol con raíz s
+    """
+    if peso_despues < peso_antes:
+        mejora = ((distancias[:, a] + peso_despues < distancias[:, b]) |
+                  (distancias[:, b] + peso_despues < distancias[:, a]))
+        return np.flatnonzero(mejora)
+    if peso_despues > peso_antes:
+        # el tramo es parte del árbol y ya no sostiene la distancia del extremo lejano
+        empeora = (((predecesores[:, b] == a) & (distancias[:, a] + peso_despues > distancias[:, b])) |
+                   ((predecesores[:, a] == b) & (distancias[:, b] + peso_despues > distancias[:, a])))
+        return np.flatnonzero(empeora)
+    return np.array([], dtype=np.int64)
+
+def reparar_tabla(offsets, destinos, pesos, distancias, predecesores, a, b, peso_antes, peso_despues):
+    """
+    Repara en el lugar una tabla todos-contra-todos (fila s = árbol con raíz s) recalculando
+    solo los orígenes afectados por el cambio del tramo a - b; devuelve cuántos se repararon
+    """
+    fuentes = fuentes_afectadas(distancias, predecesores, a, b, peso_antes, peso_despues)
+    for s in fuentes.tolist():
+        dist, previo = distancias[s].tolist(), predecesores[s].tolist()
+        reparar_arbol(offsets, destinos, pesos, dist, previo, a, b, peso_antes, peso_despues)
+        distancias[s] = dist
+        predecesores[s] = previo
+    return len(fuentes)
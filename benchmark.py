@@ -0,0 +1,296 @@
+"""
+Benchmarks reproducibles del simulador: carga del CSV, Dijkstra por criterio,
+métricas de una ruta, layout (desde cero) y dibujo del grafo, sobre redes sintéticas de varios tamaños
+Las redes salen de generador_red.py con semilla fija (se guardan en la carpeta de trabajo
+y se reutilizan entre corridas). Cada caso se repite varias veces y se informa la mediana,
+el percentil 95 y el pico de memoria (tracemalloc, en una corrida aparte para no
+distorsionar los tiempos). Los resultados se escriben en JSON y dos corridas se pueden
+comparar para marcar regresiones por encima de un umbral.
+"""
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+os.environ.setdefault('MPLBACKEND', 'Agg')  # dibujar sin ventana
+
+import numpy as np
+
+from generador_red import MODELOS, generar_red
+
+CRITERIOS = ('latencia', 'costo', 'ancho_banda', 'compuesto')
+TAMANOS = (100, 10_000, 100_000)
+
+# Por encima de este tamaño se omiten el layout y el dibujo. Desde MAX_CIUDADES_SPRING ciudades el
+# layout es O(n^1.5) (layout_red.py) y lo que más pesa es dibujar, lineal en las conexiones: unos
+# 25 s por repetición con 10_000 conexiones, pero varios minutos con 100_000
+MAX_CONEXIONES_RENDER = 20_000
+
+# Rutas distintas sobre las que se mide obtener_metricas_ruta
+RUTAS_METRICAS = 200
+
+# Aumentos de memoria menores a esto no cuentan como regresión (ruido de tracemalloc)
+MEMORIA_MINIMA_REGRESION = 1 << 20
+
+@contextlib.contextmanager
+def _silencio():
+    """Descarta los mensajes del simulador mientras se mide"""
+    with open(os.devnull, 'w', encoding='utf-8') as nulo, contextlib.redirect_stdout(nulo):
+        yield
+
+def medir(funcion, repeticiones, preparar=None, calentamiento=1):
+    """Tiempos (s) de repeticiones llamadas a funcion(); preparar() corre antes de cada una sin medirse"""
+    tiempos = []
+    with _silencio():
+        for i in range(calentamiento + repeticiones):
+            argumento = preparar(i) if preparar else None
+            inicio = time.perf_counter()
+            funcion(argumento)
+            duracion = time.perf_counter() - inicio
+            if i >= calentamiento:
+                tiempos.append(duracion)
+    return tiempos
+
+def memoria_pico(funcion, preparar=None):
+    """Pico de memoria (bytes) reservado durante una llamada a funcion()"""
+    with _silencio():
+        argumento = preparar(0) if preparar else None
+        tracemalloc.start()
+        try:
+            funcion(argumento)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+def estadisticas(tiempos):
+    tiempos = np.asarray(tiempos, dtype=np.float64)
+    return {
+        'repeticiones': len(tiempos),
+        'mediana_s': float(np.median(tiempos)),
+        'p95_s': float(np.percentile(tiempos, 95)),
+        'minimo_s': float(tiempos.min()),
+        'maximo_s': float(tiempos.max()),
+    }
+
+def preparar_red(carpeta, conexiones, modelo='libre_escala', semilla=0):
+    """CSV de la red sintética con ~conexiones enlaces (grado medio 4); se genera una sola vez"""
+    archivo = os.path.join(carpeta, f"red_{modelo}_{conexiones}_s{semilla}.csv")
+    if not os.path.exists(archivo):
+        print(f"🏭 Generando red de {conexiones} conexiones ({modelo})...")
+        generar_red(archivo, max(2, conexiones // 2), modelo, conexiones=conexiones, semilla=semilla)
+    return archivo
+
+def _metadatos(argumentos):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'procesadores': os.cpu_count(),
+        'modelo': argumentos.modelo,
+        'semilla': argumentos.semilla,
+        'repeticiones': argumentos.repeticiones,
+    }
+
+def _registrar(resultados, caso, conexiones, parametro, tiempos, pico, unidades=None):
+    """Agrega un resultado; unidades: trabajo por llamada (filas, rutas) para el rendimiento"""
+    resultado = {'caso': caso, 'conexiones': conexiones, 'parametro': parametro}
+    resultado.update(estadisticas(tiempos))
+    resultado['memoria_pico_bytes'] = pico
+    if unidades:
+        resultado['por_segundo'] = unidades / resultado['mediana_s']
+    resultados.append(resultado)
+    extra = f" ({resultado['por_segundo']:,.0f}/s)" if unidades else ""
+    etiqueta = f"{caso}[{parametro}]" if parametro else caso
+    print(f"   {etiqueta:<24} mediana {resultado['mediana_s'] * 1000:10.3f} ms | "
+          f"p95 {resultado['p95_s'] * 1000:10.3f} ms | pico {pico / 2**20:8.1f} MB{extra}")
+
+def ejecutar(argumentos):
+    """Corre todos los casos para cada tamaño y devuelve el documento de resultados"""
+    from main import RedISP
+
+    os.makedirs(argumentos.carpeta, exist_ok=True)
+    repeticiones = argumentos.repeticiones
+    resultados = []
+    for conexiones in argumentos.tamanos:
+        archivo = preparar_red(argumentos.carpeta, conexiones, argumentos.modelo, argumentos.semilla)
+        print(f"\n⏱️  Red de {conexiones} conexiones: {archivo}")
+
+        # carga del CSV (filas por segundo)
+        def cargar(_):
+            RedISP().cargar_red_desde_archivo(archivo)
+        _registrar(resultados, 'carga', conexiones, None, medir(cargar, repeticiones),
+                   memoria_pico(cargar), conexiones)
+
+        red = RedISP()
+        with _silencio():
+            red.cargar_red_desde_archivo(archivo)
+        azar = random.Random(argumentos.semilla)
+        origenes = [azar.choice(red.ciudades) for _ in range(repeticiones + 1)]
+
+        # Dijkstra completo desde un origen distinto en cada repetición (sin caché)
+        for criterio in CRITERIOS:
+            def elegir_origen(i):
+                red.limpiar_cache()
+                return origenes[i % len(origenes)]
+            def dijkstra(origen):
+                red.dijkstra_optimizado(origen, criterio)
+            _registrar(resultados, 'dijkstra', conexiones, criterio,
+                       medir(dijkstra, repeticiones, elegir_origen),
+                       memoria_pico(dijkstra, elegir_origen))
+
+        # métricas de rutas ya calculadas (tiempo por ruta)
+        rutas = []
+        with _silencio():
+            while len(rutas) < RUTAS_METRICAS:
+                origen, destino = azar.sample(red.ciudades, 2)
+                ruta, _ = red.ruta_optima(origen, destino)
+                if ruta:
+                    rutas.append(ruta)
+        def metricas(_):
+            for ruta in rutas:
+                red.obtener_metricas_ruta(ruta)
+        tiempos = [t / len(rutas) for t in medir(metricas, repeticiones)]
+        _registrar(resultados, 'metricas_ruta', conexiones, None, tiempos, memoria_pico(metricas))
+
+        # dibujo del grafo completo (se guarda en <carpeta>/salidas)
+        if conexiones <= argumentos.max_render:
+            # layout desde cero, sin las posiciones en memoria ni en disco
+            def ubicar(_):
+                red._layout = None
+                red.posiciones_grafo()
+            red.carpeta_layouts = None
+            tiempos = medir(ubicar, argumentos.repeticiones_render, calentamiento=0)
+            _registrar(resultados, 'layout', conexiones, None, tiempos, memoria_pico(ubicar))
+
+            imagen = f"bench_{conexiones}.png"
+            def dibujar(_):
+                red.crear_imagen_grafo(nombre_archivo=imagen)
+            directorio = os.getcwd()
+            os.chdir(argumentos.carpeta)
+            try:
+                if os.path.exists(os.path.join("salidas", imagen)):
+                    os.remove(os.path.join("salidas", imagen))
+                tiempos = medir(dibujar, argumentos.repeticiones_render, calentamiento=0)
+                # crear_imagen_grafo informa sus errores sin lanzarlos: se verifica la imagen
+                if os.path.exists(os.path.join("salidas", imagen)):
+                    _registrar(resultados, 'render', conexiones, None, tiempos, memoria_pico(dibujar))
+                else:
+                    print("   ⚠️  render falló: crear_imagen_grafo no generó la imagen")
+            finally:
+                os.chdir(directorio)
+        else:
+            print(f"   render omitido (más de {argumentos.max_render} conexiones)")
+
+    return {'metadatos': _metadatos(argumentos), 'resultados': resultados}
+
+def comparar(base, nuevo, umbral=0.10):
+    """
+    Compara dos corridas caso por caso (mediana y pico de memoria)
+    Devuelve (filas, regresiones): cada fila es (clave, mediana base, mediana nueva, cambio,
+    cambio de memoria, estado) y regresiones cuenta los casos que empeoraron más que el umbral;
+    los casos medidos en una sola de las corridas quedan como 'nuevo' o 'ausente'
+    """
+    def clave(resultado):
+        return (resultado['caso'], resultado['conexiones'], resultado.get('parametro'))
+
+    anteriores = {clave(r): r for r in base['resultados']}
+    filas, regresiones = [], 0
+    for resultado in nuevo['resultados']:
+        anterior = anteriores.get(clave(resultado))
+        if anterior is None:
+            filas.append((clave(resultado), None, resultado['mediana_s'], None, None, 'nuevo'))
+            continue
+        cambio = resultado['mediana_s'] / anterior['mediana_s'] - 1
+        aumento_memoria = resultado['memoria_pico_bytes'] - anterior['memoria_pico_bytes']
+        cambio_memoria = (aumento_memoria / anterior['memoria_pico_bytes']
+                          if anterior['memoria_pico_bytes'] else 0.0)
+        if cambio > umbral or (cambio_memoria > umbral and aumento_memoria > MEMORIA_MINIMA_REGRESION):
+            estado = 'regresion'
+            regresiones += 1
+        elif cambio < -umbral:
+            estado = 'mejora'
+        else:
+            estado = 'igual'
+        filas.append((clave(resultado), anterior['mediana_s'], resultado['mediana_s'],
+                      cambio, cambio_memoria, estado))
+    medidos = {clave(resultado) for resultado in nuevo['resultados']}
+    for clave_base, anterior in anteriores.items():
+        if clave_base not in medidos:
+            filas.append((clave_base, anterior['mediana_s'], None, None, None, 'ausente'))
+    return filas, regresiones
+
+def mostrar_comparacion(filas, umbral):
+    iconos = {'regresion': '⚠️  REGRESIÓN', 'mejora': '🚀 mejora', 'igual': '✅', 'nuevo': '🆕 nuevo',
+              'ausente': '❔ sin medir'}
+    print(f"\n📊 COMPARACIÓN (umbral {umbral:.0%})")
+    print("=" * 90)
+    for (caso, conexiones, parametro), antes, despues, cambio, cambio_memoria, estado in filas:
+        etiqueta = f"{caso}[{parametro}]" if parametro else caso
+        if antes is None or despues is None:
+            tiempo = despues if antes is None else antes
+            print(f"   {etiqueta:<24} {conexiones:>10} | {tiempo * 1000:10.3f} ms | {iconos[estado]}")
+            continue
+        print(f"   {etiqueta:<24} {conexiones:>10} | {antes * 1000:10.3f} → {despues * 1000:10.3f} ms "
+              f"({cambio:+.1%}, memoria {cambio_memoria:+.1%}) | {iconos[estado]}")
+
+def parsear_argumentos(argv=None):
+    """Lee los argumentos de la línea de comandos"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmarks del simulador de red ISP")
+    parser.add_argument('--tamanos', default=",".join(map(str, TAMANOS)),
+                        help="conexiones de cada red separadas por comas (ej.: 100,10000,1000000)")
+    parser.add_argument('--modelo', default='libre_escala', choices=MODELOS,
+                        help="modelo de las redes sintéticas")
+    parser.add_argument('--semilla', type=int, default=0, help="semilla de las redes y de los orígenes")
+    parser.add_argument('--repeticiones', type=int, default=7, help="repeticiones medidas por caso")
+    parser.add_argument('--repeticiones-render', type=int, default=3,
+                        help="repeticiones del dibujo del grafo")
+    parser.add_argument('--max-render', type=int, default=MAX_CONEXIONES_RENDER,
+                        help="mayor red (conexiones) que se dibuja")
+    parser.add_argument('--carpeta', default="benchmarks",
+                        help="carpeta de trabajo para las redes generadas y las imágenes")
+    parser.add_argument('--salida', default=None,
+                        help="JSON de resultados (por defecto: <carpeta>/resultados_<fecha>.json)")
+    parser.add_argument('--comparar', nargs=2, metavar=('BASE', 'NUEVO'),
+                        help="comparar dos archivos de resultados en lugar de medir")
+    parser.add_argument('--umbral', type=float, default=0.10,
+                        help="cambio relativo a partir del cual se marca una regresión (0.10 = 10 %%)")
+    argumentos = parser.parse_args(argv)
+    argumentos.tamanos = [int(tamano) for tamano in argumentos.tamanos.split(",") if tamano.strip()]
+    return argumentos
+
+if __name__ == "__main__":
+    argumentos = parsear_argumentos()
+    if argumentos.comparar:
+        documentos = []
+        for archivo in argumentos.comparar:
+            with open(archivo, encoding='utf-8') as entrada:
+                documentos.append(json.load(entrada))
+        filas, regresiones = comparar(*documentos, argumentos.umbral)
+        mostrar_comparacion(filas, argumentos.umbral)
+        if regresiones:
+            print(f"\n❌ {regresiones} casos empeoraron más de {argumentos.umbral:.0%}")
+            sys.exit(1)
+        print("\n✅ Sin regresiones")
+        sys.exit()
+
+    documento = ejecutar(argumentos)
+    salida = argumentos.salida or os.path.join(
+        argumentos.carpeta, f"resultados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(salida, 'w', encoding='utf-8') as archivo:
+        json.dump(documento, archivo, ensure_ascii=False, indent=2)
+    print(f"\n✅ {len(documento['resultados'])} resultados → {salida}")
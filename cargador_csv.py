@@ -0,0 +1,164 @@
+"""
+Lectura en bloques del CSV de conexiones de la red ISP
+Formato: ciudad_origen,ciudad_destino,latencia_ms,costo_soles,ancho_banda_mbps
+Cada bloque de líneas se convierte con el parser en C de NumPy; solo si el bloque
+tiene filas dañadas se revisa línea por línea para informarlas sin abortar la carga.
+Acepta archivos comprimidos con gzip (.gz).
+"""
+import csv
+import gzip
+
+import numpy as np
+
+# Líneas por bloque: la memoria de la lectura depende de este valor, no del tamaño del archivo
+TAMANO_BLOQUE = 100_000
+
+# Cantidad máxima de filas con error que se guardan como ejemplo en el reporte
+MAX_EJEMPLOS_ERROR = 20
+
+# Políticas para conexiones paralelas (mismo par de ciudades repetido en el archivo)
+POLITICAS_DUPLICADOS = ('conservar', 'primera', 'ultima', 'min_latencia', 'min_costo', 'max_ancho_banda')
+
+def abrir_texto(archivo):
+    """Abre el archivo como texto, descomprimiendo gzip si corresponde"""
+    with open(archivo, 'rb') as prueba:
+        comprimido = prueba.read(2) == b'\x1f\x8b'
+    if comprimido:
+        return gzip.open(archivo, 'rt', encoding='utf-8', newline='')
+    return open(archivo, encoding='utf-8', newline='')
+
+def es_encabezado(linea, columnas_numericas=(2, 5)):
+    """Una línea es encabezado si sus columnas numéricas [inicio, fin) no son números"""
+    inicio, fin = columnas_numericas
+    campos = next(csv.reader([linea]), [])
+    if len(campos) < fin:
+        return False
+    try:
+        for campo in campos[inicio:fin]:
+            float(campo)
+    except ValueError:
+        return True
+    return False
+
+def leer_bloques(archivo_texto, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Recorre el archivo en bloques de líneas no vacías
+    Devuelve tuplas (números de línea, líneas) sin cargar el archivo completo
+    """
+    numeros, lineas = [], []
+    for numero, linea in enumerate(archivo_texto, 1):
+        linea = linea.strip()
+        if not linea:
+            continue
+        numeros.append(numero)
+        lineas.append(linea)
+        if len(lineas) >= tamano_bloque:
+            yield numeros, lineas
+            numeros, lineas = [], []
+    if lineas:
+        yield numeros, lineas
+
+def _validar_fila(campos):
+    """Valida una fila ya separada; devuelve (valores, None) o (None, motivo)"""
+    if len(campos) < 5:
+        return None, f"se esperaban 5 columnas y hay {len(campos)}"
+    ciudad_a, ciudad_b = campos[0].strip(), campos[1].strip()
+    if not ciudad_a or not ciudad_b:
+        return None, "ciudad vacía"
+    try:
+        latencia, costo, ancho_banda = float(campos[2]), float(campos[3]), float(campos[4])
+    except ValueError:
+        return None, "valor numérico inválido"
+    motivo = motivo_valores(latencia, costo, ancho_banda)
+    if motivo:
+        return None, motivo
+    return (ciudad_a, ciudad_b, latencia, costo, ancho_banda), None
+
+def motivo_valores(latencia, costo, ancho_banda):
+    """Reglas de validez de las métricas de una conexión"""
+    if not (np.isfinite(latencia) and np.isfinite(costo) and np.isfinite(ancho_banda)):
+        return "valor no finito"
+    if latencia < 0 or costo < 0:
+        return "latencia o costo negativo"
+    if ancho_banda <= 0:
+        return "ancho de banda no positivo"
+    return None
+
+def parsear_bloque(numeros, lineas):
+    """
+    Convierte un bloque de líneas en columnas NumPy
+    Devuelve (origenes, destinos, latencia, costo, ancho_banda, errores) donde
+    errores es una lista de (número de línea, motivo, contenido)
+    """
+    try:
+        nombres = np.loadtxt(lineas, delimiter=',', quotechar='"', comments=None, dtype=str,
+                             usecols=(0, 1), ndmin=2)
+        valores = np.loadtxt(lineas, delimiter=',', quotechar='"', comments=None, dtype=np.float64,
+                             usecols=(2, 3, 4), ndmin=2)
+    except ValueError:
+        return _parsear_bloque_por_filas(numeros, lineas)
+
+    origenes = np.char.strip(nombres[:, 0])
+    destinos = np.char.strip(nombres[:, 1])
+    latencia, costo, ancho_banda = valores[:, 0], valores[:, 1], valores[:, 2]
+
+    # validación vectorizada de todo el bloque
+    invalidas = ((origenes == '') | (destinos == '') |
+                 ~np.isfinite(valores).all(axis=1) |
+                 (latencia < 0) | (costo < 0) | (ancho_banda <= 0))
+    errores = []
+    if invalidas.any():
+        for i in np.flatnonzero(invalidas).tolist():
+            campos = next(csv.reader([lineas[i]]))
+            errores.append((numeros[i], _validar_fila(campos)[1], lineas[i]))
+        validas = ~invalidas
+        origenes, destinos = origenes[validas], destinos[validas]
+        latencia, costo, ancho_banda = latencia[validas], costo[validas], ancho_banda[validas]
+    return origenes, destinos, latencia, costo, ancho_banda, errores
+
+def _parsear_bloque_por_filas(numeros, lineas):
+    """Camino lento para bloques con filas dañadas: revisa cada línea y acumula los errores"""
+    filas, errores = [], []
+    for numero, campos, linea in zip(numeros, csv.reader(lineas), lineas):
+        valores, motivo = _validar_fila(campos)
+        if motivo:
+            errores.append((numero, motivo, linea))
+        else:
+            filas.append(valores)
+
+    origenes = np.array([fila[0] for fila in filas], dtype=str)
+    destinos = np.array([fila[1] for fila in filas], dtype=str)
+    metricas = np.array([fila[2:] for fila in filas], dtype=np.float64).reshape(-1, 3)
+    return origenes, destinos, metricas[:, 0], metricas[:, 1], metricas[:, 2], errores
+
+def indices_sin_duplicados(extremo_a, extremo_b, latencia, costo, ancho_banda, politica):
+    """
+    Índices (en orden original) de las conexiones que se conservan según la política
+    Las conexiones A-B y B-A se consideran el mismo par de ciudades
+    """
+    m = len(extremo_a)
+    if politica == 'conservar' or m == 0:
+        return np.arange(m)
+    if politica not in POLITICAS_DUPLICADOS:
+        raise ValueError(f"Política de duplicados desconocida: {politica}")
+
+    menor = np.minimum(extremo_a, extremo_b).astype(np.int64)
+    mayor = np.maximum(extremo_a, extremo_b).astype(np.int64)
+    par = menor * (int(max(mayor.max(), 0)) + 1) + mayor
+    posicion = np.arange(m)
+
+    # ordenar por par y, dentro del par, poniendo primero la conexión preferida
+    if politica == 'primera':
+        preferencia = posicion
+    elif politica == 'ultima':
+        preferencia = -posicion
+    elif politica == 'min_latencia':
+        preferencia = latencia
+    elif politica == 'min_costo':
+        preferencia = costo
+    else:  # max_ancho_banda
+        preferencia = -ancho_banda
+    orden = np.lexsort((posicion, preferencia, par))
+    primero_del_par = np.ones(m, dtype=bool)
+    primero_del_par[1:] = par[orden][1:] != par[orden][:-1]
+    return np.sort(orden[primero_del_par])
@@ -0,0 +1,240 @@
+"""
+Consultas de rutas en lote (origen, destino, criterio) sin menú interactivo
+Las consultas se agrupan por (origen, criterio) para calcular cada árbol de caminos
+mínimos una sola vez; los grupos se reparten entre procesos que leen el grafo desde
+memoria compartida y los resultados se devuelven a medida que terminan.
+El criterio ancho_banda usa el camino más ancho (como ruta_mas_ancha en los menús y la API)
+y su distancia es el ancho de banda limitante.
+Formato de entrada (JSON lines): {"origen": "Lima", "destino": "Cusco", "criterio": "costo", "id": ...}
+"""
+import json
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+import memoria_compartida
+from rutas_csr import (CRITERIO_MAS_ANCHO, camino_desde_previo, camino_mas_ancho, camino_min_saltos,
+                       dijkstra_csr, metricas_arbol, metricas_camino)
+
+# Consultas que se leen y agrupan a la vez (limita la memoria con archivos enormes)
+TAMANO_LOTE = 50_000
+
+# Datos del proceso de trabajo (se llenan en _inicializar_proceso)
+_compartido = {}
+
+def leer_consultas(archivo):
+    """Lee un archivo JSON lines de consultas; las líneas inválidas se devuelven como error"""
+    with open(archivo, encoding='utf-8') as entrada:
+        for numero, linea in enumerate(entrada, 1):
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                consulta = json.loads(linea)
+            except ValueError:
+                consulta = {'error': f"línea {numero}: JSON inválido"}
+            if not isinstance(consulta, dict):
+                consulta = {'error': f"línea {numero}: se esperaba un objeto JSON"}
+            yield consulta
+
+def _inicializar_proceso(descriptores):
+    """Inicializador del pool: abre los bloques compartidos una vez por proceso"""
+    bloques, arreglos = memoria_compartida.abrir(descriptores)
+    _preparar(arreglos)
+    _compartido['bloques'] = bloques  # mantener vivos los bloques abiertos
+
+def _preparar(arreglos):
+    """Convierte la estructura a listas para el bucle interno y guarda las columnas"""
+    _compartido['offsets'] = arreglos['offsets'].tolist()
+    _compartido['destinos'] = arreglos['destinos'].tolist()
+    _compartido['indice_arcos'] = (arreglos['clave_arco'], arreglos['arista_de_clave'])
+    _compartido['columnas'] = (arreglos['latencia'], arreglos['costo'], arreglos['ancho_banda'])
+    _compartido['pesos'] = arreglos['pesos']
+    _compartido['pesos_listas'] = {}
+    _compartido['capacidad'] = arreglos['capacidad']
+    _compartido['capacidad_lista'] = None
+
+def _resolver_grupo(tarea):
+    """
+    Resuelve todas las consultas de un mismo (origen, criterio) con un solo Dijkstra
+    Si el grupo tiene un solo destino, la búsqueda termina al asentarlo; si tiene varios,
+    las métricas de todos salen de una pasada sobre el árbol completo
+    """
+    k, fuente, pendientes = tarea
+    if k < 0:
+        return _resolver_grupo_ancho(fuente, pendientes)
+    pesos_listas = _compartido['pesos_listas']
+    if k not in pesos_listas:
+        pesos_listas[k] = _compartido['pesos'][k].tolist()
+    offsets, destinos = _compartido['offsets'], _compartido['destinos']
+    claves, arista_de_clave = _compartido['indice_arcos']
+    columnas = _compartido['columnas']
+
+    objetivo = pendientes[0][1] if len(pendientes) == 1 else None
+    dist, previo = dijkstra_csr(offsets, destinos, pesos_listas[k], fuente, objetivo)
+    if objetivo is None:
+        metricas_todas = metricas_arbol(claves, arista_de_clave, *columnas, previo, fuente)
+
+    resultados = []
+    for indice, destino in pendientes:
+        if dist[destino] == float('inf'):
+            resultados.append((indice, None, None, None))
+            continue
+        camino = camino_desde_previo(previo, destino)
+        if objetivo is not None:
+            metricas = metricas_camino(claves, arista_de_clave, len(dist), *columnas, camino)
+        elif destino == fuente:
+            metricas = None
+        else:
+            latencia, costo, ancho_banda, saltos = (columna[destino] for columna in metricas_todas)
+            metricas = {'latencia_total': float(latencia), 'costo_total': float(costo),
+                        'ancho_banda_limitante': float(ancho_banda), 'saltos': int(saltos)}
+        resultados.append((indice, camino, dist[destino], metricas))
+    return resultados
+
+def _resolver_grupo_ancho(fuente, pendientes):
+    """
+    Consultas de un origen por el camino más ancho: un solo Dijkstra de cuello de botella
+    y, por destino, la ruta con menos saltos entre las de ese ancho (igual que ruta_mas_ancha)
+    """
+    if _compartido['capacidad_lista'] is None:
+        _compartido['capacidad_lista'] = _compartido['capacidad'].tolist()
+    capacidad = _compartido['capacidad_lista']
+    offsets, destinos = _compartido['offsets'], _compartido['destinos']
+    claves, arista_de_clave = _compartido['indice_arcos']
+    columnas = _compartido['columnas']
+
+    objetivo = pendientes[0][1] if len(pendientes) == 1 else None
+    ancho, _ = camino_mas_ancho(offsets, destinos, capacidad, fuente, objetivo)
+
+    resultados = []
+    for indice, destino in pendientes:
+        if ancho[destino] == 0:
+            resultados.append((indice, None, None, None))
+            continue
+        camino = camino_min_saltos(offsets, destinos, capacidad, fuente, destino, ancho[destino])
+        metricas = metricas_camino(claves, arista_de_clave, len(ancho), *columnas, camino)
+        distancia = ancho[destino] if destino != fuente else None  # ancho infinito en el origen
+        resultados.append((indice, camino, distancia, metricas))
+    return resultados
+
+def _lotes(consultas, tamano_lote):
+    """Agrupa el flujo de consultas en listas de tamaño limitado"""
+    lote = []
+    for consulta in consultas:
+        lote.append(consulta)
+        if len(lote) >= tamano_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def resolver_consultas(red, consultas, procesos=None, tamano_lote=TAMANO_LOTE):
+    """
+    Resuelve un flujo de consultas y devuelve los resultados a medida que terminan
+    Cada resultado trae el índice de la consulta en la entrada (el orden de salida puede variar),
+    la ruta, la distancia según el criterio y las métricas de obtener_metricas_ruta
+    (con ancho_banda, la ruta de ruta_mas_ancha y su ancho limitante como distancia)
+    """
+    compacto = red.compacto
+    criterios = [criterio for criterio in red.criterios if criterio != CRITERIO_MAS_ANCHO]
+    numero_criterio = {criterio: k for k, criterio in enumerate(criterios)}
+    arreglos = {
+        'offsets': compacto.offsets,
+        'destinos': compacto.destinos,
+        'clave_arco': compacto.clave_arco,
+        'arista_de_clave': compacto.arista_de_clave,
+        'latencia': compacto.latencia,
+        'costo': compacto.costo,
+        'ancho_banda': compacto.ancho_banda_par(),
+        'pesos': np.vstack([red.pesos_criterio(criterio)[compacto.arista] for criterio in criterios]),
+        'capacidad': compacto.ancho_banda_par()[compacto.arista],
+    }
+
+    procesos = max(1, procesos or os.cpu_count() or 1)
+    pool, bloques = None, {}
+    if procesos > 1:
+        bloques, compartidos, descriptores = memoria_compartida.publicar(arreglos)
+        compartidos.clear()
+        pool = Pool(procesos, initializer=_inicializar_proceso, initargs=(descriptores,))
+    else:
+        _preparar(arreglos)
+
+    try:
+        indice = 0
+        for lote in _lotes(consultas, tamano_lote):
+            originales = {}
+            grupos = {}
+            for consulta in lote:
+                originales[indice] = consulta
+                error = consulta.get('error') or _validar_consulta(red, consulta)
+                if error:
+                    yield _resultado(indice, consulta, error=error)
+                else:
+                    criterio = consulta.get('criterio', 'latencia')
+                    k = -1 if criterio == CRITERIO_MAS_ANCHO else numero_criterio[criterio]
+                    clave = (k, compacto.indice[consulta['origen']])
+                    grupos.setdefault(clave, []).append((indice, compacto.indice[consulta['destino']]))
+                indice += 1
+
+            tareas = [(k, fuente, pendientes) for (k, fuente), pendientes in grupos.items()]
+            if pool is not None:
+                resueltos = pool.imap_unordered(_resolver_grupo, tareas, chunksize=4)
+            else:
+                resueltos = map(_resolver_grupo, tareas)
+            for resultados in resueltos:
+                for i, camino, distancia, metricas in resultados:
+                    ruta = [compacto.nombres[v] for v in camino] if camino is not None else None
+                    yield _resultado(i, originales[i], ruta=ruta, distancia=distancia, metricas=metricas)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+            memoria_compartida.liberar(bloques)
+        else:
+            _compartido.clear()
+
+def _validar_consulta(red, consulta):
+    """Motivo por el que una consulta no se puede resolver, o None"""
+    for campo in ('origen', 'destino'):
+        ciudad = consulta.get(campo)
+        if not isinstance(ciudad, str) or ciudad not in red.compacto.indice:
+            return f"ciudad de {campo} no válida: {consulta.get(campo)}"
+    criterio = consulta.get('criterio', 'latencia')
+    if not isinstance(criterio, str) or criterio not in red.criterios:
+        return f"criterio no válido: {consulta.get('criterio')}"
+    return None
+
+def _resultado(indice, consulta, ruta=None, distancia=None, metricas=None, error=None):
+    """Resultado de una consulta listo para escribir como JSON"""
+    resultado = {
+        'indice': indice,
+        'origen': consulta.get('origen'),
+        'destino': consulta.get('destino'),
+        'criterio': consulta.get('criterio', 'latencia'),
+    }
+    if 'id' in consulta:
+        resultado['id'] = consulta['id']
+    if error:
+        resultado['error'] = error
+        return resultado
+    resultado['ruta'] = ruta
+    resultado['distancia'] = distancia
+    resultado['metricas'] = metricas
+    if ruta is None:
+        resultado['error'] = "sin conexión"
+    elif metricas is None:
+        # origen y destino iguales: ruta de una sola ciudad
+        resultado['metricas'] = {'latencia_total': 0, 'costo_total': 0,
+                                 'ancho_banda_limitante': None, 'saltos': 0}
+    return resultado
+
+def escribir_resultados(resultados, archivo):
+    """Escribe los resultados como JSON lines a medida que llegan; devuelve cuántos se escribieron"""
+    total = 0
+    with open(archivo, 'w', encoding='utf-8') as salida:
+        for resultado in resultados:
+            salida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+            total += 1
+    return total
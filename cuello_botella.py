@@ -0,0 +1,110 @@
+"""
+Tabla de cuellos de botella todos-contra-todos (máximo ancho de banda entre dos ciudades)
+El camino de máximo cuello de botella entre dos ciudades siempre se puede tomar dentro
+de un árbol de expansión máximo, así que basta con construir ese árbol (Kruskal) y
+responder cada par con el menor ancho en el camino del árbol usando saltos binarios
+hacia el ancestro común: construcción O(m log m) y O(log n) por consulta.
+"""
+import numpy as np
+
+class TablaCuelloBotella:
+    """
+    Árbol (bosque) de expansión máximo con tablas de saltos binarios
+    ancho(u, v) es el mayor ancho de banda limitante posible entre u y v:
+    infinito si u == v y 0 si están en componentes distintas
+    """
+    def __init__(self, n, extremo_a, extremo_b, capacidad):
+        self.n = n
+        extremo_a = np.asarray(extremo_a, dtype=np.int64)
+        extremo_b = np.asarray(extremo_b, dtype=np.int64)
+        capacidad = np.asarray(capacidad, dtype=np.float64)
+
+        # Kruskal: conexiones de mayor a menor ancho con unión-búsqueda
+        raiz = list(range(n))
+        def buscar(x):
+            while raiz[x] != x:
+                raiz[x] = raiz[raiz[x]]  # compresión de caminos a la mitad
+                x = raiz[x]
+            return x
+
+        vecinos = [[] for _ in range(n)]
+        orden = np.argsort(-capacidad, kind='stable')
+        restantes = n - 1
+        for a, b, c in zip(extremo_a[orden].tolist(), extremo_b[orden].tolist(),
+                           capacidad[orden].tolist()):
+            ra, rb = buscar(a), buscar(b)
+            if ra == rb:
+                continue
+            raiz[ra] = rb
+            vecinos[a].append((b, c))
+            vecinos[b].append((a, c))
+            restantes -= 1
+            if restantes == 0:
+                break
+
+        # recorrer cada árbol del bosque: padre, ancho hacia el padre, profundidad y componente
+        padre = list(range(n))
+        ancho_padre = [float('inf')] * n
+        profundidad = [0] * n
+        componente = [-1] * n
+        for inicio in range(n):
+            if componente[inicio] >= 0:
+                continue
+            componente[inicio] = inicio
+            pila = [inicio]
+            while pila:
+                u = pila.pop()
+                for v, c in vecinos[u]:
+                    if componente[v] < 0:
+                        componente[v] = inicio
+                        padre[v] = u
+                        ancho_padre[v] = c
+                        profundidad[v] = profundidad[u] + 1
+                        pila.append(v)
+
+        self.profundidad = np.array(profundidad, dtype=np.int64)
+        self.componente = np.array(componente, dtype=np.int64)
+
+        # saltos binarios: ancestro a 2^k niveles y menor ancho en ese tramo
+        niveles = max(1, int(self.profundidad.max(initial=0)).bit_length())
+        self.ancestro = [np.array(padre, dtype=np.int64)]
+        self.minimo = [np.array(ancho_padre, dtype=np.float64)]
+        for _ in range(1, niveles):
+            anterior, minimo = self.ancestro[-1], self.minimo[-1]
+            self.ancestro.append(anterior[anterior])
+            self.minimo.append(np.minimum(minimo, minimo[anterior]))
+
+    def anchos(self, u, v):
+        """Cuello de botella máximo para los pares (u[i], v[i]) (arreglos de ids)"""
+        u = np.array(u, dtype=np.int64, ndmin=1)
+        v = np.array(v, dtype=np.int64, ndmin=1)
+        resultado = np.full(u.shape, np.inf)
+
+        # u queda como el más profundo de cada par
+        invertir = self.profundidad[u] < self.profundidad[v]
+        u, v = np.where(invertir, v, u), np.where(invertir, u, v)
+
+        # igualar profundidades
+        diferencia = self.profundidad[u] - self.profundidad[v]
+        for k in range(len(self.ancestro)):
+            subir = (diferencia >> k) & 1 == 1
+            resultado[subir] = np.minimum(resultado[subir], self.minimo[k][u[subir]])
+            u[subir] = self.ancestro[k][u[subir]]
+
+        # subir ambos hasta justo debajo del ancestro común
+        for k in reversed(range(len(self.ancestro))):
+            subir = self.ancestro[k][u] != self.ancestro[k][v]
+            resultado[subir] = np.minimum(resultado[subir], np.minimum(self.minimo[k][u[subir]],
+                                                                       self.minimo[k][v[subir]]))
+            u[subir] = self.ancestro[k][u[subir]]
+            v[subir] = self.ancestro[k][v[subir]]
+        distintos = u != v
+        resultado[distintos] = np.minimum(resultado[distintos], np.minimum(self.minimo[0][u[distintos]],
+                                                                           self.minimo[0][v[distintos]]))
+
+        resultado[self.componente[u] != self.componente[v]] = 0.0
+        return resultado
+
+    def ancho(self, u, v):
+        """Cuello de botella máximo entre dos ciudades (ids)"""
+        return float(self.anchos([u], [v])[0])
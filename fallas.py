@@ -0,0 +1,138 @@
+"""
+Análisis de fallas de enlaces: qué pares de ciudades empeoran si cae cada conexión
+Parte de las tablas todos-contra-todos (un árbol de caminos mínimos por origen). Cuando
+cae una conexión solo cambian los orígenes cuyo árbol la usa, y en cada uno de ellos solo
+el subárbol que colgaba de ella, así que cada falla se resuelve reparando esos subárboles
+en lugar de recalcular todo. Las fallas se reparten entre procesos que leen el grafo y
+las tablas desde memoria compartida.
+"""
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+import memoria_compartida
+from arboles_dinamicos import fuentes_afectadas, indice_hijos, peso_entre, reparar_aumento
+
+# Datos del proceso de trabajo (se llenan en _inicializar_proceso)
+_compartido = {}
+
+def _inicializar_proceso(descriptores):
+    """Inicializador del pool: abre los bloques compartidos una vez por proceso"""
+    bloques, arreglos = memoria_compartida.abrir(descriptores)
+    _preparar(arreglos)
+    _compartido['bloques'] = bloques  # mantener vivos los bloques abiertos
+
+def _preparar(arreglos):
+    """Convierte la estructura a listas para el bucle interno y guarda las tablas"""
+    _compartido['offsets'] = arreglos['offsets'].tolist()
+    _compartido['destinos'] = arreglos['destinos'].tolist()
+    _compartido['arista'] = arreglos['arista'].tolist()
+    _compartido['pesos'] = arreglos['pesos'].tolist()
+    _compartido['extremos'] = (arreglos['extremo_a'], arreglos['extremo_b'])
+    _compartido['distancias'] = arreglos['distancias']
+    _compartido['predecesores'] = arreglos['predecesores']
+
+def _tramos_caidos(grupo):
+    """Tramos (a, b, peso antes, peso después) que empeoran si caen las conexiones del grupo"""
+    offsets, destinos = _compartido['offsets'], _compartido['destinos']
+    arista, pesos = _compartido['arista'], _compartido['pesos']
+    extremo_a, extremo_b = _compartido['extremos']
+    excluidas = frozenset(grupo)
+    tramos = []
+    for a, b in {(int(extremo_a[e]), int(extremo_b[e])) for e in grupo}:
+        antes = peso_entre(offsets, destinos, pesos, a, b)
+        despues = peso_entre(offsets, destinos, pesos, a, b, arista, excluidas)
+        if despues > antes:
+            tramos.append((a, b, antes, despues))
+    return tramos
+
+def _simular_bloque(grupos):
+    """
+    Pares (s, t) con s < t que empeoran si caen a la vez las conexiones de cada grupo
+    Los orígenes afectados se recorren una sola vez por bloque, así el árbol de cada
+    origen se convierte a listas e indexa una vez para todas las fallas que lo tocan
+    Devuelve por grupo arreglos (origenes, destinos, antes, despues)
+    """
+    offsets, destinos = _compartido['offsets'], _compartido['destinos']
+    arista, pesos = _compartido['arista'], _compartido['pesos']
+    distancias, predecesores = _compartido['distancias'], _compartido['predecesores']
+
+    tramos_grupo = [_tramos_caidos(grupo) for grupo in grupos]
+    grupos_de_fuente = {}
+    for g, tramos in enumerate(tramos_grupo):
+        fuentes = set()
+        for a, b, antes, despues in tramos:
+            fuentes.update(fuentes_afectadas(distancias, predecesores, a, b, antes, despues).tolist())
+        for s in fuentes:
+            grupos_de_fuente.setdefault(s, []).append(g)
+
+    pares = [([], [], [], []) for _ in grupos]
+    for s in sorted(grupos_de_fuente):
+        original, previo_original = distancias[s].tolist(), predecesores[s].tolist()
+        hijos = indice_hijos(previo_original)
+        for g in grupos_de_fuente[s]:
+            tramos = tramos_grupo[g]
+            excluidas = frozenset(grupos[g])
+            dist, previo = list(original), list(previo_original)
+            cambiadas = set()
+            for i, (a, b, _, despues) in enumerate(tramos):
+                # el índice de hijos solo vale para el árbol sin reparar
+                cambiadas |= reparar_aumento(offsets, destinos, pesos, dist, previo, a, b, despues,
+                                             arista, excluidas, hijos if i == 0 else None)
+            # cada par se informa una sola vez (la red es no dirigida)
+            origenes, finales, antes, despues = pares[g]
+            for t in sorted(cambiadas):
+                if t > s and dist[t] != original[t]:
+                    origenes.append(s)
+                    finales.append(t)
+                    antes.append(original[t])
+                    despues.append(dist[t])
+    return [(np.array(origenes, dtype=np.int32), np.array(finales, dtype=np.int32),
+             np.array(antes, dtype=np.float64), np.array(despues, dtype=np.float64))
+            for origenes, finales, antes, despues in pares]
+
+def barrer_fallas(offsets, destinos, arista, pesos, extremo_a, extremo_b, distancias, predecesores,
+                  grupos=None, procesos=None, tamano_bloque=None):
+    """
+    Simula la caída de cada grupo de conexiones (por defecto, cada conexión por separado)
+    pesos: peso de cada arco; distancias/predecesores: tablas n x n con fila s = árbol con raíz s
+    Devuelve un generador de (grupo, (origenes, destinos, antes, despues)) en el orden de los grupos
+    """
+    if grupos is None:
+        grupos = [(e,) for e in range(len(extremo_a))]
+    grupos = [tuple(grupo) for grupo in grupos]
+    arreglos = {
+        'offsets': np.asarray(offsets, dtype=np.int64),
+        'destinos': np.asarray(destinos, dtype=np.int32),
+        'arista': np.asarray(arista, dtype=np.int32),
+        'pesos': np.asarray(pesos, dtype=np.float64),
+        'extremo_a': np.asarray(extremo_a, dtype=np.int32),
+        'extremo_b': np.asarray(extremo_b, dtype=np.int32),
+        'distancias': distancias,
+        'predecesores': predecesores,
+    }
+
+    procesos = procesos or os.cpu_count() or 1
+    procesos = max(1, min(procesos, len(grupos)))
+    if tamano_bloque is None:
+        tamano_bloque = max(1, len(grupos) // (procesos * 8))
+    bloques_grupos = [grupos[inicio:inicio + tamano_bloque] for inicio in range(0, len(grupos), tamano_bloque)]
+
+    if procesos == 1:
+        # sin pool: mismo código de trabajo sobre arreglos locales
+        _preparar(arreglos)
+        try:
+            for bloque in bloques_grupos:
+                yield from zip(bloque, _simular_bloque(bloque))
+        finally:
+            _compartido.clear()
+        return
+
+    bloques, publicados, descriptores = memoria_compartida.publicar(arreglos)
+    try:
+        with Pool(procesos, initializer=_inicializar_proceso, initargs=(descriptores,)) as pool:
+            for bloque, resultados in zip(bloques_grupos, pool.imap(_simular_bloque, bloques_grupos)):
+                yield from zip(bloque, resultados)
+    finally:
+        memoria_compartida.liberar(bloques, publicados)
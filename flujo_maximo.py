@@ -0,0 +1,120 @@
+"""
+Flujo máximo / corte mínimo entre ciudades usando el ancho de banda como capacidad
+La red es no dirigida: cada conexión aporta su capacidad en los dos sentidos, y el arco
+a -> b y su gemelo b -> a (la misma conexión) son el residual uno del otro.
+El flujo máximo usa Dinic (niveles por búsqueda en anchura y flujo bloqueante con
+puntero al arco actual); el árbol de Gomory–Hu de todos los pares se arma con el
+algoritmo de Gusfield: n - 1 flujos máximos sobre la red original, sin contraer ciudades,
+con el intercambio de nodos que hace que cada tramo del árbol sea un corte mínimo real.
+"""
+from collections import deque
+
+import numpy as np
+
+# Residual por debajo del cual un arco se considera saturado (Mbps)
+TOLERANCIA_FLUJO = 1e-9
+
+def arcos_gemelos(arista):
+    """Para cada arco, el arco de la misma conexión en el sentido contrario"""
+    arista = np.asarray(arista)
+    orden = np.argsort(arista, kind='stable')  # los dos arcos de cada conexión quedan juntos
+    gemelo = np.empty(len(arista), dtype=np.int64)
+    gemelo[orden[0::2]] = orden[1::2]
+    gemelo[orden[1::2]] = orden[0::2]
+    return gemelo
+
+def _niveles(offsets, destinos, residual, s, t):
+    """Distancia en saltos desde s por arcos con residual; -1 si no se alcanza"""
+    nivel = [-1] * (len(offsets) - 1)
+    nivel[s] = 0
+    cola = deque([s])
+    while cola:
+        u = cola.popleft()
+        siguiente = nivel[u] + 1
+        for i in range(offsets[u], offsets[u + 1]):
+            v = destinos[i]
+            if nivel[v] < 0 and residual[i] > TOLERANCIA_FLUJO:
+                nivel[v] = siguiente
+                if v == t:
+                    return nivel
+                cola.append(v)
+    return nivel
+
+def flujo_maximo(offsets, destinos, gemelo, capacidad, s, t):
+    """
+    Flujo máximo de s a t (Dinic) sobre listas CSR; capacidad por arco
+    Devuelve (valor, lado) donde lado[v] es True para las ciudades del lado de s en un corte mínimo
+    """
+    if s == t:
+        raise ValueError("El origen y el destino del flujo deben ser distintos")
+    residual = list(capacidad)
+    total = 0.0
+    while True:
+        nivel = _niveles(offsets, destinos, residual, s, t)
+        if nivel[t] < 0:
+            break
+
+        # flujo bloqueante: caminos de s a t que suben un nivel por salto
+        puntero = list(offsets[:-1])
+        camino = []  # arcos del camino actual
+        u = s
+        while True:
+            if u == t:
+                aumento = min(residual[i] for i in camino)
+                primero_saturado = -1
+                for k, i in enumerate(camino):
+                    residual[i] -= aumento
+                    residual[gemelo[i]] += aumento
+                    if primero_saturado < 0 and residual[i] <= TOLERANCIA_FLUJO:
+                        primero_saturado = k
+                total += aumento
+                # retroceder hasta la cola del primer arco saturado
+                del camino[primero_saturado:]
+                u = destinos[camino[-1]] if camino else s
+                continue
+
+            avanzo = False
+            fin = offsets[u + 1]
+            siguiente_nivel = nivel[u] + 1
+            while puntero[u] < fin:
+                i = puntero[u]
+                v = destinos[i]
+                if nivel[v] == siguiente_nivel and residual[i] > TOLERANCIA_FLUJO:
+                    camino.append(i)
+                    u = v
+                    avanzo = True
+                    break
+                puntero[u] += 1
+            if avanzo:
+                continue
+            if u == s:
+                break
+            # callejón sin salida: u ya no sirve en esta fase
+            nivel[u] = -1
+            i = camino.pop()
+            u = destinos[gemelo[i]]
+            puntero[u] += 1
+
+    return total, [x >= 0 for x in nivel]
+
+def arbol_gomory_hu(offsets, destinos, gemelo, capacidad):
+    """
+    Árbol de cortes mínimos de todos los pares (Gusfield)
+    Devuelve (padre, valor): la ciudad i > 0 cuelga de padre[i] con un tramo de valor[i];
+    el corte mínimo entre u y v es el menor valor en el camino del árbol entre ellas, y
+    quitar el tramo de i separa las ciudades de un corte mínimo entre i y padre[i]
+    """
+    n = len(offsets) - 1
+    padre = [0] * n
+    valor = [0.0] * n
+    for s in range(1, n):
+        t = padre[s]
+        valor[s], lado = flujo_maximo(offsets, destinos, gemelo, capacidad, s, t)
+        for v in range(n):
+            if v != s and lado[v] and padre[v] == t:
+                padre[v] = s
+        # si el padre de t quedó del lado de s, s toma el lugar de t en el árbol
+        if lado[padre[t]]:
+            padre[s], padre[t] = padre[t], s
+            valor[s], valor[t] = valor[t], valor[s]
+    return padre, valor
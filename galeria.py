@@ -1,14 +1,217 @@
-from flask import Flask, send_from_directory, render_template_string
+from flask import Flask, abort, make_response, redirect, request, send_from_directory, url_for
+from PIL import Image
+from werkzeug.security import safe_join
+from urllib.parse import urlencode
+import hashlib
+import itertools
 import os
+import queue
+import re
+import threading
+import time
 
 app = Flask(__name__)
 CARPETA_SALIDAS = "salidas"
 os.makedirs(CARPETA_SALIDAS, exist_ok=True)
 
-@app.route('/')
-def galeria():
-    imagenes = [f for f in os.listdir(CARPETA_SALIDAS) if f.endswith('.png')]
-    html = """
+# Miniaturas JPEG de la grilla (la imagen completa solo se carga en el modal)
+CARPETA_MINIATURAS = os.path.join(CARPETA_SALIDAS, ".miniaturas")
+TAMANO_MINIATURA = (480, 360)
+CALIDAD_MINIATURA = 85
+IMAGENES_POR_PAGINA = 48
+# Segundos que una petición espera su miniatura antes de recibir la imagen completa
+ESPERA_MINIATURA = 10
+
+# Prioridad en la cola del generador: primero lo que el navegador ya está pidiendo,
+# luego el resto de la página abierta y por último el recorrido inicial de salidas/
+PRIORIDAD_PEDIDA = 0
+PRIORIDAD_PAGINA = 1
+PRIORIDAD_FONDO = 2
+
+# Cada cuántos segundos, como mucho, se vuelve a revisar salidas/ al atender una petición
+INTERVALO_INDICE = 2.0
+# Las URL de imágenes llevan ?v=<etag>: con la versión vigente se guardan en el navegador un año
+MAX_EDAD_VERSIONADA = 365 * 24 * 3600
+# Páginas de la galería ya generadas que se guardan (por versión del índice y parámetros)
+MAX_PAGINAS_CACHE = 256
+
+# Nombres del menú y de --render: ruta_<origen>_<destino>_<criterio>_<visual>.png
+# (en las rutas guardadas desde "crear imagen de ruta" falta el criterio)
+PATRON_RUTA = re.compile(r'^ruta_(?P<ciudades>.+?)(?:_(?P<criterio>latencia|costo|ancho_banda|compuesto))?'
+                         r'_(?P<visual>latencia|costo|ancho_banda)\.png$')
+FILTROS = ('origen', 'destino', 'criterio', 'visual')
+ORDENES = {
+    'nombre': lambda imagen: imagen['nombre'],
+    'recientes': lambda imagen: (-imagen['fecha'], imagen['nombre']),
+    'origen': lambda imagen: (imagen['origen'] or '', imagen['destino'] or '', imagen['nombre']),
+    'destino': lambda imagen: (imagen['destino'] or '', imagen['origen'] or '', imagen['nombre']),
+    'criterio': lambda imagen: (imagen['criterio'] or '', imagen['visual'] or '', imagen['nombre']),
+}
+
+def etiqueta_archivo(estado):
+    """ETag de un archivo a partir de su os.stat (fecha de modificación en ns y tamaño)"""
+    return f"{estado.st_mtime_ns:x}-{estado.st_size:x}"
+
+def describir_imagen(nombre):
+    """
+    Origen, destino, criterio y criterio visual según el nombre (None si no sigue el esquema)
+    Las ciudades se separan en el primer '_' (los nombres de ciudad no deben llevar '_')
+    """
+    coincidencia = PATRON_RUTA.match(nombre)
+    if not coincidencia:
+        return dict.fromkeys(FILTROS)
+    origen, _, destino = coincidencia['ciudades'].partition('_')
+    return {'origen': origen, 'destino': destino or None,
+            'criterio': coincidencia['criterio'], 'visual': coincidencia['visual']}
+
+class IndiceSalidas:
+    """
+    Índice en memoria de las imágenes PNG de una carpeta, refrescado por sondeo: como mucho
+    una vez por intervalo se recorre la carpeta con os.scandir y se compara fecha y tamaño de
+    cada archivo (así también se notan las imágenes sobrescritas). Cada cambio sube la versión.
+    El diccionario de imágenes se reemplaza entero en cada cambio, nunca se modifica.
+    """
+
+    def __init__(self, carpeta, intervalo=INTERVALO_INDICE):
+        self.carpeta = carpeta
+        self.intervalo = intervalo
+        self.imagenes = {}  # nombre -> nombre, etag, fecha, origen, destino, criterio, visual
+        self.version = 0
+        self.revisado = None  # time.monotonic() del último sondeo
+        self.candado = threading.Lock()
+
+    def _sondear(self):
+        nuevas = {}
+        with os.scandir(self.carpeta) as entradas:
+            for entrada in entradas:
+                if not entrada.name.endswith('.png'):
+                    continue
+                try:
+                    if not entrada.is_file():
+                        continue
+                    estado = entrada.stat()
+                except OSError:
+                    continue  # borrada mientras se recorría
+                etiqueta = etiqueta_archivo(estado)
+                anterior = self.imagenes.get(entrada.name)
+                if anterior is not None and anterior['etag'] == etiqueta:
+                    nuevas[entrada.name] = anterior
+                else:
+                    nuevas[entrada.name] = {'nombre': entrada.name, 'etag': etiqueta, 'fecha': estado.st_mtime,
+                                            **describir_imagen(entrada.name)}
+        if nuevas.keys() != self.imagenes.keys() or any(nuevas[n] is not self.imagenes[n] for n in nuevas):
+            self.imagenes = nuevas
+            self.version += 1
+
+    def actualizar(self, forzar=False):
+        """Sondea la carpeta si pasó el intervalo (o si forzar) y devuelve (versión, imágenes)"""
+        with self.candado:
+            ahora = time.monotonic()
+            if forzar or self.revisado is None or ahora - self.revisado >= self.intervalo:
+                self._sondear()
+                self.revisado = ahora
+            return self.version, self.imagenes
+
+indice = IndiceSalidas(CARPETA_SALIDAS)
+
+def buscar_imagenes(imagenes, filtros, orden='nombre'):
+    """Imágenes del índice que cumplen los filtros (campo -> valor exacto), en el orden pedido"""
+    elegidas = [imagen for imagen in imagenes.values()
+                if all(imagen[campo] == valor for campo, valor in filtros.items())]
+    return sorted(elegidas, key=ORDENES.get(orden, ORDENES['nombre']))
+
+def ruta_miniatura(nombre):
+    return os.path.join(CARPETA_MINIATURAS, nombre + ".jpg")
+
+def miniatura_vigente(nombre):
+    """La miniatura existe y se hizo de la versión actual de la imagen (misma fecha de modificación)"""
+    try:
+        return os.stat(ruta_miniatura(nombre)).st_mtime_ns == os.stat(os.path.join(CARPETA_SALIDAS, nombre)).st_mtime_ns
+    except OSError:
+        return False
+
+def generar_miniatura(nombre):
+    """
+    Reduce la imagen a TAMANO_MINIATURA y la guarda como JPEG sobre fondo blanco
+    La miniatura queda con la fecha de modificación de la imagen: si esta cambia, deja de estar vigente
+    """
+    origen = os.path.join(CARPETA_SALIDAS, nombre)
+    fecha = os.stat(origen).st_mtime_ns
+    os.makedirs(CARPETA_MINIATURAS, exist_ok=True)
+    with Image.open(origen) as imagen:
+        imagen.thumbnail(TAMANO_MINIATURA, reducing_gap=2.0)
+        if imagen.mode in ('RGBA', 'LA', 'P'):
+            imagen = imagen.convert('RGBA')
+            fondo = Image.new('RGB', imagen.size, 'white')
+            fondo.paste(imagen, mask=imagen.getchannel('A'))
+            imagen = fondo
+        temporal = ruta_miniatura(nombre) + ".tmp"
+        imagen.convert('RGB').save(temporal, 'JPEG', quality=CALIDAD_MINIATURA, optimize=True)
+    os.utime(temporal, ns=(fecha, fecha))
+    os.replace(temporal, ruta_miniatura(nombre))
+
+class GeneradorMiniaturas:
+    """Hilo de fondo que genera miniaturas en orden de prioridad, sin repetir las ya encoladas"""
+
+    def __init__(self):
+        self.cola = queue.PriorityQueue()
+        self.orden = itertools.count()  # desempate FIFO dentro de una misma prioridad
+        self.pendientes = {}  # nombre -> Event que se activa cuando la miniatura está lista
+        self.candado = threading.Lock()
+        threading.Thread(target=self._trabajar, daemon=True).start()
+
+    def pedir(self, nombre, prioridad=PRIORIDAD_PEDIDA):
+        """Encola la miniatura (si no lo estaba ya) y devuelve un Event para esperarla"""
+        with self.candado:
+            listo = self.pendientes.get(nombre)
+            if listo is None:
+                listo = self.pendientes[nombre] = threading.Event()
+            self.cola.put((prioridad, next(self.orden), nombre))
+        return listo
+
+    def _trabajar(self):
+        while True:
+            _, _, nombre = self.cola.get()
+            with self.candado:
+                listo = self.pendientes.get(nombre)
+            if listo is None:
+                continue  # ya se generó por una entrada anterior de mayor prioridad
+            try:
+                if not miniatura_vigente(nombre):
+                    generar_miniatura(nombre)
+            except Exception as e:
+                print(f"⚠️  No se pudo generar la miniatura de {nombre}: {e}")
+            with self.candado:
+                self.pendientes.pop(nombre, None)
+            listo.set()
+
+    def recorrer(self):
+        """Encola en segundo plano las miniaturas que faltan y borra las de imágenes eliminadas"""
+        imagenes = indice.actualizar(forzar=True)[1]
+        if os.path.isdir(CARPETA_MINIATURAS):
+            vigentes = {nombre + ".jpg" for nombre in imagenes}
+            for archivo in os.listdir(CARPETA_MINIATURAS):
+                if archivo not in vigentes:
+                    try:
+                        os.remove(os.path.join(CARPETA_MINIATURAS, archivo))
+                    except OSError:
+                        pass
+        for nombre in imagenes:
+            if not miniatura_vigente(nombre):
+                self.pedir(nombre, PRIORIDAD_FONDO)
+
+_generador = []
+_candado_generador = threading.Lock()
+
+def generador():
+    """Generador de miniaturas del proceso (se crea al primer uso)"""
+    with _candado_generador:
+        if not _generador:
+            _generador.append(GeneradorMiniaturas())
+        return _generador[0]
+
+# La plantilla se compila una sola vez al importar el módulo
+PLANTILLA_GALERIA = app.jinja_env.from_string("""
     <html>
     <head>
         <title>Galería de Imágenes</title>
@@ -53,6 +256,23 @@ def galeria():
                 transform: scale(1.05);
             }
             h2 { font-size: 0.9rem; margin: 0.5em 0 0; color: #333; }
+            .paginas {
+                text-align: center;
+                padding: 0 30px 30px;
+                color: #333;
+            }
+            .paginas a {
+                color: #F26522;
+                font-weight: bold;
+                margin: 0 15px;
+                text-decoration: none;
+            }
+            .filtros {
+                padding: 20px 30px 0;
+                text-align: center;
+                color: #333;
+            }
+            .filtros select, .filtros button { margin: 0 8px 8px 4px; }
 
             /* Modal */
             .modal {
@@ -93,15 +313,42 @@ def galeria():
             </div>
         </div>
 
+        <form class="filtros" method="get" action="/">
+            {% for campo, etiqueta in [('origen', 'Origen'), ('destino', 'Destino'), ('criterio', 'Criterio'), ('visual', 'Visual')] %}
+            {{ etiqueta }}
+            <select name="{{ campo }}">
+                <option value="">(todos)</option>
+                {% for valor in opciones[campo] %}
+                <option value="{{ valor }}" {% if filtros.get(campo) == valor %}selected{% endif %}>{{ valor }}</option>
+                {% endfor %}
+            </select>
+            {% endfor %}
+            Orden
+            <select name="orden">
+                {% for valor in ordenes %}
+                <option value="{{ valor }}" {% if orden == valor %}selected{% endif %}>{{ valor }}</option>
+                {% endfor %}
+            </select>
+            <button type="submit">Filtrar</button>
+        </form>
+
         <div class="grid">
             {% for img in imagenes %}
-            <div class="item" onclick="mostrarModal('{{ img }}')">
-                <img class="grafico" src="/img/{{ img }}" alt="{{ img }}">
-                <h2>{{ img }}</h2>
+            <div class="item" onclick="mostrarModal('/img/{{ img.nombre|urlencode }}?v={{ img.etag }}')">
+                <img class="grafico" src="/miniatura/{{ img.nombre|urlencode }}?v={{ img.etag }}" alt="{{ img.nombre }}" loading="lazy">
+                <h2>{{ img.nombre }}</h2>
             </div>
             {% endfor %}
         </div>
 
+        {% if paginas > 1 %}
+        <div class="paginas">
+            {% if anterior %}<a href="{{ anterior }}">&larr; Anterior</a>{% endif %}
+            Página {{ pagina }} de {{ paginas }} · {{ total }} imágenes
+            {% if siguiente %}<a href="{{ siguiente }}">Siguiente &rarr;</a>{% endif %}
+        </div>
+        {% endif %}
+
         <div id="modal" class="modal" onclick="cerrarModal()">
             <span class="modal-close">&times;</span>
             <img id="modal-img" class="modal-content">
@@ -112,7 +359,7 @@ def galeria():
                 var modal = document.getElementById("modal");
                 var modalImg = document.getElementById("modal-img");
                 modal.style.display = "block";
-                modalImg.src = "/img/" + src;
+                modalImg.src = src;
             }
             function cerrarModal() {
                 document.getElementById("modal").style.display = "none";
@@ -120,16 +367,102 @@ def galeria():
         </script>
     </body>
     </html>
+""")
+
+_paginas = {}  # (versión del índice, parámetros) -> (html, etag)
+_candado_paginas = threading.Lock()
+
+def enlace_pagina(parametros, pagina):
+    """URL de otra página de la galería conservando filtros y orden"""
+    return "/?" + urlencode({**parametros, 'pagina': pagina})
+
+def generar_pagina(imagenes, filtros, orden, pagina):
+    """HTML de una página de la galería y su ETag (hash del contenido)"""
+    elegidas = buscar_imagenes(imagenes, filtros, orden)
+    paginas = max(1, -(-len(elegidas) // IMAGENES_POR_PAGINA))
+    pagina = min(pagina, paginas)
+    visibles = elegidas[(pagina - 1) * IMAGENES_POR_PAGINA:pagina * IMAGENES_POR_PAGINA]
+    # las miniaturas de esta página van primero en la cola; la página no las espera
+    for imagen in visibles:
+        if not miniatura_vigente(imagen['nombre']):
+            generador().pedir(imagen['nombre'], PRIORIDAD_PAGINA)
+    opciones = {campo: sorted({imagen[campo] for imagen in imagenes.values() if imagen[campo]})
+                for campo in FILTROS}
+    parametros = {**filtros, 'orden': orden} if orden != 'nombre' else dict(filtros)
+    html = PLANTILLA_GALERIA.render(
+        imagenes=visibles, pagina=pagina, paginas=paginas, total=len(elegidas),
+        filtros=filtros, orden=orden, ordenes=list(ORDENES), opciones=opciones,
+        anterior=enlace_pagina(parametros, pagina - 1) if pagina > 1 else None,
+        siguiente=enlace_pagina(parametros, pagina + 1) if pagina < paginas else None)
+    return html, hashlib.sha1(html.encode('utf-8')).hexdigest()
+
+@app.route('/')
+def galeria():
+    version, imagenes = indice.actualizar()
+    filtros = {campo: request.args[campo] for campo in FILTROS if request.args.get(campo)}
+    orden = request.args.get('orden', 'nombre')
+    orden = orden if orden in ORDENES else 'nombre'
+    pagina = max(request.args.get('pagina', 1, type=int), 1)
+    clave = (version, orden, pagina, tuple(sorted(filtros.items())))
+    with _candado_paginas:
+        guardada = _paginas.get(clave)
+    if guardada is None:
+        guardada = generar_pagina(imagenes, filtros, orden, pagina)
+        with _candado_paginas:
+            if len(_paginas) >= MAX_PAGINAS_CACHE:
+                _paginas.clear()
+            _paginas[clave] = guardada
+    html, etiqueta = guardada
+    respuesta = make_response(html)
+    respuesta.set_etag(etiqueta)
+    respuesta.cache_control.no_cache = True  # el índice puede cambiar: siempre se revalida (304 si no cambió)
+    return respuesta.make_conditional(request)
+
+def servir_archivo(carpeta, nombre, version=None):
+    """
+    Envía un archivo con ETag fuerte (fecha y tamaño actuales) y respuesta 304 si el navegador ya lo tiene
+    Si la URL trae ?v= con la versión vigente (version, o el ETag del archivo) se puede guardar
+    un año sin revalidar; si no, el navegador revalida cada vez
     """
-    return render_template_string(html, imagenes=imagenes)
+    ruta = safe_join(carpeta, nombre)
+    try:
+        etiqueta = etiqueta_archivo(os.stat(ruta)) if ruta else None
+    except OSError:
+        etiqueta = None
+    if etiqueta is None:
+        abort(404)
+    versionada = request.args.get('v') is not None and request.args.get('v') == (version or etiqueta)
+    respuesta = send_from_directory(carpeta, nombre, etag=etiqueta,
+                                    max_age=MAX_EDAD_VERSIONADA if versionada else None)
+    if versionada:
+        respuesta.cache_control.immutable = True
+    return respuesta
 
 @app.route('/img/<path:nombre>')
 def imagen(nombre):
-    return send_from_directory(CARPETA_SALIDAS, nombre)
+    return servir_archivo(CARPETA_SALIDAS, nombre)
+
+@app.route('/miniatura/<path:nombre>')
+def miniatura(nombre):
+    """Miniatura de una imagen; si no está lista a tiempo, se redirige a la imagen completa"""
+    if nombre not in indice.actualizar()[1]:
+        abort(404)
+    if not miniatura_vigente(nombre) and not generador().pedir(nombre).wait(ESPERA_MINIATURA):
+        return redirect(url_for('imagen', nombre=nombre, **request.args))
+    if not miniatura_vigente(nombre):
+        return redirect(url_for('imagen', nombre=nombre, **request.args))  # la generación falló
+    # ?v= es la versión de la imagen completa: la miniatura vigente corresponde a esa versión
+    try:
+        version = etiqueta_archivo(os.stat(os.path.join(CARPETA_SALIDAS, nombre)))
+    except OSError:
+        abort(404)
+    return servir_archivo(CARPETA_MINIATURAS, nombre + ".jpg", version=version)
 
 @app.route('/static/<path:filename>')
 def static_files(filename):
     return send_from_directory('static', filename)
 
 if __name__ == '__main__':
+    # las miniaturas que falten se generan en segundo plano mientras el servidor ya atiende
+    generador().recorrer()
     app.run(host='0.0.0.0', port=80)
@@ -0,0 +1,387 @@
+"""
+Generador de topologías ISP sintéticas para pruebas de escala
+Escribe el mismo CSV que lee el simulador (ciudad_origen, ciudad_destino, latencia_ms,
+costo_soles_mb, ancho_banda_mbps) y, si se pide, el CSV de coordenadas para A*.
+Modelos:
+- libre_escala: grados con ley de potencia (pocas ciudades concentran muchos enlaces),
+  con pesos de Chung–Lu sobre un árbol de enganche preferencial que deja la red conexa
+- geometrico: cada ciudad se conecta con ciudades cercanas (vecinas en dos curvas de Morton)
+- jerarquico: núcleo en malla, metros con doble enlace al núcleo y accesos colgando de los metros
+Las ciudades se ubican dentro del territorio peruano; la latencia sale de la distancia
+real (nunca menos de 0.005 ms/km, así la heurística de A* sigue siendo admisible), el ancho
+de banda de escalones comerciales según el nivel del enlace y el costo baja con el ancho de
+banda y sube con la distancia.
+Las conexiones se generan y escriben por bloques: la memoria depende del número de
+ciudades, no del de conexiones, así que el archivo puede ser más grande que la RAM.
+Con la misma semilla y los mismos parámetros el archivo sale idéntico.
+"""
+import gzip
+import io
+import os
+
+import numpy as np
+
+MODELOS = ('libre_escala', 'geometrico', 'jerarquico')
+
+# Conexiones por bloque escrito (fijo: cambiarlo cambia la secuencia aleatoria)
+TAMANO_BLOQUE = 100_000
+
+# Territorio donde se ubican las ciudades (grados)
+LATITUD_MIN, LATITUD_MAX = -18.3, -0.1
+LONGITUD_MIN, LONGITUD_MAX = -81.3, -68.7
+RADIO_TIERRA_KM = 6371.0
+
+# Latencia: retardo de equipos por nivel + propagación en fibra (0.005 ms/km) con un
+# trazado entre 1.2 y ~2.5 veces más largo que la línea recta
+LATENCIA_FIBRA_POR_KM = 0.005
+RETARDO_NIVEL_MS = (0.5, 1.0, 2.0)
+
+# Escalones de ancho de banda (Mbps) y su probabilidad por nivel: núcleo, metro, acceso
+ANCHOS_NIVEL = (
+    ((10_000, 40_000, 100_000), (0.5, 0.3, 0.2)),
+    ((1_000, 2_500, 10_000), (0.4, 0.35, 0.25)),
+    ((100, 200, 300, 500, 1_000), (0.2, 0.25, 0.25, 0.2, 0.1)),
+)
+
+# Costo (S/ por MB) de un enlace de 1000 Mbps y cero km; baja con el ancho de banda
+COSTO_BASE = 0.02
+COSTO_MINIMO = 0.0001
+
+# libre_escala: exponente de la ley de potencia de los grados
+EXPONENTE_GRADOS = 2.5
+
+ENCABEZADO_RED = "ciudad_origen, ciudad_destino, latencia_ms, costo_soles_mb, ancho_banda_mbps\n"
+ENCABEZADO_COORDENADAS = "ciudad, latitud, longitud\n"
+
+def _abrir_salida(archivo):
+    """Abre el archivo para escribir texto; .gz se comprime sin fecha para que salga reproducible"""
+    carpeta = os.path.dirname(archivo)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    if archivo.endswith('.gz'):
+        return io.TextIOWrapper(gzip.GzipFile(archivo, 'wb', compresslevel=6, mtime=0), encoding='utf-8', newline='')
+    return open(archivo, 'w', encoding='utf-8', newline='')
+
+def _distancia_km(lat_a, lon_a, lat_b, lon_b):
+    """Distancia del gran círculo (haversine) entre arreglos de puntos en grados"""
+    lat_a, lon_a, lat_b, lon_b = map(np.radians, (lat_a, lon_a, lat_b, lon_b))
+    h = (np.sin((lat_b - lat_a) / 2) ** 2 +
+         np.cos(lat_a) * np.cos(lat_b) * np.sin((lon_b - lon_a) / 2) ** 2)
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+def _en_territorio(latitud, longitud):
+    return (np.clip(latitud, LATITUD_MIN, LATITUD_MAX), np.clip(longitud, LONGITUD_MIN, LONGITUD_MAX))
+
+def _posiciones_uniformes(rng, n):
+    return (rng.uniform(LATITUD_MIN, LATITUD_MAX, n), rng.uniform(LONGITUD_MIN, LONGITUD_MAX, n))
+
+def _atributos(rng, km, nivel):
+    """Latencia, costo y ancho de banda de cada conexión según su distancia y nivel"""
+    latencia = (np.asarray(RETARDO_NIVEL_MS)[nivel] * rng.uniform(0.5, 1.5, len(km)) +
+                km * LATENCIA_FIBRA_POR_KM * (1.2 + rng.exponential(0.3, len(km))))
+    ancho_banda = np.empty(len(km))
+    for valor, (anchos, probabilidades) in enumerate(ANCHOS_NIVEL):
+        enlaces = nivel == valor
+        ancho_banda[enlaces] = rng.choice(anchos, size=int(enlaces.sum()), p=probabilidades)
+    costo = (COSTO_BASE * (1000 / ancho_banda) ** 0.3 * (1 + km / 1500) *
+             rng.lognormal(0.0, 0.15, len(km)))
+    return np.round(latencia, 2), np.maximum(np.round(costo, 4), COSTO_MINIMO), ancho_banda
+
+class _Escritor:
+    """Convierte bloques de conexiones (ids) en filas CSV y las escribe"""
+    def __init__(self, salida, nombre, latitud, longitud, rng):
+        self.salida = salida
+        self.nombre = nombre
+        self.latitud, self.longitud = latitud, longitud
+        self.rng = rng
+        self.conexiones = 0
+
+    def escribir(self, a, b, nivel):
+        a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+        distintas = a != b
+        a, b, nivel = a[distintas], b[distintas], np.broadcast_to(nivel, distintas.shape)[distintas]
+        km = _distancia_km(self.latitud[a], self.longitud[a], self.latitud[b], self.longitud[b])
+        latencia, costo, ancho_banda = _atributos(self.rng, km, nivel)
+        nombre = self.nombre
+        self.salida.write("".join(
+            f"{nombre(x)}, {nombre(y)}, {lat:g}, {c:g}, {bw:g}\n"
+            for x, y, lat, c, bw in zip(a.tolist(), b.tolist(), latencia.tolist(),
+                                        costo.tolist(), ancho_banda.tolist())))
+        self.conexiones += len(a)
+
+def _nombres_numerados(prefijo, n):
+    ancho = len(str(max(n - 1, 0)))
+    return lambda i: f"{prefijo}{i:0{ancho}d}"
+
+def _libre_escala(rng, n, conexiones):
+    """Árbol de enganche preferencial + conexiones Chung–Lu con pesos (i + 1)^(-1 / (γ - 1))"""
+    peso = np.arange(1, n + 1, dtype=np.float64) ** (-1 / (EXPONENTE_GRADOS - 1))
+    acumulado = np.cumsum(peso)
+    latitud, longitud = _posiciones_uniformes(rng, n)
+    # niveles por importancia: el 1 % más pesado es núcleo y el 10 % metro
+    nucleo, metro = max(1, n // 100), max(1, n // 10)
+
+    def nivel(a, b):
+        return np.where(np.maximum(a, b) < nucleo, 0, np.where(np.minimum(a, b) < metro, 1, 2))
+
+    padre = np.full(n, -1, dtype=np.int64)
+
+    def bloques():
+        # cada ciudad i > 0 se engancha a una anterior elegida según su peso: red conexa
+        for inicio in range(1, n, TAMANO_BLOQUE):
+            hijos = np.arange(inicio, min(n, inicio + TAMANO_BLOQUE))
+            padres = np.searchsorted(acumulado, rng.random(len(hijos)) * acumulado[hijos - 1], side='right')
+            padre[hijos] = padres = np.minimum(padres, hijos - 1)
+            yield hijos, padres, nivel(hijos, padres)
+        # extra: se descartan los pares del árbol y los ya usados (en este bloque o en uno anterior)
+        faltan = conexiones - (n - 1)
+        usados = np.empty(0, dtype=np.int64)  # claves a * n + b de las conexiones extra, ordenadas
+        while faltan > 0:
+            cantidad = min(faltan, TAMANO_BLOQUE)
+            a = np.searchsorted(acumulado, rng.random(cantidad) * acumulado[-1], side='right')
+            b = np.searchsorted(acumulado, rng.random(cantidad) * acumulado[-1], side='right')
+            a, b = np.minimum(a, b), np.minimum(np.maximum(a, b), n - 1)
+            validas = (a != b) & (padre[b] != a)
+            a, b = a[validas], b[validas]
+            claves, primeras = np.unique(a * n + b, return_index=True)
+            nuevas = ~np.isin(claves, usados, assume_unique=True)
+            primeras = np.sort(primeras[nuevas])
+            a, b = a[primeras], b[primeras]
+            if not len(a):
+                break  # red casi completa: no quedan pares nuevos fáciles de sortear
+            usados = np.union1d(usados, claves[nuevas])
+            faltan -= len(a)
+            yield a, b, nivel(a, b)
+
+    return latitud, longitud, _nombres_numerados("C", n), bloques()
+
+def _separar_bits(x):
+    """Intercala ceros entre los 16 bits bajos (para el código de Morton)"""
+    x = x.astype(np.uint32)
+    x = (x | (x << 8)) & 0x00FF00FF
+    x = (x | (x << 4)) & 0x0F0F0F0F
+    x = (x | (x << 2)) & 0x33333333
+    return (x | (x << 1)) & 0x55555555
+
+def _orden_morton(x, y):
+    """Orden de los puntos (x, y en [0, 1)) a lo largo de la curva de Morton"""
+    escala = (1 << 16) - 1
+    codigo = _separar_bits(x * escala) | (_separar_bits(y * escala) << 1)
+    return np.argsort(codigo, kind='stable')
+
+def _ronda(rng, total, faltan, validas=None):
+    """
+    Posiciones [0, total) de una ronda de enlaces (i, i + salto), por bloques; validas filtra
+    las posiciones permitidas y si la ronda tiene más candidatas que las que faltan se toma
+    una fracción al azar
+    """
+    candidatas = total if validas is None else int(np.count_nonzero(validas))
+    fraccion = faltan / candidatas if candidatas > faltan else 1.0
+    for inicio in range(0, total, TAMANO_BLOQUE):
+        posiciones = np.arange(inicio, min(total, inicio + TAMANO_BLOQUE))
+        if validas is not None:
+            posiciones = posiciones[validas[posiciones]]
+        if fraccion < 1.0:
+            posiciones = posiciones[rng.random(len(posiciones)) < fraccion]
+        yield posiciones
+
+def _geometrico(rng, n, conexiones):
+    """
+    Vecinos cercanos aproximados: ciudades consecutivas en una curva de Morton (red conexa)
+    y enlaces extra entre ciudades a 1, 2, 3... posiciones en esa curva o en otra desplazada
+    medio territorio (la segunda tapa los saltos entre cuadrantes de la primera). Un par ya
+    unido en una curva no se repite en la otra
+    """
+    latitud, longitud = _posiciones_uniformes(rng, n)
+    x = (longitud - LONGITUD_MIN) / (LONGITUD_MAX - LONGITUD_MIN)
+    y = (latitud - LATITUD_MIN) / (LATITUD_MAX - LATITUD_MIN)
+    ordenes = (_orden_morton(x, y), _orden_morton((x + 0.5) % 1.0, (y + 0.5) % 1.0))
+    posicion = [np.empty(n, dtype=np.int64) for _ in ordenes]
+    for orden, inversa in zip(ordenes, posicion):
+        inversa[orden] = np.arange(n)
+
+    def nivel(a, b):
+        km = _distancia_km(latitud[a], longitud[a], latitud[b], longitud[b])
+        return np.where(km > 200, 0, np.where(km > 50, 1, 2))
+
+    def bloques():
+        orden = ordenes[0]
+        for inicio in range(0, n - 1, TAMANO_BLOQUE):
+            posiciones = np.arange(inicio, min(n - 1, inicio + TAMANO_BLOQUE))
+            a, b = orden[posiciones], orden[posiciones + 1]
+            yield a, b, nivel(a, b)
+        # rondas alternadas: curva 0 con saltos 2, 3, ... y curva 1 con saltos 1, 2, ...
+        usados = [1, 0]  # mayor salto ya unido en cada curva
+        faltan = conexiones - (n - 1)
+        ronda = 0
+        while faltan > 0:
+            curva, salto = ronda % 2, ronda // 2 + 2 - ronda % 2
+            if salto >= n:
+                break
+            orden, otra = ordenes[curva], posicion[1 - curva]
+            for posiciones in _ronda(rng, n - salto, faltan):
+                a, b = orden[posiciones], orden[posiciones + salto]
+                nuevos = np.abs(otra[a] - otra[b]) > usados[1 - curva]
+                a, b = a[nuevos][:faltan], b[nuevos][:faltan]
+                faltan -= len(a)
+                yield a, b, nivel(a, b)
+            usados[curva] = salto
+            ronda += 1
+
+    return latitud, longitud, _nombres_numerados("G", n), bloques()
+
+def _jerarquico(rng, n, conexiones):
+    """
+    Núcleo (0.2 %) en anillo con cuerdas, metros (5 %) con doble enlace al núcleo y en cadena
+    dentro de su grupo, y accesos colgando de un metro (30 % con un segundo enlace). Los
+    enlaces que faltan para el grado medio son laterales entre accesos del mismo metro
+    Ids: primero el núcleo, luego los metros y al final los accesos (grupos contiguos)
+    """
+    num_nucleo = min(n, max(2, n // 500))
+    num_metro = min(n - num_nucleo, max(1, n // 20))
+    num_acceso = n - num_nucleo - num_metro
+    primer_metro, primer_acceso = num_nucleo, num_nucleo + num_metro
+
+    # grupos contiguos: metro i cuelga del núcleo i * num_nucleo // num_metro, igual con los accesos
+    latitud = np.empty(n)
+    longitud = np.empty(n)
+    latitud[:num_nucleo], longitud[:num_nucleo] = _posiciones_uniformes(rng, num_nucleo)
+    padre_metro = np.arange(num_metro) * num_nucleo // max(num_metro, 1)
+    metros = slice(primer_metro, primer_acceso)
+    latitud[metros], longitud[metros] = _en_territorio(
+        latitud[padre_metro] + rng.normal(0, 1.0, num_metro),
+        longitud[padre_metro] + rng.normal(0, 1.0, num_metro))
+    padre_acceso = primer_metro + np.arange(num_acceso) * num_metro // max(num_acceso, 1)
+    accesos = slice(primer_acceso, n)
+    latitud[accesos], longitud[accesos] = _en_territorio(
+        latitud[padre_acceso] + rng.normal(0, 0.2, num_acceso),
+        longitud[padre_acceso] + rng.normal(0, 0.2, num_acceso))
+
+    ancho = len(str(max(n - 1, 0)))
+    def nombre(i):
+        if i < primer_metro:
+            return f"Nucleo{i:0{ancho}d}"
+        if i < primer_acceso:
+            return f"Metro{i:0{ancho}d}"
+        return f"Acceso{i:0{ancho}d}"
+
+    def estructura():
+        # núcleo: anillo + hasta dos cuerdas al azar por nodo (el núcleo es chico: sin pares repetidos)
+        pares = {(i, i + 1) for i in range(num_nucleo - 1)}
+        if num_nucleo > 2:
+            pares.add((0, num_nucleo - 1))
+        if num_nucleo > 3:
+            origenes = np.repeat(np.arange(num_nucleo), 2)
+            destinos = (origenes + rng.integers(2, num_nucleo - 1, len(origenes))) % num_nucleo
+            pares.update((min(x, y), max(x, y)) for x, y in zip(origenes.tolist(), destinos.tolist()))
+        pares = np.array(sorted(pares), dtype=np.int64).reshape(-1, 2)
+        yield pares[:, 0], pares[:, 1], 0
+        # metros: enlace a su núcleo, segundo enlace a otro núcleo y cadena dentro del grupo
+        metro = np.arange(num_metro)
+        enganche = primer_metro + metro
+        yield enganche, padre_metro, 1
+        if num_nucleo > 1:
+            yield enganche, (padre_metro + rng.integers(1, num_nucleo, num_metro)) % num_nucleo, 1
+        mismo_grupo = np.flatnonzero(padre_metro[1:] == padre_metro[:-1])
+        yield primer_metro + mismo_grupo, primer_metro + mismo_grupo + 1, 1
+        # accesos: por bloques para no materializar todos los enlaces
+        for inicio in range(0, num_acceso, TAMANO_BLOQUE):
+            acceso = np.arange(inicio, min(num_acceso, inicio + TAMANO_BLOQUE))
+            yield primer_acceso + acceso, padre_acceso[acceso], 2
+            doble = acceso[rng.random(len(acceso)) < 0.3]
+            if num_metro > 1:
+                otro = primer_metro + (padre_acceso[doble] - primer_metro + 1) % num_metro
+                yield primer_acceso + doble, otro, 2
+
+    def bloques():
+        generadas = 0
+        for a, b, nivel in estructura():
+            generadas += len(a)
+            yield a, b, nivel
+        # enlaces laterales entre accesos del mismo metro (ids contiguos) a 1, 2, 3... posiciones
+        faltan = conexiones - generadas
+        salto = 1
+        while faltan > 0 and salto < num_acceso:
+            validas = padre_acceso[:-salto] == padre_acceso[salto:]
+            if not validas.any():
+                break
+            for acceso in _ronda(rng, num_acceso - salto, faltan, validas):
+                acceso = acceso[:faltan]
+                faltan -= len(acceso)
+                yield primer_acceso + acceso, primer_acceso + acceso + salto, 2
+            salto += 1
+
+    return latitud, longitud, nombre, bloques()
+
+def generar_red(archivo, ciudades, modelo='libre_escala', grado_medio=4.0, conexiones=None,
+                semilla=0, archivo_coordenadas=None):
+    """
+    Genera una red sintética y la escribe en archivo (.gz para comprimirla)
+    conexiones: total de conexiones a generar (por defecto ciudades * grado_medio / 2);
+    nunca menos de las necesarias para que la red quede conexa (en el modelo jerárquico,
+    las de su estructura núcleo / metro / acceso)
+    archivo_coordenadas: si se indica, escribe también ciudad, latitud, longitud
+    Devuelve un resumen con el número de ciudades y conexiones escritas
+    """
+    if modelo not in MODELOS:
+        raise ValueError(f"Modelo no válido: {modelo} (opciones: {', '.join(MODELOS)})")
+    if ciudades < 2:
+        raise ValueError("Se necesitan al menos 2 ciudades")
+    if conexiones is None:
+        conexiones = int(round(ciudades * grado_medio / 2))
+    conexiones = min(conexiones, ciudades * (ciudades - 1) // 2)
+    rng = np.random.default_rng(semilla)
+
+    generador = {'libre_escala': _libre_escala, 'geometrico': _geometrico, 'jerarquico': _jerarquico}[modelo]
+    latitud, longitud, nombre, bloques = generador(rng, ciudades, conexiones)
+
+    with _abrir_salida(archivo) as salida:
+        salida.write(ENCABEZADO_RED)
+        escritor = _Escritor(salida, nombre, latitud, longitud, rng)
+        for a, b, nivel in bloques:
+            escritor.escribir(a, b, nivel)
+
+    if archivo_coordenadas:
+        with _abrir_salida(archivo_coordenadas) as salida:
+            salida.write(ENCABEZADO_COORDENADAS)
+            for inicio in range(0, ciudades, TAMANO_BLOQUE):
+                fin = min(ciudades, inicio + TAMANO_BLOQUE)
+                salida.write("".join(
+                    f"{nombre(i)}, {lat:.5f}, {lon:.5f}\n"
+                    for i, lat, lon in zip(range(inicio, fin), latitud[inicio:fin].tolist(),
+                                           longitud[inicio:fin].tolist())))
+
+    return {'modelo': modelo, 'semilla': semilla, 'ciudades': ciudades, 'conexiones': escritor.conexiones}
+
+def parsear_argumentos(argv=None):
+    """Lee los argumentos de la línea de comandos"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generador de redes ISP sintéticas")
+    parser.add_argument('archivo', help="CSV de conexiones a generar (.gz para comprimirlo)")
+    parser.add_argument('--ciudades', type=int, default=10_000, help="número de ciudades")
+    parser.add_argument('--modelo', default='libre_escala', choices=MODELOS,
+                        help="distribución de grados de la topología")
+    parser.add_argument('--grado-medio', type=float, default=4.0,
+                        help="conexiones promedio por ciudad (por defecto 4)")
+    parser.add_argument('--conexiones', type=int, default=None,
+                        help="total de conexiones (reemplaza a --grado-medio)")
+    parser.add_argument('--semilla', type=int, default=0, help="semilla del generador aleatorio")
+    parser.add_argument('--coordenadas', default=None, metavar='ARCHIVO',
+                        help="escribir también el CSV ciudad,latitud,longitud para A*")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    import time
+
+    argumentos = parsear_argumentos()
+    print(f"🏭 Generando red {argumentos.modelo} con {argumentos.ciudades} ciudades "
+          f"(semilla {argumentos.semilla})...")
+    inicio = time.perf_counter()
+    resumen = generar_red(argumentos.archivo, argumentos.ciudades, argumentos.modelo,
+                          argumentos.grado_medio, argumentos.conexiones, argumentos.semilla,
+                          argumentos.coordenadas)
+    duracion = time.perf_counter() - inicio
+    print(f"✅ {resumen['conexiones']} conexiones escritas en {duracion:.2f} s → {argumentos.archivo}")
+    if argumentos.coordenadas:
+        print(f"🧭 Coordenadas → {argumentos.coordenadas}")
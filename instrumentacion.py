@@ -0,0 +1,254 @@
+"""
+Instrumentación opcional de las operaciones del simulador
+Se activa con la variable de entorno RED_ISP_INSTRUMENTACION=1 o con --instrumentar.
+Por cada operación registra llamadas, tiempo (total, máximo e histograma) y contadores
+propios: nodos asentados, arcos revisados, entradas y salidas de la cola de prioridad,
+aciertos de caché... Las fases del dibujo (layout, dibujo, guardado) se registran aparte.
+Desactivada, cada operación instrumentada solo paga la consulta de un indicador.
+Las métricas se exportan como JSON o como texto de Prometheus, y la sesión puede
+envolverse en cProfile y/o tracemalloc.
+"""
+import atexit
+import bisect
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+VARIABLE_ACTIVAR = 'RED_ISP_INSTRUMENTACION'
+VARIABLE_METRICAS = 'RED_ISP_METRICAS'
+
+# Límites (s) de los tramos del histograma de duración
+LIMITES_HISTOGRAMA = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+# Lugares con más memoria reservada que se guardan de la sesión de tracemalloc
+MAX_LUGARES_MEMORIA = 20
+
+_estado = {'activa': os.environ.get(VARIABLE_ACTIVAR, '').strip().lower() in ('1', 'si', 'sí', 'true', 'yes')}
+_operaciones = {}  # nombre -> llamadas, tiempos, histograma y contadores acumulados
+_candado = threading.Lock()
+_local = threading.local()  # pila de operaciones en curso de cada hilo
+_sesion = {}  # perfilado y destino de las métricas de la sesión (configurar / finalizar)
+_NULO = contextlib.nullcontext()
+
+def activar(activa=True):
+    _estado['activa'] = activa
+
+def activa():
+    return _estado['activa']
+
+def reiniciar():
+    """Descarta las métricas acumuladas"""
+    with _candado:
+        _operaciones.clear()
+
+def _registrar(nombre, duracion, contadores):
+    with _candado:
+        registro = _operaciones.get(nombre)
+        if registro is None:
+            registro = _operaciones[nombre] = {
+                'llamadas': 0, 'tiempo_total_s': 0.0, 'tiempo_max_s': 0.0,
+                'histograma': [0] * (len(LIMITES_HISTOGRAMA) + 1), 'contadores': {}}
+        registro['llamadas'] += 1
+        registro['tiempo_total_s'] += duracion
+        registro['tiempo_max_s'] = max(registro['tiempo_max_s'], duracion)
+        registro['histograma'][bisect.bisect_left(LIMITES_HISTOGRAMA, duracion)] += 1
+        acumulados = registro['contadores']
+        for clave, valor in contadores.items():
+            acumulados[clave] = acumulados.get(clave, 0) + valor
+
+@contextlib.contextmanager
+def _medicion(nombre):
+    pila = getattr(_local, 'pila', None)
+    if pila is None:
+        pila = _local.pila = []
+    contadores = {}
+    pila.append(contadores)
+    inicio = time.perf_counter()
+    try:
+        yield contadores
+    finally:
+        duracion = time.perf_counter() - inicio
+        pila.pop()
+        _registrar(nombre, duracion, contadores)
+
+def operacion(nombre):
+    """Contexto que mide un bloque como la operación nombre (no hace nada si está desactivada)"""
+    return _medicion(nombre) if _estado['activa'] else _NULO
+
+def instrumentado(nombre=None):
+    """Decorador: mide cada llamada a la función como una operación"""
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__name__
+        
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _estado['activa']:
+                return funcion(*args, **kwargs)
+            with _medicion(etiqueta):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+class _Fases:
+    """Mide tramos consecutivos de una operación larga: cada marca cierra el tramo anterior"""
+    
+    def __init__(self, prefijo):
+        self.prefijo = prefijo
+        self.inicio = time.perf_counter()
+    
+    def marcar(self, fase):
+        ahora = time.perf_counter()
+        _registrar(f"{self.prefijo}.{fase}", ahora - self.inicio, {})
+        self.inicio = ahora
+
+class _SinFases:
+    def marcar(self, fase):
+        pass
+
+_SIN_FASES = _SinFases()
+
+def fases(prefijo):
+    """Marcador de fases (ej.: layout, dibujo, guardado) registradas como prefijo.fase"""
+    return _Fases(prefijo) if _estado['activa'] else _SIN_FASES
+
+def contar(contadores=None, **valores):
+    """
+    Suma contadores numéricos a la operación en curso más interna del hilo
+    (los valores que no son números, como el nombre del algoritmo, se ignoran)
+    """
+    pila = getattr(_local, 'pila', None)
+    if not pila:
+        return
+    actual = pila[-1]
+    for fuente in (contadores or {}, valores):
+        for clave, valor in fuente.items():
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                actual[clave] = actual.get(clave, 0) + valor
+
+def resumen():
+    """Métricas acumuladas como diccionario serializable (histograma acumulado por límite)"""
+    with _candado:
+        operaciones = {}
+        for nombre, registro in sorted(_operaciones.items()):
+            acumulado, histograma = 0, {}
+            for limite, cantidad in zip(LIMITES_HISTOGRAMA + ('+Inf',), registro['histograma']):
+                acumulado += cantidad
+                histograma[str(limite)] = acumulado
+            operaciones[nombre] = {
+                'llamadas': registro['llamadas'],
+                'tiempo_total_s': registro['tiempo_total_s'],
+                'tiempo_medio_s': registro['tiempo_total_s'] / registro['llamadas'],
+                'tiempo_max_s': registro['tiempo_max_s'],
+                'histograma': histograma,
+                'contadores': dict(sorted(registro['contadores'].items())),
+            }
+    documento = {'operaciones': operaciones}
+    if 'memoria' in _sesion:
+        documento['memoria'] = _sesion['memoria']
+    return documento
+
+def _etiqueta(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def a_prometheus():
+    """Métricas acumuladas en el formato de texto de Prometheus"""
+    datos = resumen()
+    lineas = ["# HELP red_isp_operacion_segundos Duración de las operaciones del simulador",
+              "# TYPE red_isp_operacion_segundos histogram"]
+    for nombre, registro in datos['operaciones'].items():
+        operacion_ = _etiqueta(nombre)
+        for limite, cantidad in registro['histograma'].items():
+            lineas.append(f'red_isp_operacion_segundos_bucket{{operacion="{operacion_}",le="{limite}"}} {cantidad}')
+        lineas.append(f'red_isp_operacion_segundos_sum{{operacion="{operacion_}"}} {registro["tiempo_total_s"]!r}')
+        lineas.append(f'red_isp_operacion_segundos_count{{operacion="{operacion_}"}} {registro["llamadas"]}')
+    lineas += ["# HELP red_isp_operacion_eventos_total Contadores internos de cada operación",
+               "# TYPE red_isp_operacion_eventos_total counter"]
+    for nombre, registro in datos['operaciones'].items():
+        for evento, valor in registro['contadores'].items():
+            lineas.append(f'red_isp_operacion_eventos_total{{operacion="{_etiqueta(nombre)}",'
+                          f'evento="{_etiqueta(evento)}"}} {valor!r}')
+    if 'memoria' in datos:
+        lineas += ["# HELP red_isp_memoria_pico_bytes Pico de memoria reservada durante la sesión (tracemalloc)",
+                   "# TYPE red_isp_memoria_pico_bytes gauge",
+                   f"red_isp_memoria_pico_bytes {datos['memoria']['pico_bytes']}"]
+    return "\n".join(lineas) + "\n"
+
+def exportar(archivo):
+    """Escribe las métricas: .prom o .txt en formato Prometheus, cualquier otro en JSON"""
+    carpeta = os.path.dirname(archivo)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    with open(archivo, 'w', encoding='utf-8') as salida:
+        if archivo.endswith(('.prom', '.txt')):
+            salida.write(a_prometheus())
+        else:
+            json.dump(resumen(), salida, ensure_ascii=False, indent=2)
+
+def mostrar_resumen():
+    """Tabla de las operaciones medidas con sus contadores"""
+    operaciones = resumen()['operaciones']
+    print("\n📈 INSTRUMENTACIÓN")
+    print("=" * 70)
+    if not operaciones:
+        print("   (ninguna operación medida)")
+    for nombre, registro in operaciones.items():
+        print(f"   {nombre}: {registro['llamadas']} llamadas | total {registro['tiempo_total_s']:.3f} s | "
+              f"media {registro['tiempo_medio_s'] * 1000:.3f} ms | máx {registro['tiempo_max_s'] * 1000:.3f} ms")
+        if registro['contadores']:
+            print("      " + ", ".join(f"{clave}={valor:g}" for clave, valor in registro['contadores'].items()))
+    if 'memoria' in _sesion:
+        print(f"   💾 Pico de memoria: {_sesion['memoria']['pico_bytes'] / 2**20:.1f} MB")
+
+def configurar(instrumentar=False, metricas=None, perfil=None, memoria=False):
+    """
+    Activa la instrumentación (por argumento o por entorno) y abre la sesión de perfilado
+    metricas: archivo donde exportar al terminar (también RED_ISP_METRICAS); sin él se muestra un resumen
+    perfil: archivo .prof de cProfile; memoria: seguir las reservas con tracemalloc
+    Devuelve True si la instrumentación quedó activa
+    """
+    metricas = metricas or os.environ.get(VARIABLE_METRICAS) or None
+    if instrumentar or metricas or perfil or memoria:
+        activar()
+    if not activa():
+        return False
+    _sesion.update({'metricas': metricas, 'perfil': perfil, 'finalizada': False})
+    if memoria:
+        tracemalloc.start()
+        _sesion['tracemalloc'] = True
+    if perfil:
+        _sesion['perfilador'] = cProfile.Profile()
+        _sesion['perfilador'].enable()
+    atexit.register(finalizar)
+    return True
+
+def finalizar():
+    """Cierra la sesión de perfilado y exporta (o muestra) las métricas; las llamadas repetidas no hacen nada"""
+    if _sesion.get('finalizada', True):
+        return
+    _sesion['finalizada'] = True
+    perfilador = _sesion.pop('perfilador', None)
+    if perfilador is not None:
+        perfilador.disable()
+        perfilador.dump_stats(_sesion['perfil'])
+    if _sesion.pop('tracemalloc', False):
+        captura = tracemalloc.take_snapshot()
+        _sesion['memoria'] = {
+            'pico_bytes': tracemalloc.get_traced_memory()[1],
+            'lugares': [{'lugar': str(estadistica.traceback), 'bytes': estadistica.size,
+                         'bloques': estadistica.count}
+                        for estadistica in captura.statistics('lineno')[:MAX_LUGARES_MEMORIA]],
+        }
+        tracemalloc.stop()
+    
+    if _sesion['metricas']:
+        exportar(_sesion['metricas'])
+        print(f"📈 Métricas de instrumentación → {_sesion['metricas']}")
+    else:
+        mostrar_resumen()
+    if _sesion['perfil']:
+        print(f"🧪 Perfil de cProfile → {_sesion['perfil']} (ver con: python -m pstats {_sesion['perfil']})")
@@ -0,0 +1,224 @@
+"""
+Jerarquías de contracción (contraction hierarchies) para consultas punto a punto rápidas
+Preproceso: las ciudades se contraen una a una en orden de importancia; al quitar una
+ciudad se agregan atajos entre sus vecinos cuando el camino por ella es el único más
+corto (lo comprueba una búsqueda de testigo acotada). Cada ciudad guarda solo los arcos
+hacia ciudades más importantes (grafo "hacia arriba"), con la ciudad intermedia de cada
+atajo para poder desplegar la ruta real.
+Consulta: Dijkstra bidireccional que solo sube por la jerarquía desde origen y destino;
+como la red es no dirigida, ambos lados usan el mismo grafo hacia arriba.
+"""
+import heapq
+
+import numpy as np
+
+# Ciudades asentadas como máximo por búsqueda de testigo; si se agota se agrega el atajo
+# (siempre correcto: a lo sumo sobra un atajo)
+MAX_ASENTADOS_TESTIGO = 200
+
+# Arreglos que describen una jerarquía (para guardarla y volver a cargarla)
+ARREGLOS_JERARQUIA = ('rango', 'offsets', 'destinos', 'pesos', 'medio')
+
+def _busqueda_testigo(adyacencia, origen, excluido, objetivos, limite, max_asentados):
+    """Distancias desde origen sin pasar por excluido, hasta limite o max_asentados"""
+    dist = {origen: 0}
+    cola = [(0, origen)]
+    pendientes = len(objetivos)
+    asentados = 0
+    while cola and pendientes and asentados < max_asentados:
+        d, u = heapq.heappop(cola)
+        if d > dist[u]:
+            continue
+        if d > limite:
+            break
+        asentados += 1
+        if u in objetivos:
+            pendientes -= 1
+        for v, w in adyacencia[u].items():
+            if v == excluido:
+                continue
+            nueva = d + w
+            if nueva < dist.get(v, float('inf')):
+                dist[v] = nueva
+                heapq.heappush(cola, (nueva, v))
+    return dist
+
+def _atajos(adyacencia, v, max_asentados):
+    """Atajos (u, w, peso) necesarios para contraer v"""
+    vecinos = list(adyacencia[v].items())
+    atajos = []
+    for i, (u, peso_u) in enumerate(vecinos[:-1]):
+        objetivos = {w: peso_u + peso_w for w, peso_w in vecinos[i + 1:]}
+        dist = _busqueda_testigo(adyacencia, u, v, objetivos, max(objetivos.values()), max_asentados)
+        for w, peso in objetivos.items():
+            if dist.get(w, float('inf')) > peso:
+                atajos.append((u, w, peso))
+    return atajos
+
+def construir_jerarquia(offsets, destinos, pesos, max_asentados=MAX_ASENTADOS_TESTIGO):
+    """
+    Construye la jerarquía de contracción sobre listas CSR con pesos por arco
+    Devuelve un dict con los arreglos de ARREGLOS_JERARQUIA: rango de cada ciudad y
+    el grafo hacia arriba en CSR (destino, peso y ciudad intermedia, -1 si es una conexión)
+    """
+    n = len(offsets) - 1
+    infinito = float('inf')
+
+    # grafo de ciudades aún no contraídas (conexiones paralelas: la de menor peso)
+    adyacencia = [dict() for _ in range(n)]
+    for u in range(n):
+        vecinos = adyacencia[u]
+        for i in range(offsets[u], offsets[u + 1]):
+            v = destinos[i]
+            if v != u and pesos[i] < vecinos.get(v, infinito):
+                vecinos[v] = pesos[i]
+    medio = {}  # (u, w) -> ciudad contraída que reemplaza el atajo u - w
+
+    vecinos_contraidos = [0] * n
+    def prioridad(v, atajos):
+        # diferencia de aristas más vecinos ya contraídos (reparte la contracción por la red)
+        return len(atajos) - len(adyacencia[v]) + vecinos_contraidos[v]
+
+    cola = [(prioridad(v, _atajos(adyacencia, v, max_asentados)), v) for v in range(n)]
+    heapq.heapify(cola)
+    rango = [0] * n
+    arriba = [None] * n
+    siguiente_rango = 0
+    while cola:
+        _, v = heapq.heappop(cola)
+        # actualización perezosa: si ahora es menos prioritaria, volver a la cola
+        atajos = _atajos(adyacencia, v, max_asentados)
+        actual = prioridad(v, atajos)
+        if cola and actual > cola[0][0]:
+            heapq.heappush(cola, (actual, v))
+            continue
+
+        rango[v] = siguiente_rango
+        siguiente_rango += 1
+        arriba[v] = [(u, w, medio.get((v, u), -1)) for u, w in adyacencia[v].items()]
+        for u in adyacencia[v]:
+            del adyacencia[u][v]
+            vecinos_contraidos[u] += 1
+        adyacencia[v] = {}
+        for u, w, peso in atajos:
+            if peso < adyacencia[u].get(w, infinito):
+                adyacencia[u][w] = peso
+                adyacencia[w][u] = peso
+                medio[(u, w)] = v
+                medio[(w, u)] = v
+
+    cantidad = np.array([len(arcos) for arcos in arriba], dtype=np.int64)
+    offsets_arriba = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(cantidad, out=offsets_arriba[1:])
+    arcos = [arco for lista in arriba for arco in lista]
+    return {
+        'rango': np.array(rango, dtype=np.int32),
+        'offsets': offsets_arriba,
+        'destinos': np.array([arco[0] for arco in arcos], dtype=np.int32),
+        'pesos': np.array([arco[1] for arco in arcos], dtype=np.float64),
+        'medio': np.array([arco[2] for arco in arcos], dtype=np.int32),
+    }
+
+class JerarquiaContraccion:
+    """Jerarquía de contracción de un criterio, lista para consultas"""
+    def __init__(self, arreglos):
+        for nombre in ARREGLOS_JERARQUIA:
+            setattr(self, nombre, arreglos[nombre])
+        self._listas = None
+
+    def arreglos(self):
+        """Arreglos NumPy de la jerarquía (para guardarla)"""
+        return {nombre: getattr(self, nombre) for nombre in ARREGLOS_JERARQUIA}
+
+    def num_atajos(self):
+        """Cantidad de arcos hacia arriba que son atajos"""
+        return int((self.medio >= 0).sum())
+
+    def listas(self):
+        """Copia en listas de Python para el bucle de consulta"""
+        if self._listas is None:
+            self._listas = (self.offsets.tolist(), self.destinos.tolist(), self.pesos.tolist(),
+                            self.medio.tolist(), self.rango.tolist())
+        return self._listas
+
+    def consultar(self, s, t, estadisticas=None):
+        """
+        Distancia y camino de ids de s a t con búsqueda bidireccional hacia arriba
+        Devuelve (distancia, camino) o (inf, None) si no hay conexión
+        """
+        if s == t:
+            if estadisticas is not None:
+                estadisticas['expandidos'] = 0
+            return 0, [s]
+        offsets, destinos, pesos, _, _ = self.listas()
+        infinito = float('inf')
+
+        dist = ({s: 0}, {t: 0})
+        previo = ({s: -1}, {t: -1})
+        colas = ([(0, s)], [(0, t)])
+        mejor, encuentro = infinito, -1
+        expandidos = 0
+        while True:
+            # avanzar el lado con la menor distancia pendiente; parar cuando ninguno puede mejorar
+            lado = 0 if colas[0] and (not colas[1] or colas[0][0][0] <= colas[1][0][0]) else 1
+            if not colas[lado] or colas[lado][0][0] >= mejor:
+                break
+            d, u = heapq.heappop(colas[lado])
+            if d > dist[lado][u]:
+                continue
+            expandidos += 1
+            otro = dist[1 - lado].get(u)
+            if otro is not None and d + otro < mejor:
+                mejor, encuentro = d + otro, u
+
+            propia, anteriores, cola = dist[lado], previo[lado], colas[lado]
+            inicio, fin = offsets[u], offsets[u + 1]
+            # stall-on-demand: si una ciudad más importante ya llega a u por menos, u no es
+            # parte de un camino mínimo hacia arriba y no vale la pena expandirla
+            if any(propia.get(destinos[i], infinito) + pesos[i] < d for i in range(inicio, fin)):
+                continue
+            for i in range(inicio, fin):
+                v = destinos[i]
+                nueva = d + pesos[i]
+                if nueva < propia.get(v, infinito):
+                    propia[v] = nueva
+                    anteriores[v] = u
+                    heapq.heappush(cola, (nueva, v))
+
+        if estadisticas is not None:
+            estadisticas['expandidos'] = expandidos
+        if encuentro < 0:
+            return infinito, None
+
+        # camino en la jerarquía: s ... encuentro ... t
+        subida = [encuentro]
+        while previo[0][subida[-1]] >= 0:
+            subida.append(previo[0][subida[-1]])
+        subida.reverse()
+        bajada = []
+        u = previo[1][encuentro]
+        while u >= 0:
+            bajada.append(u)
+            u = previo[1][u]
+        return mejor, self._desplegar(subida + bajada)
+
+    def _desplegar(self, camino):
+        """Reemplaza cada atajo del camino por las conexiones reales que representa"""
+        offsets, destinos, _, medio, rango = self.listas()
+        resultado = [camino[0]]
+        # tramos (a, b) pendientes; el próximo a recorrer queda al final de la pila
+        pila = list(zip(camino[:-1], camino[1:]))[::-1]
+        while pila:
+            a, b = pila.pop()
+            bajo, alto = (a, b) if rango[a] < rango[b] else (b, a)
+            intermedia = -1
+            for i in range(offsets[bajo], offsets[bajo + 1]):
+                if destinos[i] == alto:
+                    intermedia = medio[i]
+                    break
+            if intermedia < 0:
+                resultado.append(b)
+            else:
+                pila.append((intermedia, b))
+                pila.append((a, intermedia))
+        return resultado
@@ -0,0 +1,154 @@
+"""
+K rutas más cortas sin ciclos (algoritmo de Yen) y rutas disjuntas de respaldo
+Todas las búsquedas de desvío (spur) usan como heurística el árbol de caminos mínimos
+con raíz en el destino: en la red no dirigida sus distancias son la distancia exacta
+de cada ciudad al destino en la red completa, así que son una cota admisible y
+consistente cuando se bloquean ciudades o tramos. Si el camino del árbol desde el nodo
+de desvío no toca nada bloqueado, es directamente el mejor desvío y no se busca.
+"""
+import heapq
+
+# Modos de rutas disjuntas: no compartir tramos (pares de ciudades) o ciudades intermedias
+MODOS_DISJUNTOS = ('enlaces', 'ciudades')
+
+def _peso_tramo(offsets, destinos, pesos, u, v):
+    """Peso del mejor arco entre u y v (con conexiones paralelas, la de menor peso)"""
+    return min(pesos[i] for i in range(offsets[u], offsets[u + 1]) if destinos[i] == v)
+
+def costo_camino(offsets, destinos, pesos, camino):
+    """Suma de pesos de un camino de ids en el orden en que se recorre"""
+    costo = 0
+    for u, v in zip(camino, camino[1:]):
+        costo += _peso_tramo(offsets, destinos, pesos, u, v)
+    return costo
+
+def _camino_del_arbol(previo_destino, fuente):
+    """Camino desde fuente hasta la raíz del árbol siguiendo los predecesores"""
+    camino = [fuente]
+    while previo_destino[camino[-1]] >= 0:
+        camino.append(previo_destino[camino[-1]])
+    return camino
+
+def _desvio(offsets, destinos, pesos, fuente, destino, distancia_destino, previo_destino,
+            nodos_bloqueados, tramos_bloqueados):
+    """
+    Camino más corto de fuente a destino evitando nodos y tramos bloqueados
+    Primero prueba el camino del árbol del destino; si está bloqueado, usa A* con
+    la distancia al destino como heurística. Devuelve la lista de ids o None
+    """
+    infinito = float('inf')
+    if distancia_destino[fuente] == infinito:
+        return None
+
+    camino = _camino_del_arbol(previo_destino, fuente)
+    libre = not any(v in nodos_bloqueados for v in camino)
+    if libre and tramos_bloqueados:
+        libre = not any((u, v) in tramos_bloqueados for u, v in zip(camino, camino[1:]))
+    if libre:
+        return camino
+
+    g = {fuente: 0}
+    previo = {fuente: -1}
+    cerrados = set()
+    cola = [(distancia_destino[fuente], fuente)]
+    while cola:
+        _, u = heapq.heappop(cola)
+        if u in cerrados:
+            continue
+        cerrados.add(u)
+        if u == destino:
+            camino = [destino]
+            while previo[camino[-1]] >= 0:
+                camino.append(previo[camino[-1]])
+            camino.reverse()
+            return camino
+
+        g_u = g[u]
+        for i in range(offsets[u], offsets[u + 1]):
+            v = destinos[i]
+            if v in cerrados or v in nodos_bloqueados or distancia_destino[v] == infinito:
+                continue
+            if tramos_bloqueados and (u, v) in tramos_bloqueados:
+                continue
+            nuevo = g_u + pesos[i]
+            if nuevo < g.get(v, infinito):
+                g[v] = nuevo
+                previo[v] = u
+                heapq.heappush(cola, (nuevo + distancia_destino[v], v))
+    return None
+
+def k_caminos_mas_cortos(offsets, destinos, pesos, fuente, destino, k,
+                         distancia_destino, previo_destino):
+    """
+    Algoritmo de Yen: hasta k caminos sin ciclos de fuente a destino en orden de costo
+    distancia_destino/previo_destino: árbol de caminos mínimos con raíz en destino
+    Devuelve una lista de (camino de ids, costo)
+    """
+    if distancia_destino[fuente] == float('inf'):
+        return []
+    primero = _camino_del_arbol(previo_destino, fuente)
+    encontrados = [(primero, costo_camino(offsets, destinos, pesos, primero))]
+    candidatos = []
+    vistos = {tuple(primero)}
+
+    while len(encontrados) < k:
+        anterior = encontrados[-1][0]
+        acumulado = 0  # costo de la raíz anterior[:i + 1]
+        for i in range(len(anterior) - 1):
+            raiz = anterior[:i + 1]
+            desde = anterior[i]
+
+            # tramos que ya usaron los caminos encontrados con la misma raíz
+            tramos_bloqueados = set()
+            for camino, _ in encontrados:
+                if len(camino) > i + 1 and camino[:i + 1] == raiz:
+                    tramos_bloqueados.add((camino[i], camino[i + 1]))
+                    tramos_bloqueados.add((camino[i + 1], camino[i]))
+
+            desvio = _desvio(offsets, destinos, pesos, desde, destino, distancia_destino,
+                             previo_destino, set(raiz[:-1]), tramos_bloqueados)
+            if desvio is not None:
+                camino = raiz[:-1] + desvio
+                clave = tuple(camino)
+                if clave not in vistos:
+                    vistos.add(clave)
+                    costo = acumulado + costo_camino(offsets, destinos, pesos, desvio)
+                    heapq.heappush(candidatos, (costo, len(camino), clave))
+            acumulado += _peso_tramo(offsets, destinos, pesos, anterior[i], anterior[i + 1])
+
+        if not candidatos:
+            break
+        costo, _, clave = heapq.heappop(candidatos)
+        encontrados.append((list(clave), costo))
+    return encontrados
+
+def caminos_disjuntos(offsets, destinos, pesos, fuente, destino, k,
+                      distancia_destino, previo_destino, modo='enlaces'):
+    """
+    Hasta k caminos disjuntos: cada uno es el más corto que no comparte tramos
+    (modo 'enlaces') o ciudades intermedias (modo 'ciudades') con los anteriores.
+    Es una elección golosa: la ruta principal es siempre la óptima
+    Devuelve una lista de (camino de ids, costo)
+    """
+    if modo not in MODOS_DISJUNTOS:
+        raise ValueError(f"Modo de rutas disjuntas desconocido: {modo}")
+    encontrados = []
+    nodos_bloqueados, tramos_bloqueados = set(), set()
+    while len(encontrados) < k:
+        camino = _desvio(offsets, destinos, pesos, fuente, destino, distancia_destino,
+                         previo_destino, nodos_bloqueados, tramos_bloqueados)
+        if camino is None or len(camino) < 2:
+            if camino is not None:
+                encontrados.append((camino, 0))
+            break
+        encontrados.append((camino, costo_camino(offsets, destinos, pesos, camino)))
+        if modo == 'ciudades':
+            nodos_bloqueados.update(camino[1:-1])
+            if len(camino) == 2:
+                # enlace directo: se bloquea el tramo para no repetirlo
+                tramos_bloqueados.update({(camino[0], camino[1]), (camino[1], camino[0])})
+        else:
+            for u, v in zip(camino, camino[1:]):
+                tramos_bloqueados.add((u, v))
+                tramos_bloqueados.add((v, u))
+    return encontrados
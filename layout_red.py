@@ -0,0 +1,176 @@
+"""
+Posiciones de las ciudades para dibujar la red
+Las redes chicas usan el spring_layout de networkx (el mismo dibujo de siempre); las grandes,
+un Fruchterman–Reingold propio sobre NumPy que aproxima la repulsión lejana con celdas
+de igual población (cada celda empuja con su masa desde su centroide, como Barnes–Hut
+con un solo nivel) y calcula exacta la repulsión entre ciudades de la misma celda.
+No necesita SciPy, y admite posiciones iniciales para retomar un dibujo anterior.
+Las posiciones se guardan en disco por huella de la topología (ver huella_topologia).
+"""
+import hashlib
+import os
+
+import numpy as np
+
+# Desde cuántas ciudades spring_layout de networkx necesita SciPy (se usa solo por debajo)
+MAX_CIUDADES_SPRING = 500
+# Iteraciones de un layout desde cero y de un ajuste a partir de posiciones previas
+ITERACIONES_LAYOUT = 100
+ITERACIONES_AJUSTE = 20
+# Fracción mínima de ciudades con posición anterior para ajustar en vez de empezar de cero
+MIN_FRACCION_CONOCIDAS = 0.9
+# La cuadrícula de repulsión tiene unas sqrt(n) celdas de sqrt(n) ciudades: así el costo de
+# las celdas lejanas (n x celdas) y el de los pares de cada celda quedan parejos, O(n^1.5)
+# Ciudades por bloque al calcular la repulsión lejana (acota la memoria temporal)
+TAMANO_BLOQUE_REPULSION = 4096
+# Versión del algoritmo: cambiarla invalida los layouts guardados en disco
+VERSION_LAYOUT = 1
+
+def huella_topologia(nombres, extremo_a, extremo_b, metodo):
+    """Huella (SHA-1) de las ciudades y conexiones de la red junto con el método de layout"""
+    resumen = hashlib.sha1(f"{VERSION_LAYOUT}:{metodo}:".encode())
+    resumen.update("\n".join(nombres).encode('utf-8'))
+    resumen.update(np.ascontiguousarray(extremo_a, dtype=np.int64).tobytes())
+    resumen.update(np.ascontiguousarray(extremo_b, dtype=np.int64).tobytes())
+    return resumen.hexdigest()
+
+def cargar_layout(archivo, nombres):
+    """Posiciones (n x 2) guardadas con guardar_layout, o None si no existen o no corresponden"""
+    try:
+        with np.load(archivo) as datos:
+            if list(datos['nombres']) != list(nombres):
+                return None
+            return datos['posiciones']
+    except (OSError, KeyError, ValueError):
+        return None
+
+def guardar_layout(archivo, nombres, posiciones):
+    """Guarda las posiciones en un .npz (se escribe aparte y se reemplaza al terminar)"""
+    os.makedirs(os.path.dirname(archivo) or ".", exist_ok=True)
+    temporal = archivo + ".tmp.npz"
+    np.savez(temporal, nombres=np.array(nombres, dtype=str), posiciones=posiciones)
+    os.replace(temporal, archivo)
+
+def reescalar(posiciones):
+    """Centra las posiciones y las lleva a [-1, 1] (como rescale_layout de networkx)"""
+    posiciones = posiciones - posiciones.mean(axis=0)
+    escala = np.abs(posiciones).max()
+    return posiciones / escala if escala > 0 else posiciones
+
+def layout_coordenadas(latitudes, longitudes):
+    """Proyección equirectangular de las coordenadas (grados) centrada en la red"""
+    x = np.asarray(longitudes, dtype=np.float64) * np.cos(np.radians(np.mean(latitudes)))
+    return reescalar(np.column_stack([x, np.asarray(latitudes, dtype=np.float64)]))
+
+def completar_posiciones(posiciones, conocidas, extremo_a, extremo_b, semilla=42):
+    """
+    Ubica las ciudades sin posición previa (conocidas[v] False) en el promedio de sus
+    vecinas ya ubicadas, con un pequeño desplazamiento; las aisladas quedan al azar
+    """
+    posiciones = posiciones.copy()
+    conocidas = np.asarray(conocidas, dtype=bool).copy()
+    generador = np.random.default_rng(semilla)
+    extremos = np.concatenate([extremo_a, extremo_b])
+    otros = np.concatenate([extremo_b, extremo_a])
+    while not conocidas.all():
+        # una ronda por "distancia" a las ciudades ubicadas
+        utiles = conocidas[otros] & ~conocidas[extremos]
+        if not utiles.any():
+            faltan = np.flatnonzero(~conocidas)
+            posiciones[faltan] = generador.uniform(-1, 1, (len(faltan), 2))
+            break
+        n = len(posiciones)
+        cantidad = np.bincount(extremos[utiles], minlength=n)
+        suma_x = np.bincount(extremos[utiles], posiciones[otros[utiles], 0], minlength=n)
+        suma_y = np.bincount(extremos[utiles], posiciones[otros[utiles], 1], minlength=n)
+        nuevas = np.flatnonzero(cantidad)
+        posiciones[nuevas, 0] = suma_x[nuevas] / cantidad[nuevas]
+        posiciones[nuevas, 1] = suma_y[nuevas] / cantidad[nuevas]
+        posiciones[nuevas] += generador.normal(0, 0.01, (len(nuevas), 2))
+        conocidas[nuevas] = True
+    return posiciones
+
+def _repulsion(posiciones, k):
+    """
+    Desplazamiento por repulsión k²/d: exacta dentro de cada celda, por centroides entre celdas
+    Las celdas se cortan por cuantiles (franjas en x, y cada franja en y), así tienen todas
+    la misma cantidad de ciudades aunque el dibujo se concentre alrededor de los nodos centrales
+    """
+    n = len(posiciones)
+    lado = max(1, round(n ** 0.25))
+    celdas = lado * lado
+    franja = np.empty(n, dtype=np.int64)
+    franja[np.argsort(posiciones[:, 0], kind='stable')] = np.arange(n) * lado // n
+    orden = np.lexsort((posiciones[:, 1], franja))
+    tamano = np.bincount(franja, minlength=lado)
+    inicio_franja = np.concatenate([[0], np.cumsum(tamano)[:-1]])
+    franja_orden = franja[orden]
+    celda = np.empty(n, dtype=np.int64)
+    celda[orden] = franja_orden * lado + (np.arange(n) - inicio_franja[franja_orden]) * lado // tamano[franja_orden]
+
+    masa = np.bincount(celda, minlength=celdas).astype(np.float64)
+    centroide = np.column_stack([np.bincount(celda, posiciones[:, 0], minlength=celdas),
+                                 np.bincount(celda, posiciones[:, 1], minlength=celdas)])
+    ocupadas = masa > 0
+    centroide[ocupadas] /= masa[ocupadas, None]
+
+    desplazamiento = np.zeros_like(posiciones)
+    k2 = k * k
+    # lejanas: cada celda (salvo la propia) como una sola masa en su centroide
+    for inicio in range(0, n, TAMANO_BLOQUE_REPULSION):
+        bloque = slice(inicio, inicio + TAMANO_BLOQUE_REPULSION)
+        propias = posiciones[bloque]
+        dx = propias[:, 0, None] - centroide[None, :, 0]
+        dy = propias[:, 1, None] - centroide[None, :, 1]
+        peso = (masa * k2) / np.maximum(dx * dx + dy * dy, 1e-12)
+        peso[np.arange(len(propias)), celda[bloque]] = 0.0
+        # suma de peso * (p - c) = p * suma(peso) - peso @ c
+        desplazamiento[bloque] += propias * peso.sum(axis=1)[:, None] - peso @ centroide
+
+    # cercanas: todos los pares de la misma celda (en orden, cada celda es un tramo contiguo)
+    limites = np.searchsorted(celda[orden], np.arange(celdas + 1))
+    for c in np.flatnonzero(masa > 1):
+        miembros = orden[limites[c]:limites[c + 1]]
+        propias = posiciones[miembros]
+        dx = propias[:, 0, None] - propias[None, :, 0]
+        dy = propias[:, 1, None] - propias[None, :, 1]
+        distancia2 = np.maximum(dx * dx + dy * dy, 1e-12)
+        np.fill_diagonal(distancia2, np.inf)
+        peso = k2 / distancia2
+        desplazamiento[miembros] += propias * peso.sum(axis=1)[:, None] - peso @ propias
+    return desplazamiento
+
+def layout_fuerzas(n, extremo_a, extremo_b, iniciales=None, iteraciones=ITERACIONES_LAYOUT, semilla=42):
+    """
+    Fruchterman–Reingold para redes grandes; devuelve posiciones (n x 2) en [-1, 1]
+    iniciales: posiciones previas en [-1, 1] para retomar un dibujo (arranca más "frío")
+    """
+    if n == 0:
+        return np.zeros((0, 2))
+    if iniciales is None:
+        posiciones = np.random.default_rng(semilla).random((n, 2))
+        temperatura = 0.1
+    else:
+        posiciones = (np.asarray(iniciales, dtype=np.float64) + 1) / 2
+        temperatura = 0.02
+    extremo_a = np.asarray(extremo_a, dtype=np.int64)
+    extremo_b = np.asarray(extremo_b, dtype=np.int64)
+    k = 1 / np.sqrt(n)
+    enfriamiento = temperatura / (iteraciones + 1)
+
+    for _ in range(iteraciones):
+        desplazamiento = _repulsion(posiciones, k)
+
+        # atracción d²/k a lo largo de cada conexión
+        delta = posiciones[extremo_a] - posiciones[extremo_b]
+        distancia = np.maximum(np.sqrt((delta ** 2).sum(axis=1)), 1e-9)
+        fuerza = delta * (distancia / k)[:, None]
+        for eje in range(2):
+            desplazamiento[:, eje] -= np.bincount(extremo_a, fuerza[:, eje], minlength=n)
+            desplazamiento[:, eje] += np.bincount(extremo_b, fuerza[:, eje], minlength=n)
+
+        # cada ciudad se mueve como mucho la temperatura actual
+        largo = np.maximum(np.sqrt((desplazamiento ** 2).sum(axis=1)), 1e-9)
+        posiciones += desplazamiento * (np.minimum(largo, temperatura) / largo)[:, None]
+        temperatura -= enfriamiento
+    return reescalar(posiciones)
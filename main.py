@@ -1,148 +1,1526 @@
 import csv
+import hashlib
 import heapq
+import json
+import os
+import shutil
 import sys
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
 import matplotlib.pyplot as plt
 import networkx as nx
 from matplotlib.patches import FancyBboxPatch
 import numpy as np
+from cargador_csv import (MAX_EJEMPLOS_ERROR, POLITICAS_DUPLICADOS, TAMANO_BLOQUE, abrir_texto,
+                          es_encabezado, indices_sin_duplicados, leer_bloques, motivo_valores,
+                          parsear_bloque)
+from arboles_dinamicos import peso_entre, reparar_arbol, reparar_tabla
+from rutas_csr import (CRITERIO_MAS_ANCHO, buscar_aristas, camino_desde_previo, dijkstra_csr, indice_arcos,
+                       metricas_arbol, camino_mas_ancho, camino_min_saltos, metricas_camino, metricas_caminos,
+                       registrar_busqueda)
+import instrumentacion
+from cuello_botella import TablaCuelloBotella
+from flujo_maximo import arbol_gomory_hu, arcos_gemelos, flujo_maximo
+from jerarquias import ARREGLOS_JERARQUIA, JerarquiaContraccion, construir_jerarquia
+from k_rutas import MODOS_DISJUNTOS, caminos_disjuntos, k_caminos_mas_cortos
+from layout_red import (ITERACIONES_AJUSTE, MAX_CIUDADES_SPRING, MIN_FRACCION_CONOCIDAS, cargar_layout,
+                        completar_posiciones, guardar_layout, huella_topologia, layout_coordenadas,
+                        layout_fuerzas)
+from pareto import frontera_pareto
+from render_lote import (CARPETA_IMAGENES, CRITERIO_NOMBRES, DPI_IMAGEN, DPI_PREVIA, FORMATOS, Lienzo,
+                         calcular_ruta, datos_dibujo, renderizar_trabajos)
 
-# Archivo con las conexiones de la red ISP
+# Archivo con las conexiones de la red ISP (se puede pasar otro como argumento, ver parsear_argumentos)
 ARCHIVO_RED = "red_isp_peru.csv"
- # Permitir que el usuario pase su propio archivo CSV como argumento al ejecutar el script
-if len(sys.argv) > 1:
-    ARCHIVO_RED = sys.argv[1]
+# Archivo opcional con coordenadas de las ciudades (ciudad,latitud,longitud) para A*
+ARCHIVO_COORDENADAS = None
+
+# Cota inferior de latencia por kilómetro (luz en fibra ≈ 200 000 km/s → 0.005 ms/km)
+LATENCIA_MINIMA_POR_KM = 0.005
+RADIO_TIERRA_KM = 6371.0
+
+# Cantidad de árboles de caminos mínimos (origen, criterio) que se guardan en memoria
+TAMANO_CACHE_ARBOLES = 32
+
+# Carpeta donde se guardan las posiciones de los dibujos (una por topología de red)
+CARPETA_LAYOUTS = ".layouts"
+
+# Versión del formato de snapshot binario (cambiarla invalida los snapshots anteriores)
+# 3: ancho_banda dejó de ser aditivo y ya no tiene tablas ni jerarquías
+FORMATO_SNAPSHOT = 3
+# Columnas del grafo compacto que se guardan en el snapshot
+ARREGLOS_SNAPSHOT = ('extremo_a', 'extremo_b', 'latencia', 'costo', 'ancho_banda',
+                     'offsets', 'destinos', 'arista', 'clave_arco', 'arista_de_clave')
+
+# Criterios de optimización como coeficientes sobre cada métrica de la conexión:
+# peso = latencia * c_lat + costo * c_costo + max(1000 - ancho_banda, 0) * c_ancho
+# (el término de ancho de banda no baja de 0 para enlaces de más de 1000 Mbps: Dijkstra
+# no admite pesos negativos; solo se usa como componente del compuesto y de los criterios
+# registrados). El criterio ancho_banda no tiene coeficientes: busca el camino más ancho.
+CRITERIOS_BASE = {
+    'latencia': {'latencia': 1},
+    'costo': {'costo': 100},  # multiplicar para evitar números muy pequeños
+    CRITERIO_MAS_ANCHO: None,  # máximo cuello de botella (ruta_mas_ancha), no una suma de pesos
+    'compuesto': {'latencia': 0.5, 'costo': 50, 'ancho_banda': 0.3},  # balance de todos
+}
+
+def _distancia_km(lat_a, lon_a, lat_b, lon_b):
+    """Distancia de gran círculo (haversine) en km; acepta radianes escalares o arreglos"""
+    seno_lat = np.sin((lat_b - lat_a) / 2)
+    seno_lon = np.sin((lon_b - lon_a) / 2)
+    h = seno_lat ** 2 + np.cos(lat_a) * np.cos(lat_b) * seno_lon ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+def hash_archivo(archivo):
+    """Hash SHA-256 del contenido de un archivo (para detectar si el CSV cambió)"""
+    resumen = hashlib.sha256()
+    with open(archivo, 'rb') as datos:
+        for bloque in iter(lambda: datos.read(1 << 20), b''):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+def carpeta_snapshot(archivo):
+    """Ubicación por defecto del snapshot binario de un CSV"""
+    return archivo + ".snapshot"
+
+class GrafoCompacto:
+    """
+    Representación compacta (CSR) de la red ISP
+    Las ciudades se internan como enteros (en orden alfabético) y cada conexión
+    se guarda una sola vez en columnas NumPy paralelas de latencia, costo y ancho de banda.
+    La adyacencia usa arreglos offsets/destinos: los vecinos de u están en
+    destinos[offsets[u]:offsets[u+1]] y arista[...] indica la conexión de cada arco.
+    clave_arco/arista_de_clave indexan (u, v) -> conexión para buscarla sin recorrer vecinos.
+    Entre dos ciudades con conexiones paralelas, las métricas de una ruta usan la latencia y
+    el costo de la primera y el ancho de banda de la más ancha (ancho_banda_par).
+    """
+    def __init__(self, nombres, extremo_a, extremo_b, latencia, costo, ancho_banda):
+        self.nombres = list(nombres)
+        self.indice = {ciudad: i for i, ciudad in enumerate(self.nombres)}
+        n = len(self.nombres)
+        
+        # columnas por conexión (una fila por línea del CSV)
+        self.extremo_a = np.asarray(extremo_a, dtype=np.int32)
+        self.extremo_b = np.asarray(extremo_b, dtype=np.int32)
+        self.latencia = np.asarray(latencia, dtype=np.float64)
+        self.costo = np.asarray(costo, dtype=np.float64)
+        self.ancho_banda = np.asarray(ancho_banda, dtype=np.float64)
+        m = len(self.extremo_a)
+        
+        # arcos intercalados: 2i = A -> B, 2i+1 = B -> A (mismo orden que el CSV)
+        colas = np.empty(2 * m, dtype=np.int32)
+        colas[0::2] = self.extremo_a
+        colas[1::2] = self.extremo_b
+        cabezas = np.empty(2 * m, dtype=np.int32)
+        cabezas[0::2] = self.extremo_b
+        cabezas[1::2] = self.extremo_a
+        
+        # ordenamiento estable: cada ciudad conserva sus vecinos en orden de aparición
+        orden = np.argsort(colas, kind='stable')
+        self.offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(colas, minlength=n), out=self.offsets[1:])
+        self.destinos = cabezas[orden]
+        self.arista = (orden // 2).astype(np.int32)
+        
+        # índice (u, v) -> conexión, construido una vez por carga
+        self.clave_arco, self.arista_de_clave = indice_arcos(self.offsets, self.destinos, self.arista)
+        
+        self._listas = None
+        self._ancho_par = None
+    
+    @classmethod
+    def desde_arreglos(cls, nombres, arreglos):
+        """Reconstruye el grafo a partir de arreglos ya compilados (p. ej. mapeados desde un snapshot)"""
+        compacto = cls.__new__(cls)
+        compacto.nombres = list(nombres)
+        compacto.indice = {ciudad: i for i, ciudad in enumerate(compacto.nombres)}
+        for nombre in ARREGLOS_SNAPSHOT:
+            setattr(compacto, nombre, arreglos[nombre])
+        compacto._listas = None
+        compacto._ancho_par = None
+        return compacto
+    
+    @property
+    def num_ciudades(self):
+        return len(self.nombres)
+    
+    @property
+    def num_conexiones(self):
+        return len(self.extremo_a)
+    
+    def grados(self):
+        """Número de conexiones (arcos salientes) de cada ciudad"""
+        return np.diff(self.offsets)
+    
+    def vecinos(self, u):
+        """Arcos salientes de la ciudad u como pares (destino, id de conexión)"""
+        inicio, fin = self.offsets[u], self.offsets[u + 1]
+        return zip(self.destinos[inicio:fin].tolist(), self.arista[inicio:fin].tolist())
+    
+    def aristas_entre(self, u, v):
+        """Ids de conexión entre pares de ciudades (arreglos de ids); -1 si no están conectadas"""
+        return buscar_aristas(self.clave_arco, self.arista_de_clave, self.num_ciudades, u, v)
+    
+    def listas(self):
+        """
+        Copia en listas de Python de offsets/destinos/arista para los bucles internos
+        (indexar listas es mucho más rápido que indexar escalares de NumPy)
+        """
+        if self._listas is None:
+            self._listas = (self.offsets.tolist(), self.destinos.tolist(), self.arista.tolist())
+        return self._listas
+    
+    def ancho_banda_par(self):
+        """
+        Ancho de banda de cada conexión como el de la más ancha entre sus dos ciudades
+        (con conexiones paralelas, una ruta puede ir por cualquiera de ellas)
+        """
+        if self._ancho_par is None:
+            menor = np.minimum(self.extremo_a, self.extremo_b).astype(np.int64)
+            mayor = np.maximum(self.extremo_a, self.extremo_b).astype(np.int64)
+            _, par = np.unique(menor * self.num_ciudades + mayor, return_inverse=True)
+            par = par.ravel()
+            maximo = np.zeros(par.max(initial=-1) + 1, dtype=np.float64)
+            np.maximum.at(maximo, par, self.ancho_banda)
+            self._ancho_par = maximo[par]
+        return self._ancho_par
+    
+    def memoria_bytes(self):
+        """Memoria ocupada por los arreglos del grafo compacto"""
+        return sum(getattr(self, nombre).nbytes for nombre in ARREGLOS_SNAPSHOT)
+
+class VistaAdyacencia(Mapping):
+    """
+    Vista de solo lectura con la forma del antiguo diccionario de listas:
+    vista[ciudad] -> [{'destino', 'latencia', 'costo', 'ancho_banda'}, ...]
+    Las conexiones se generan bajo demanda a partir del grafo compacto.
+    """
+    def __init__(self, compacto):
+        self._compacto = compacto
+    
+    def __getitem__(self, ciudad):
+        compacto = self._compacto
+        if compacto is None or ciudad not in compacto.indice:
+            raise KeyError(ciudad)
+        conexiones = []
+        for v, e in compacto.vecinos(compacto.indice[ciudad]):
+            conexiones.append({
+                'destino': compacto.nombres[v],
+                'latencia': float(compacto.latencia[e]),
+                'costo': float(compacto.costo[e]),
+                'ancho_banda': float(compacto.ancho_banda[e])
+            })
+        return conexiones
+    
+    def __iter__(self):
+        return iter(self._compacto.nombres if self._compacto is not None else [])
+    
+    def __len__(self):
+        return self._compacto.num_ciudades if self._compacto is not None else 0
+    
+    def __contains__(self, ciudad):
+        return self._compacto is not None and ciudad in self._compacto.indice
 
 class RedISP:
     """Clase que representa la red de un ISP"""
-    def __init__(self):
-        self.grafo = {}  # diccionario para guardar las conexiones
-        self.ciudades = []  # lista de ciudades disponibles
+    def __init__(self, tamano_cache=TAMANO_CACHE_ARBOLES):
+        self.compacto = None  # grafo CSR construido después de cargar el archivo
+        self.ciudades = []  # lista de ciudades disponibles (índice = id interno)
+        self.version = 0  # aumenta cada vez que cambia el grafo
+        self.criterios = {nombre: coef and dict(coef) for nombre, coef in CRITERIOS_BASE.items()}
+        self._pesos = {}  # criterio -> (pesos por conexión, pesos por arco en lista)
+        self.coordenadas = {}  # ciudad -> (latitud, longitud) en grados
+        self.latencia_por_km = LATENCIA_MINIMA_POR_KM
+        self._geo = None  # datos geográficos por id (se recalculan si cambia el grafo)
+        self._metricas_arco = None  # (latencia, costo, ancho de banda) por arco en listas
+        self._cuellos = None  # TablaCuelloBotella de la versión actual del grafo
+        self._cortes = None  # árbol de Gomory–Hu (padre, valor, tabla) de la versión actual
+        self._layout = None  # (versión, nombres, posiciones n x 2) del último dibujo; sirve de arranque al cambiar
+        self.carpeta_layouts = CARPETA_LAYOUTS  # None para no guardar layouts en disco
+        self.ultima_busqueda = {}  # algoritmo y nodos expandidos de la última ruta_optima
+        self.tamano_cache = tamano_cache
+        self._arboles = OrderedDict()  # (origen, criterio, versión) -> (distancias, predecesores) LRU
+        self.aciertos_cache = 0
+        self.fallos_cache = 0
+        self.tablas = {}  # criterio -> {'distancias': n x n, 'siguiente': n x n} todos-contra-todos
+        self.jerarquias = {}  # criterio -> JerarquiaContraccion para consultas punto a punto
+        self.politica_duplicados = 'conservar'
+        self.reporte_carga = {}  # filas leídas, cargadas y con errores de la última carga
+        self._reiniciar_carga()
     
-    def cargar_red_desde_archivo(self, archivo):
+    @property
+    def grafo(self):
+        """Vista de compatibilidad (diccionario de listas de conexiones) sobre el grafo compacto"""
+        return VistaAdyacencia(self.compacto)
+    
+    def _reiniciar_carga(self):
+        """Prepara las columnas temporales que se llenan mientras se lee el CSV"""
+        self._ids_carga = {}
+        self._col_a = array('i')
+        self._col_b = array('i')
+        self._col_latencia = array('d')
+        self._col_costo = array('d')
+        self._col_ancho = array('d')
+    
+    @instrumentacion.instrumentado()
+    def cargar_red_desde_archivo(self, archivo, archivo_coordenadas=None, latencia_por_km=None,
+                                 politica_duplicados='conservar', tamano_bloque=TAMANO_BLOQUE):
         """
-        Carga la red ISP desde un archivo CSV
+        Carga la red ISP desde un archivo CSV (o CSV comprimido con gzip)
         Formato esperado: ciudad_origen,ciudad_destino,latencia_ms,costo_soles,ancho_banda_mbps
+        El archivo se lee en bloques de tamano_bloque líneas; las filas dañadas se omiten
+        y se informan en self.reporte_carga. Devuelve False si el archivo no se pudo leer.
+        politica_duplicados: qué hacer con conexiones repetidas entre el mismo par de ciudades
+        ('conservar', 'primera', 'ultima', 'min_latencia', 'min_costo', 'max_ancho_banda')
+        archivo_coordenadas (opcional): CSV ciudad,latitud,longitud para enrutar la latencia con A*
+        latencia_por_km: cota inferior de latencia (ms/km) usada por la heurística
         """
+        if politica_duplicados not in POLITICAS_DUPLICADOS:
+            raise ValueError(f"Política de duplicados desconocida: {politica_duplicados}")
         print("📡 Cargando red ISP desde archivo:", archivo)
         
+        self._reiniciar_carga()
+        reporte = {'filas': 0, 'cargadas': 0, 'errores': 0, 'ejemplos_error': [],
+                   'duplicados_descartados': 0}
         try:
-            with open(archivo, newline="", encoding='utf-8') as archivo_csv:
-                lector = csv.reader(archivo_csv)
-                
-                # saltar encabezado si existe
-                primera_linea = next(lector)
-                if not primera_linea[0].replace('.','').isdigit():
-                    # es encabezado, continuar con la siguiente
-                    pass
-                else:
-                    # no es encabezado, procesar esta linea
-                    self._procesar_conexion(primera_linea)
-                
-                # procesar el resto de lineas
-                for linea in lector:
-                    self._procesar_conexion(linea)
-                    
+            with abrir_texto(archivo) as texto:
+                for i, (numeros, lineas) in enumerate(leer_bloques(texto, tamano_bloque)):
+                    # saltar encabezado si existe
+                    if i == 0 and es_encabezado(lineas[0]):
+                        numeros, lineas = numeros[1:], lineas[1:]
+                    if lineas:
+                        self._procesar_bloque(numeros, lineas, reporte)
         except FileNotFoundError:
             print("❌ ERROR: No se encontró el archivo", archivo)
             print("💡 Por favor, crea el archivo CSV con las conexiones de la red.")
             print("📋 Formato esperado: ciudad_origen,ciudad_destino,latencia_ms,costo_soles,ancho_banda_mbps")
-            sys.exit()
+            self._reiniciar_carga()
+            return False
+        except (OSError, EOFError, UnicodeDecodeError) as e:
+            print(f"❌ ERROR al leer {archivo}: {e}")
+            self._reiniciar_carga()
+            return False
         
-        # crear lista ordenada de ciudades
-        self.ciudades = sorted(list(self.grafo.keys()))
+        # compilar el grafo compacto (una sola vez por carga)
+        self._compilar_grafo(politica_duplicados, reporte)
+        self.reporte_carga = reporte
         print(f"✅ Red cargada: {len(self.ciudades)} ciudades, {self._contar_conexiones()} conexiones")
+        if reporte['errores']:
+            print(f"⚠️  {reporte['errores']} filas con errores fueron omitidas, por ejemplo:")
+            for numero, motivo, contenido in reporte['ejemplos_error'][:5]:
+                print(f"   línea {numero}: {motivo} → {contenido}")
+        if reporte['duplicados_descartados']:
+            print(f"🔁 {reporte['duplicados_descartados']} conexiones duplicadas descartadas "
+                  f"(política: {politica_duplicados})")
+        
+        if archivo_coordenadas:
+            self.cargar_coordenadas(archivo_coordenadas, latencia_por_km)
+        return True
     
-    def _procesar_conexion(self, linea):
-        """Procesa una línea del CSV y agrega la conexión al grafo"""
-        ciudad_a = linea[0].strip()
-        ciudad_b = linea[1].strip()
-        latencia = float(linea[2])      # milisegundos
-        costo = float(linea[3])         # soles por MB
-        ancho_banda = float(linea[4])   # Mbps
-        
-        # crear conexiones bidireccionales
-        if ciudad_a not in self.grafo:
-            self.grafo[ciudad_a] = []
-        if ciudad_b not in self.grafo:
-            self.grafo[ciudad_b] = []
-        
-        # agregar conexión A -> B y B -> A con todas las métricas
-        conexion_ab = {
-            'destino': ciudad_b,
-            'latencia': latencia,
-            'costo': costo,
-            'ancho_banda': ancho_banda
-        }
-        conexion_ba = {
-            'destino': ciudad_a,
-            'latencia': latencia,
-            'costo': costo,
-            'ancho_banda': ancho_banda
-        }
+    def _procesar_bloque(self, numeros, lineas, reporte):
+        """Convierte un bloque de líneas del CSV y agrega sus conexiones a las columnas de carga"""
+        origenes, destinos, latencia, costo, ancho_banda, errores = parsear_bloque(numeros, lineas)
+        reporte['filas'] += len(lineas)
+        reporte['cargadas'] += len(origenes)
+        reporte['errores'] += len(errores)
+        faltan = MAX_EJEMPLOS_ERROR - len(reporte['ejemplos_error'])
+        if faltan > 0:
+            reporte['ejemplos_error'].extend(errores[:faltan])
+        if not len(origenes):
+            return
         
-        self.grafo[ciudad_a].append(conexion_ab)
-        self.grafo[ciudad_b].append(conexion_ba)
+        # internar ciudades como enteros (ids provisionales por orden de aparición)
+        unicos, inversa = np.unique(np.concatenate([origenes, destinos]), return_inverse=True)
+        ids = self._ids_carga
+        ids_unicos = np.fromiter((ids.setdefault(ciudad, len(ids)) for ciudad in unicos.tolist()),
+                                 dtype=np.int32, count=len(unicos))
+        ids_bloque = ids_unicos[inversa.ravel()]
+        
+        # la conexión se guarda una sola vez; el grafo compacto crea A -> B y B -> A
+        self._col_a.frombytes(ids_bloque[:len(origenes)].tobytes())
+        self._col_b.frombytes(ids_bloque[len(origenes):].tobytes())
+        self._col_latencia.frombytes(np.ascontiguousarray(latencia, dtype=np.float64).tobytes())
+        self._col_costo.frombytes(np.ascontiguousarray(costo, dtype=np.float64).tobytes())
+        self._col_ancho.frombytes(np.ascontiguousarray(ancho_banda, dtype=np.float64).tobytes())
+    
+    def cargar_coordenadas(self, archivo, latencia_por_km=None):
+        """
+        Carga las coordenadas geográficas de las ciudades
+        Formato esperado: ciudad,latitud,longitud (encabezado opcional)
+        """
+        print("🧭 Cargando coordenadas desde archivo:", archivo)
+        if latencia_por_km is not None:
+            self.latencia_por_km = latencia_por_km
+        
+        try:
+            with open(archivo, newline="", encoding='utf-8') as archivo_csv:
+                for linea in csv.reader(archivo_csv):
+                    if len(linea) < 3:
+                        continue
+                    try:
+                        latitud, longitud = float(linea[1]), float(linea[2])
+                    except ValueError:
+                        continue  # encabezado o línea inválida
+                    self.coordenadas[linea[0].strip()] = (latitud, longitud)
+        except FileNotFoundError:
+            print("❌ ERROR: No se encontró el archivo", archivo)
+            print("💡 Se usará Dijkstra sin heurística geográfica.")
+            return
+        
+        self._geo = None
+        faltantes = [ciudad for ciudad in self.ciudades if ciudad not in self.coordenadas]
+        if faltantes:
+            print(f"⚠️  {len(faltantes)} ciudades sin coordenadas; A* desactivado (ej.: {faltantes[0]})")
+        else:
+            print(f"✅ Coordenadas cargadas para {len(self.ciudades)} ciudades")
+    
+    def _compilar_grafo(self, politica_duplicados='conservar', reporte=None):
+        """Construye el grafo CSR a partir de las columnas de carga y libera las temporales"""
+        # renumerar ciudades en orden alfabético para que id y nombre ordenen igual
+        nombres_aparicion = list(self._ids_carga)
+        nombres = sorted(nombres_aparicion)
+        posicion = {ciudad: i for i, ciudad in enumerate(nombres)}
+        renumerar = np.array([posicion[c] for c in nombres_aparicion], dtype=np.int32)
+        
+        extremo_a = renumerar[np.array(self._col_a, dtype=np.int32)] if self._col_a else np.array([], np.int32)
+        extremo_b = renumerar[np.array(self._col_b, dtype=np.int32)] if self._col_b else np.array([], np.int32)
+        latencia = np.array(self._col_latencia, dtype=np.float64)
+        costo = np.array(self._col_costo, dtype=np.float64)
+        ancho_banda = np.array(self._col_ancho, dtype=np.float64)
+        
+        # conexiones paralelas entre el mismo par de ciudades
+        conservar = indices_sin_duplicados(extremo_a, extremo_b, latencia, costo, ancho_banda,
+                                           politica_duplicados)
+        if len(conservar) < len(extremo_a):
+            if reporte is not None:
+                reporte['duplicados_descartados'] = len(extremo_a) - len(conservar)
+            extremo_a, extremo_b = extremo_a[conservar], extremo_b[conservar]
+            latencia, costo, ancho_banda = latencia[conservar], costo[conservar], ancho_banda[conservar]
+        
+        self.compacto = GrafoCompacto(nombres, extremo_a, extremo_b, latencia, costo, ancho_banda)
+        self.politica_duplicados = politica_duplicados
+        self.ciudades = self.compacto.nombres
+        self._reiniciar_carga()
+        self._grafo_modificado()
+    
+    def _grafo_modificado(self):
+        """Invalida todo lo derivado del grafo (pesos precalculados, etc.)"""
+        self.version += 1
+        self._pesos = {}
+        self._geo = None
+        self._metricas_arco = None
+        self._cuellos = None
+        self._cortes = None
+        self._arboles.clear()
+        self.tablas = {}
+        self.jerarquias = {}
+    
+    def _conexiones_entre(self, ciudad_a, ciudad_b):
+        """Ids de todas las conexiones entre dos ciudades (en cualquier sentido)"""
+        compacto = self.compacto
+        u, v = compacto.indice[ciudad_a], compacto.indice[ciudad_b]
+        return sorted({e for w, e in compacto.vecinos(u) if w == v})
+    
+    def _cambiar_conexiones(self, ciudad_a, ciudad_b, cambiar):
+        """
+        Reemplaza el grafo por cambiar(compacto) (mismas ciudades, solo cambian las conexiones
+        entre ciudad_a y ciudad_b) y repara los árboles en caché y las tablas todos-contra-todos
+        en lugar de descartarlos. Las jerarquías de contracción se descartan (hay que reconstruirlas)
+        Devuelve (árboles reparados, orígenes de tablas reparados)
+        """
+        compacto = self.compacto
+        a, b = compacto.indice[ciudad_a], compacto.indice[ciudad_b]
+        arboles = [(clave, arbol) for clave, arbol in self._arboles.items() if clave[2] == self.version]
+        tablas = self.tablas
+        offsets, destinos, _ = compacto.listas()
+        antes = {}
+        for criterio in {clave[1] for clave, _ in arboles} | set(tablas):
+            antes[criterio] = peso_entre(offsets, destinos, self._pesos_materializados(criterio)[1], a, b)
+        
+        self.compacto = cambiar(compacto)
+        self.ciudades = self.compacto.nombres
+        self._grafo_modificado()
+        
+        offsets, destinos, _ = self.compacto.listas()
+        despues = {}
+        for criterio in antes:
+            despues[criterio] = peso_entre(offsets, destinos, self._pesos_materializados(criterio)[1], a, b)
+        for (fuente, criterio, _), (dist, previo) in arboles:
+            # copias: quien pidió el árbol antes del cambio puede seguir usándolo
+            dist, previo = list(dist), list(previo)
+            reparar_arbol(offsets, destinos, self._pesos_materializados(criterio)[1], dist, previo,
+                          a, b, antes[criterio], despues[criterio])
+            self._arboles[(fuente, criterio, self.version)] = (dist, previo)
+        
+        origenes_reparados = 0
+        for criterio, tabla in tablas.items():
+            distancias, siguiente = tabla['distancias'], tabla['siguiente']
+            if not (distancias.flags.writeable and siguiente.flags.writeable):
+                distancias, siguiente = np.array(distancias), np.array(siguiente)
+            # siguiente.T tiene en la fila s el árbol con raíz s
+            origenes_reparados += reparar_tabla(offsets, destinos, self._pesos_materializados(criterio)[1],
+                                                distancias, siguiente.T, a, b,
+                                                antes[criterio], despues[criterio])
+            self.tablas[criterio] = {'distancias': distancias, 'siguiente': siguiente}
+        return len(arboles), origenes_reparados
+    
+    def _informar_cambio(self, mensaje, reparados):
+        arboles, origenes = reparados
+        print(f"🔧 {mensaje} ({arboles} árboles en caché y {origenes} orígenes de tablas reparados)")
+    
+    def agregar_conexion(self, ciudad_a, ciudad_b, latencia, costo, ancho_banda):
+        """
+        Agrega una conexión en tiempo de ejecución (solo en memoria, el CSV no cambia)
+        Si las dos ciudades ya existen, los árboles en caché y las tablas se reparan; una
+        ciudad nueva cambia los ids internos y obliga a recalcular todo.
+        La política de duplicados solo se aplica al cargar: aquí la conexión se agrega siempre
+        """
+        motivo = motivo_valores(latencia, costo, ancho_banda)
+        if motivo:
+            raise ValueError(f"Conexión inválida: {motivo}")
+        
+        compacto = self.compacto
+        nombres, extremo_a, extremo_b = compacto.nombres, compacto.extremo_a, compacto.extremo_b
+        nuevas = [ciudad for ciudad in dict.fromkeys((ciudad_a, ciudad_b)) if ciudad not in compacto.indice]
+        if nuevas:
+            # renumerar en orden alfabético como al cargar
+            nombres = sorted(nombres + nuevas)
+            posicion = {ciudad: i for i, ciudad in enumerate(nombres)}
+            renumerar = np.array([posicion[ciudad] for ciudad in compacto.nombres], dtype=np.int32)
+            extremo_a, extremo_b = renumerar[extremo_a], renumerar[extremo_b]
+        posicion = {ciudad: i for i, ciudad in enumerate(nombres)}
+        
+        def agregar(compacto):
+            return GrafoCompacto(nombres,
+                                 np.append(extremo_a, posicion[ciudad_a]), np.append(extremo_b, posicion[ciudad_b]),
+                                 np.append(compacto.latencia, latencia), np.append(compacto.costo, costo),
+                                 np.append(compacto.ancho_banda, ancho_banda))
+        
+        if not nuevas:
+            reparados = self._cambiar_conexiones(ciudad_a, ciudad_b, agregar)
+            self._informar_cambio(f"Conexión {ciudad_a} - {ciudad_b} agregada", reparados)
+            return
+        self.compacto = agregar(compacto)
+        self.ciudades = self.compacto.nombres
+        self._grafo_modificado()
+        print(f"🔧 Conexión {ciudad_a} - {ciudad_b} agregada con ciudades nuevas "
+              f"({', '.join(nuevas)}); cachés y tablas descartadas")
+    
+    def eliminar_conexion(self, ciudad_a, ciudad_b):
+        """Elimina todas las conexiones entre dos ciudades; devuelve cuántas se eliminaron"""
+        ids = self._conexiones_entre(ciudad_a, ciudad_b)
+        if not ids:
+            raise ValueError(f"No hay conexión entre {ciudad_a} y {ciudad_b}")
+        
+        def eliminar(compacto):
+            conservar = np.ones(compacto.num_conexiones, dtype=bool)
+            conservar[ids] = False
+            return GrafoCompacto(compacto.nombres, compacto.extremo_a[conservar], compacto.extremo_b[conservar],
+                                 compacto.latencia[conservar], compacto.costo[conservar],
+                                 compacto.ancho_banda[conservar])
+        
+        reparados = self._cambiar_conexiones(ciudad_a, ciudad_b, eliminar)
+        self._informar_cambio(f"Conexión {ciudad_a} - {ciudad_b} eliminada", reparados)
+        return len(ids)
+    
+    def actualizar_conexion(self, ciudad_a, ciudad_b, latencia=None, costo=None, ancho_banda=None):
+        """
+        Cambia las métricas de las conexiones entre dos ciudades (None conserva el valor actual)
+        La estructura del grafo no cambia: solo se copian las columnas de métricas
+        """
+        ids = self._conexiones_entre(ciudad_a, ciudad_b)
+        if not ids:
+            raise ValueError(f"No hay conexión entre {ciudad_a} y {ciudad_b}")
+        compacto = self.compacto
+        columnas = {'latencia': latencia, 'costo': costo, 'ancho_banda': ancho_banda}
+        nuevas = {nombre: np.array(getattr(compacto, nombre)) for nombre in columnas}
+        for nombre, valor in columnas.items():
+            if valor is not None:
+                nuevas[nombre][ids] = valor
+        for e in ids:
+            motivo = motivo_valores(nuevas['latencia'][e], nuevas['costo'][e], nuevas['ancho_banda'][e])
+            if motivo:
+                raise ValueError(f"Conexión inválida: {motivo}")
+        
+        def actualizar(compacto):
+            arreglos = {nombre: getattr(compacto, nombre) for nombre in ARREGLOS_SNAPSHOT}
+            arreglos.update(nuevas)
+            return GrafoCompacto.desde_arreglos(compacto.nombres, arreglos)
+        
+        reparados = self._cambiar_conexiones(ciudad_a, ciudad_b, actualizar)
+        self._informar_cambio(f"Conexión {ciudad_a} - {ciudad_b} actualizada", reparados)
+    
+    def registrar_criterio(self, nombre, latencia=0, costo=0, ancho_banda=0):
+        """
+        Registra un criterio personalizado con sus propios coeficientes
+        peso = latencia * c_lat + costo * c_costo + max(1000 - ancho_banda, 0) * c_ancho
+        Si el nombre ya existía se descartan sus pesos, jerarquía, árboles y tablas (también las
+        cargadas desde un snapshot, que dejan de guardarse en el próximo snapshot)
+        """
+        if nombre == CRITERIO_MAS_ANCHO:
+            raise ValueError(f"El criterio {nombre} es el camino más ancho y no se puede redefinir")
+        coeficientes = {}
+        for metrica, valor in (('latencia', latencia), ('costo', costo), ('ancho_banda', ancho_banda)):
+            if valor:
+                coeficientes[metrica] = valor
+        if not coeficientes:
+            raise ValueError("El criterio necesita al menos un coeficiente distinto de cero")
+        self.criterios[nombre] = coeficientes
+        self._pesos.pop(nombre, None)
+        self.jerarquias.pop(nombre, None)
+        self.tablas.pop(nombre, None)
+        for clave in [clave for clave in self._arboles if clave[1] == nombre]:
+            del self._arboles[clave]
+    
+    def es_aditivo(self, criterio):
+        """True si el criterio existe y es una suma de pesos (admite tablas, jerarquías, k rutas y tráfico)"""
+        return self.criterios.get(criterio) is not None
+    
+    def pesos_criterio(self, criterio='latencia'):
+        """Vector NumPy con el peso de cada conexión para el criterio (se calcula una vez por versión)"""
+        return self._pesos_materializados(criterio)[0]
+    
+    def _pesos_materializados(self, criterio):
+        """
+        Devuelve (pesos por conexión, pesos por arco como lista) para el criterio
+        El criterio ancho_banda no es una suma de pesos: lanza ValueError
+        """
+        if criterio not in self.criterios:
+            criterio = 'latencia'  # default
+        if self.criterios[criterio] is None:
+            raise ValueError(f"El criterio {criterio} no es aditivo: se resuelve con el camino más ancho "
+                             f"(ruta_mas_ancha) y no admite tablas, jerarquías, rutas alternativas ni tráfico")
+        if criterio not in self._pesos:
+            compacto = self.compacto
+            coeficientes = self.criterios[criterio]
+            pesos = np.zeros(compacto.num_conexiones, dtype=np.float64)
+            # mismo orden de operaciones que la fórmula escalar para obtener los mismos valores
+            if 'latencia' in coeficientes:
+                pesos = pesos + compacto.latencia * coeficientes['latencia']
+            if 'costo' in coeficientes:
+                pesos = pesos + compacto.costo * coeficientes['costo']
+            if 'ancho_banda' in coeficientes:
+                pesos = pesos + np.maximum(1000 - compacto.ancho_banda, 0) * coeficientes['ancho_banda']
+            self._pesos[criterio] = (pesos, pesos[compacto.arista].tolist())
+        return self._pesos[criterio]
     
     def _contar_conexiones(self):
         """Cuenta el total de conexiones únicas"""
-        total = 0
-        for ciudad in self.grafo:
-            total += len(self.grafo[ciudad])
-        return total // 2  # dividir por 2 porque son bidireccionales
+        if self.compacto is None:
+            return 0
+        return self.compacto.num_conexiones
+    
+    def conexiones_de(self, ciudad):
+        """Número de conexiones de una ciudad"""
+        compacto = self.compacto
+        u = compacto.indice[ciudad]
+        return int(compacto.offsets[u + 1] - compacto.offsets[u])
     
+    def _datos_geograficos(self):
+        """
+        Latitud/longitud en radianes por id y cota de latencia por km efectiva
+        Devuelve None si falta alguna ciudad (la heurística dejaría de ser admisible)
+        """
+        if self._geo is None or self._geo[0] != self.version:
+            compacto = self.compacto
+            datos = None
+            if compacto is not None and all(ciudad in self.coordenadas for ciudad in compacto.nombres):
+                grados = np.array([self.coordenadas[ciudad] for ciudad in compacto.nombres],
+                                  dtype=np.float64).reshape(-1, 2)
+                latitudes, longitudes = np.radians(grados[:, 0]), np.radians(grados[:, 1])
+                
+                # la cota solo es válida si ninguna conexión es "más rápida que la luz":
+                # se reduce al menor cociente latencia/distancia observado en la red
+                piso = self.latencia_por_km
+                km = _distancia_km(latitudes[compacto.extremo_a], longitudes[compacto.extremo_a],
+                                   latitudes[compacto.extremo_b], longitudes[compacto.extremo_b])
+                con_distancia = km > 0
+                if con_distancia.any():
+                    cociente = float((compacto.latencia[con_distancia] / km[con_distancia]).min())
+                    if cociente < piso:
+                        print(f"⚠️  Latencia por km reducida de {piso} a {cociente:.6f} ms/km para mantener A* óptimo")
+                        piso = cociente
+                # pequeño margen para que el redondeo no sobreestime
+                datos = (latitudes, longitudes, max(piso, 0.0) * (1 - 1e-9))
+            self._geo = (self.version, datos)
+        return self._geo[1]
+    
+    def _heuristica(self, destino):
+        """Cota inferior de latencia desde cada ciudad hasta destino (id), o None sin coordenadas"""
+        datos = self._datos_geograficos()
+        if datos is None or datos[2] <= 0:
+            return None
+        latitudes, longitudes, piso = datos
+        km = _distancia_km(latitudes, longitudes, latitudes[destino], longitudes[destino])
+        return (km * piso).tolist()
+    
+    def configurar_cache(self, tamano):
+        """Cambia la cantidad máxima de árboles guardados (0 desactiva la caché)"""
+        self.tamano_cache = max(0, int(tamano))
+        while len(self._arboles) > self.tamano_cache:
+            self._arboles.popitem(last=False)
+    
+    def limpiar_cache(self):
+        """Vacía la caché de árboles y reinicia los contadores"""
+        self._arboles.clear()
+        self.aciertos_cache = 0
+        self.fallos_cache = 0
+    
+    def estadisticas_cache(self):
+        """Aciertos, fallos y ocupación de la caché de árboles"""
+        consultas = self.aciertos_cache + self.fallos_cache
+        return {
+            'aciertos': self.aciertos_cache,
+            'fallos': self.fallos_cache,
+            'tasa_aciertos': self.aciertos_cache / consultas if consultas else 0.0,
+            'entradas': len(self._arboles),
+            'tamano': self.tamano_cache
+        }
+    
+    def _arbol_en_cache(self, fuente, criterio):
+        """Árbol (distancias, predecesores) guardado para el origen y criterio, o None"""
+        clave = (fuente, criterio, self.version)
+        arbol = self._arboles.get(clave)
+        if arbol is not None:
+            self._arboles.move_to_end(clave)
+        return arbol
+    
+    def _arbol_ids(self, fuente, criterio='latencia'):
+        """Árbol completo de caminos mínimos desde fuente, usando la caché LRU"""
+        arbol = self._arbol_en_cache(fuente, criterio)
+        if arbol is not None:
+            self.aciertos_cache += 1
+            instrumentacion.contar(aciertos_cache=1)
+            return arbol
+        
+        self.fallos_cache += 1
+        instrumentacion.contar(fallos_cache=1)
+        arbol = self._dijkstra_ids(fuente, criterio)
+        if self.tamano_cache > 0:
+            self._arboles[(fuente, criterio, self.version)] = arbol
+            if len(self._arboles) > self.tamano_cache:
+                self._arboles.popitem(last=False)  # descartar el menos usado
+        return arbol
+    
+    @instrumentacion.instrumentado()
     def dijkstra_optimizado(self, origen, criterio='latencia'):
         """
         Ejecuta Dijkstra optimizado para el criterio seleccionado
-        Criterios: 'latencia', 'costo', 'ancho_banda', 'compuesto'
+        Criterios: 'latencia', 'costo', 'ancho_banda', 'compuesto' o uno registrado
+        con registrar_criterio (los pesos se precalculan una vez por versión del grafo)
+        Los árboles calculados se guardan en una caché LRU por (origen, criterio, versión)
+        Con 'ancho_banda' el árbol es de caminos más anchos y las "distancias" son el ancho
+        de banda limitante desde el origen (infinito en el origen, 0 si no hay conexión)
         """
-        # inicializar distancias
-        distancias = {}
-        anteriores = {}
-        
-        for ciudad in self.grafo:
-            distancias[ciudad] = float('inf')
-        distancias[origen] = 0
+        compacto = self.compacto
+        fuente = compacto.indice[origen]
+        if criterio == CRITERIO_MAS_ANCHO:
+            dist, previo = self._arbol_mas_ancho(fuente)
+        else:
+            dist, previo = self._arbol_ids(fuente, criterio)
         
-        # cola de prioridad
-        cola = [(0, origen)]
+        # traducir ids internos a nombres de ciudades
+        nombres = compacto.nombres
+        distancias = dict(zip(nombres, dist))
+        anteriores = {nombres[v]: nombres[p] for v, p in enumerate(previo) if p >= 0}
+        return distancias, anteriores
+    
+    def _arbol_mas_ancho(self, fuente):
+        """Árbol de caminos más anchos desde fuente: listas (ancho limitante, predecesor) por id"""
+        offsets, destinos, _ = self.compacto.listas()
+        return camino_mas_ancho(offsets, destinos, self._capacidades(), fuente)
+    
+    def _dijkstra_ids(self, fuente, criterio='latencia', destino=None, estadisticas=None):
+        """
+        Dijkstra sobre el grafo compacto; devuelve listas de distancias y predecesores por id
+        Si se indica destino (id), termina apenas ese nodo queda asentado
+        estadisticas (dict opcional) recibe los contadores de la búsqueda (ver dijkstra_csr);
+        con la instrumentación activa se suman además a la operación en curso
+        """
+        offsets, destinos, _ = self.compacto.listas()
+        pesos = self._pesos_materializados(criterio)[1]
+        if estadisticas is None and instrumentacion.activa():
+            estadisticas = {}
+            arbol = dijkstra_csr(offsets, destinos, pesos, fuente, destino, estadisticas)
+            instrumentacion.contar(estadisticas)
+            return arbol
+        return dijkstra_csr(offsets, destinos, pesos, fuente, destino, estadisticas)
+    
+    def _a_estrella_ids(self, fuente, destino, heuristica, criterio='latencia', estadisticas=None):
+        """
+        A* punto a punto: Dijkstra ordenado por distancia + cota inferior geográfica
+        La heurística es admisible, así que la ruta sigue siendo óptima
+        """
+        compacto = self.compacto
+        offsets, destinos, _ = compacto.listas()
+        pesos = self._pesos_materializados(criterio)[1]
         
-        print(f"🔍 Calculando rutas óptimas desde {origen} (criterio: {criterio})...")
+        infinito = float('inf')
+        dist = [infinito] * compacto.num_ciudades
+        previo = [-1] * compacto.num_ciudades
+        dist[fuente] = 0
+        expandidos = obsoletos = aristas = 0
+        cola = [(heuristica[fuente], fuente)]
         
         while cola:
-            distancia_actual, ciudad_actual = heapq.heappop(cola)
+            estimado, u = heapq.heappop(cola)
             
-            # si ya procesamos esta ciudad con mejor distancia, continuar
-            if distancia_actual > distancias[ciudad_actual]:
+            # entrada obsoleta: la ciudad ya se alcanzó con menor distancia
+            if estimado > dist[u] + heuristica[u]:
+                obsoletos += 1
                 continue
+            expandidos += 1
+            if u == destino:
+                break
             
-            # revisar todas las conexiones de esta ciudad
-            for conexion in self.grafo[ciudad_actual]:
-                ciudad_vecina = conexion['destino']
-                
-                # calcular peso según el criterio
-                if criterio == 'latencia':
-                    peso = conexion['latencia']
-                elif criterio == 'costo':
-                    peso = conexion['costo'] * 100  # multiplicar para evitar números muy pequeños
-                elif criterio == 'ancho_banda':
-                    peso = 1000 - conexion['ancho_banda']  # invertir (mayor ancho = menor peso)
-                elif criterio == 'compuesto':
-                    # fórmula compuesta (puedes ajustar los factores)
-                    peso = (conexion['latencia'] * 0.5 + 
-                           conexion['costo'] * 50 + 
-                           (1000 - conexion['ancho_banda']) * 0.3)
-                else:
-                    peso = conexion['latencia']  # default
-                
-                nueva_distancia = distancia_actual + peso
-                
-                # si encontramos mejor camino, actualizar
-                if nueva_distancia < distancias[ciudad_vecina]:
-                    distancias[ciudad_vecina] = nueva_distancia
-                    anteriores[ciudad_vecina] = ciudad_actual
-                    heapq.heappush(cola, (nueva_distancia, ciudad_vecina))
+            inicio, fin = offsets[u], offsets[u + 1]
+            aristas += fin - inicio
+            for i in range(inicio, fin):
+                v = destinos[i]
+                nueva_distancia = dist[u] + pesos[i]
+                if nueva_distancia < dist[v]:
+                    dist[v] = nueva_distancia
+                    previo[v] = u
+                    heapq.heappush(cola, (nueva_distancia + heuristica[v], v))
         
-        return distancias, anteriores
+        if estadisticas is not None:
+            registrar_busqueda(estadisticas, expandidos, obsoletos, aristas, len(cola))
+        return dist, previo
+    
+    @instrumentacion.instrumentado()
+    def ruta_optima(self, origen, destino, criterio='latencia', bidireccional=False):
+        """
+        Ruta óptima entre dos ciudades sin calcular el árbol completo
+        Devuelve (ruta, distancia); ruta es None si no hay conexión.
+        bidireccional=True busca desde ambos extremos a la vez; la distancia es la misma,
+        pero ante empates de costo puede elegir otra ruta equivalente.
+        Con coordenadas cargadas, el criterio 'latencia' usa A* geográfico.
+        Si hay una jerarquía de contracción del criterio (preparar_jerarquias) se usa esa
+        (misma distancia; ante empates también puede elegir otra ruta equivalente).
+        Si el árbol del origen está en caché se reutiliza sin buscar.
+        Con 'ancho_banda' devuelve la ruta de ruta_mas_ancha y su ancho limitante (0.0 sin conexión).
+        Los nodos expandidos quedan en self.ultima_busqueda.
+        """
+        if criterio == CRITERIO_MAS_ANCHO:
+            return self.ruta_mas_ancha(origen, destino)
+        compacto = self.compacto
+        s = compacto.indice[origen]
+        t = compacto.indice[destino]
+        
+        # si el árbol de este origen ya está en caché, la ruta sale en O(longitud de la ruta)
+        arbol = self._arbol_en_cache(s, criterio)
+        if arbol is not None:
+            self.aciertos_cache += 1
+            instrumentacion.contar(aciertos_cache=1)
+            self.ultima_busqueda = {'algoritmo': 'cache', 'expandidos': 0}
+            dist, previo = arbol
+            if dist[t] == float('inf'):
+                return None, float('inf')
+            return [compacto.nombres[v] for v in camino_desde_previo(previo, t)], dist[t]
+        
+        estadisticas = {}
+        heuristica = None
+        if criterio in self.jerarquias:
+            estadisticas['algoritmo'] = 'jerarquia_contraccion'
+            distancia, camino = self.jerarquias[criterio].consultar(s, t, estadisticas)
+        elif bidireccional:
+            estadisticas['algoritmo'] = 'dijkstra_bidireccional'
+            camino, distancia = self._dijkstra_bidireccional(s, t, criterio, estadisticas)
+        else:
+            if criterio == 'latencia':
+                heuristica = self._heuristica(t)
+            if heuristica is not None:
+                estadisticas['algoritmo'] = 'a_estrella'
+                dist, previo = self._a_estrella_ids(s, t, heuristica, criterio, estadisticas)
+            else:
+                estadisticas['algoritmo'] = 'dijkstra'
+                dist, previo = self._dijkstra_ids(s, criterio, destino=t, estadisticas=estadisticas)
+            distancia = dist[t]
+            camino = camino_desde_previo(previo, t) if distancia != float('inf') else None
+        self.ultima_busqueda = estadisticas
+        instrumentacion.contar(estadisticas, **{f"algoritmo_{estadisticas['algoritmo']}": 1})
+        
+        if camino is None:
+            return None, float('inf')
+        return [compacto.nombres[v] for v in camino], distancia
+    
+    def _dijkstra_bidireccional(self, s, t, criterio='latencia', estadisticas=None):
+        """
+        Dijkstra bidireccional: avanza desde s y desde t (la red es no dirigida)
+        y se detiene cuando ningún camino por explorar puede mejorar el mejor encontrado
+        """
+        if s == t:
+            if estadisticas is not None:
+                estadisticas['expandidos'] = 0
+            return [s], 0
+        
+        compacto = self.compacto
+        offsets, destinos, _ = compacto.listas()
+        pesos = self._pesos_materializados(criterio)[1]
+        infinito = float('inf')
+        
+        # índice 0 = búsqueda hacia adelante (desde s), 1 = hacia atrás (desde t)
+        dist = ({s: 0}, {t: 0})
+        previo = ({s: -1}, {t: -1})
+        asentados = (set(), set())
+        colas = ([(0, s)], [(0, t)])
+        mejor = infinito
+        encuentro = -1
+        
+        while colas[0] and colas[1]:
+            # condición de parada: los dos frentes ya no pueden mejorar el mejor camino
+            if colas[0][0][0] + colas[1][0][0] >= mejor:
+                break
+            
+            # expandir el frente con la cola más pequeña
+            lado = 0 if len(colas[0]) <= len(colas[1]) else 1
+            distancia_actual, u = heapq.heappop(colas[lado])
+            if u in asentados[lado]:
+                continue
+            asentados[lado].add(u)
+            
+            dist_lado, previo_lado = dist[lado], previo[lado]
+            dist_otro = dist[1 - lado]
+            for i in range(offsets[u], offsets[u + 1]):
+                v = destinos[i]
+                nueva_distancia = distancia_actual + pesos[i]
+                if nueva_distancia < dist_lado.get(v, infinito):
+                    dist_lado[v] = nueva_distancia
+                    previo_lado[v] = u
+                    heapq.heappush(colas[lado], (nueva_distancia, v))
+                    # ¿v ya fue alcanzado por el otro frente?
+                    if v in dist_otro and nueva_distancia + dist_otro[v] < mejor:
+                        mejor = nueva_distancia + dist_otro[v]
+                        encuentro = v
+        
+        if estadisticas is not None:
+            estadisticas['expandidos'] = len(asentados[0]) + len(asentados[1])
+        if encuentro < 0:
+            return None, infinito
+        
+        # unir ambas mitades: s -> encuentro (adelante) y encuentro -> t (atrás)
+        camino = [encuentro]
+        while previo[0][camino[-1]] >= 0:
+            camino.append(previo[0][camino[-1]])
+        camino.reverse()
+        v = encuentro
+        while previo[1][v] >= 0:
+            v = previo[1][v]
+            camino.append(v)
+        return camino, mejor
+    
+    @instrumentacion.instrumentado()
+    def k_rutas_optimas(self, origen, destino, k=3, criterio='latencia', disjuntas=None):
+        """
+        Las k mejores rutas sin ciclos entre dos ciudades (algoritmo de Yen), en orden de distancia
+        disjuntas: None (rutas libres), 'enlaces' (sin tramos compartidos) o 'ciudades'
+        (sin ciudades intermedias compartidas); en esos modos cada ruta es la mejor que
+        respeta las anteriores. Las búsquedas de desvío reutilizan el árbol de caminos
+        mínimos del destino (de la caché LRU). Devuelve una lista de (ruta, distancia)
+        El criterio 'ancho_banda' no es aditivo y lanza ValueError
+        """
+        if disjuntas is not None and disjuntas not in MODOS_DISJUNTOS:
+            raise ValueError(f"Modo de rutas disjuntas desconocido: {disjuntas}")
+        pesos = self._pesos_materializados(criterio)[1]
+        compacto = self.compacto
+        s = compacto.indice[origen]
+        t = compacto.indice[destino]
+        if k <= 0:
+            return []
+        if s == t:
+            return [([origen], 0)]
+        
+        offsets, destinos, _ = compacto.listas()
+        # la red es no dirigida: el árbol con raíz en el destino da la distancia de cada ciudad al destino
+        distancia_destino, previo_destino = self._arbol_ids(t, criterio)
+        if disjuntas is None:
+            caminos = k_caminos_mas_cortos(offsets, destinos, pesos, s, t, k,
+                                           distancia_destino, previo_destino)
+        else:
+            caminos = caminos_disjuntos(offsets, destinos, pesos, s, t, k,
+                                        distancia_destino, previo_destino, disjuntas)
+        return [([compacto.nombres[v] for v in camino], costo) for camino, costo in caminos]
+    
+    def _metricas_arcos(self):
+        """
+        Latencia, costo y ancho de banda de cada arco como listas (una vez por versión)
+        Entre dos ciudades con conexiones paralelas se usan las mismas métricas que
+        obtener_metricas_ruta (el ancho de banda de la más ancha), así los resultados coinciden
+        """
+        if self._metricas_arco is None:
+            compacto = self.compacto
+            colas = np.repeat(np.arange(compacto.num_ciudades), compacto.grados())
+            aristas = compacto.aristas_entre(colas, compacto.destinos)
+            self._metricas_arco = (compacto.latencia[aristas].tolist(), compacto.costo[aristas].tolist(),
+                                   compacto.ancho_banda_par()[aristas].tolist())
+        return self._metricas_arco
+    
+    def _capacidades(self):
+        """Ancho de banda de cada arco como lista (para el camino más ancho)"""
+        return self._metricas_arcos()[2]
+    
+    @instrumentacion.instrumentado()
+    def rutas_pareto(self, origen, destino, epsilon=0.0):
+        """
+        Frontera de Pareto de rutas entre dos ciudades: ninguna es peor que otra
+        en latencia, costo y ancho de banda limitante a la vez
+        epsilon > 0 descarta rutas que no mejoran a otra en más de un factor (1 + epsilon),
+        para acotar el tamaño de la frontera en redes grandes
+        Devuelve una lista de (ruta, métricas de obtener_metricas_ruta) ordenada por latencia
+        """
+        compacto = self.compacto
+        s = compacto.indice[origen]
+        t = compacto.indice[destino]
+        if s == t:
+            return [([origen], None)]
+        offsets, destinos, _ = compacto.listas()
+        latencia, costo, ancho_banda = self._metricas_arcos()
+        # cotas exactas de cada métrica hasta el destino (la red es no dirigida)
+        cotas = (dijkstra_csr(offsets, destinos, latencia, t)[0],
+                 dijkstra_csr(offsets, destinos, costo, t)[0],
+                 camino_mas_ancho(offsets, destinos, ancho_banda, t)[0])
+        frontera = frontera_pareto(offsets, destinos, latencia, costo, ancho_banda, s, t, epsilon, cotas)
+        
+        rutas = []
+        for camino, _ in frontera:
+            ruta = [compacto.nombres[v] for v in camino]
+            rutas.append((ruta, self.obtener_metricas_ruta(ruta)))
+        return rutas
+    
+    @instrumentacion.instrumentado()
+    def ruta_mas_ancha(self, origen, destino):
+        """
+        Ruta de máximo ancho de banda limitante (camino más ancho) entre dos ciudades
+        Entre las rutas con el mismo cuello de botella elige la de menos saltos.
+        Devuelve (ruta, ancho limitante); ruta es None si no hay conexión.
+        El ancho coincide con 'ancho_banda_limitante' de obtener_metricas_ruta(ruta)
+        """
+        compacto = self.compacto
+        s = compacto.indice[origen]
+        t = compacto.indice[destino]
+        offsets, destinos, _ = compacto.listas()
+        capacidad = self._capacidades()
+        
+        estadisticas = {'algoritmo': 'camino_mas_ancho'}
+        ancho, _ = camino_mas_ancho(offsets, destinos, capacidad, s, t, estadisticas)
+        self.ultima_busqueda = estadisticas
+        if ancho[t] == 0:
+            return None, 0.0
+        
+        # segunda pasada: menos saltos usando solo enlaces tan anchos como el cuello de botella
+        camino = camino_min_saltos(offsets, destinos, capacidad, s, t, ancho[t])
+        return [compacto.nombres[v] for v in camino], ancho[t]
+    
+    def anchos_desde_origen(self, origen):
+        """Máximo ancho de banda limitante desde origen a cada ciudad (0 si no hay conexión)"""
+        compacto = self.compacto
+        offsets, destinos, _ = compacto.listas()
+        ancho, _ = camino_mas_ancho(offsets, destinos, self._capacidades(), compacto.indice[origen])
+        return dict(zip(compacto.nombres, ancho))
+    
+    def tabla_cuellos_botella(self):
+        """
+        Tabla de cuellos de botella todos-contra-todos (árbol de expansión máximo)
+        Se construye una vez por versión del grafo en tiempo casi lineal
+        """
+        if self._cuellos is None:
+            compacto = self.compacto
+            # una conexión por par de ciudades, con el ancho de la más ancha (como obtener_metricas_ruta)
+            colas = np.repeat(np.arange(compacto.num_ciudades), compacto.grados())
+            ida = colas < compacto.destinos
+            aristas = compacto.aristas_entre(colas[ida], compacto.destinos[ida])
+            self._cuellos = TablaCuelloBotella(compacto.num_ciudades, colas[ida], compacto.destinos[ida],
+                                               compacto.ancho_banda_par()[aristas])
+        return self._cuellos
+    
+    def ancho_maximo_entre(self, origen, destino):
+        """Máximo ancho de banda limitante entre dos ciudades según la tabla de cuellos de botella"""
+        compacto = self.compacto
+        return self.tabla_cuellos_botella().ancho(compacto.indice[origen], compacto.indice[destino])
+    
+    def _red_flujo(self):
+        """Listas CSR, arco gemelo y capacidad de cada arco (las conexiones paralelas suman)"""
+        compacto = self.compacto
+        offsets, destinos, _ = compacto.listas()
+        gemelo = arcos_gemelos(compacto.arista).tolist()
+        capacidad = compacto.ancho_banda[compacto.arista].tolist()
+        return offsets, destinos, gemelo, capacidad
+    
+    @instrumentacion.instrumentado()
+    def corte_minimo(self, origen, destino):
+        """
+        Flujo máximo entre dos ciudades usando todas las rutas a la vez y su corte mínimo
+        El corte son las conexiones que, si caen juntas, separan las dos ciudades con el menor
+        ancho de banda total posible (igual al flujo máximo). Devuelve un diccionario con
+        'flujo' (Mbps), 'corte' como (ciudad del lado del origen, ciudad del otro lado, ancho de banda)
+        y 'lado_origen' (ciudades que quedan con el origen)
+        """
+        compacto = self.compacto
+        s = compacto.indice[origen]
+        t = compacto.indice[destino]
+        if s == t:
+            raise ValueError("El origen y el destino deben ser distintos")
+        valor, lado = flujo_maximo(*self._red_flujo(), s, t)
+        
+        lado = np.array(lado)
+        cruzan = np.flatnonzero(lado[compacto.extremo_a] != lado[compacto.extremo_b])
+        corte = []
+        for a, b, ancho in zip(compacto.extremo_a[cruzan].tolist(), compacto.extremo_b[cruzan].tolist(),
+                               compacto.ancho_banda[cruzan].tolist()):
+            if not lado[a]:
+                a, b = b, a
+            corte.append((compacto.nombres[a], compacto.nombres[b], ancho))
+        corte.sort(key=lambda conexion: (-conexion[2], conexion[0], conexion[1]))
+        return {
+            'origen': origen,
+            'destino': destino,
+            'flujo': valor,
+            'corte': corte,
+            'lado_origen': [compacto.nombres[v] for v in np.flatnonzero(lado).tolist()],
+        }
+    
+    @instrumentacion.instrumentado()
+    def arbol_cortes_minimos(self):
+        """
+        Árbol de Gomory–Hu: los cortes mínimos de todos los pares resumidos en n - 1 tramos
+        (n - 1 flujos máximos en total); se construye una vez por versión del grafo
+        Devuelve (padre, valor, tabla) con ids internos: la ciudad i > 0 cuelga de padre[i]
+        con un tramo de valor[i] Mbps y tabla.ancho(u, v) es el flujo máximo entre u y v
+        """
+        if self._cortes is None:
+            padre, valor = arbol_gomory_hu(*self._red_flujo())
+            n = len(padre)
+            # el corte mínimo es el menor tramo del camino en el árbol: la misma consulta
+            # que el cuello de botella, y sobre un árbol Kruskal lo conserva completo
+            tabla = TablaCuelloBotella(n, np.arange(1, n), padre[1:], valor[1:])
+            self._cortes = (padre, valor, tabla)
+        return self._cortes
+    
+    def flujo_maximo_entre(self, origen, destino):
+        """Flujo máximo (Mbps) entre dos ciudades según el árbol de cortes mínimos"""
+        compacto = self.compacto
+        return self.arbol_cortes_minimos()[2].ancho(compacto.indice[origen], compacto.indice[destino])
+    
+    @instrumentacion.instrumentado()
+    def cargar_red_con_snapshot(self, archivo, archivo_coordenadas=None, latencia_por_km=None,
+                                carpeta=None, politica_duplicados='conservar'):
+        """
+        Carga la red usando un snapshot binario si el CSV no cambió desde que se creó;
+        si no existe o está desactualizado, lee el CSV y deja un snapshot nuevo
+        carpeta: ubicación del snapshot (por defecto <archivo>.snapshot junto al CSV)
+        Devuelve False si la red no se pudo cargar
+        """
+        carpeta = carpeta or carpeta_snapshot(archivo)
+        try:
+            huella = hash_archivo(archivo)
+        except FileNotFoundError:
+            huella = None  # cargar_red_desde_archivo informa el error
+        
+        if huella is None or not self.cargar_snapshot(carpeta, huella, politica_duplicados):
+            if not self.cargar_red_desde_archivo(archivo, politica_duplicados=politica_duplicados):
+                return False
+            try:
+                self.guardar_snapshot(carpeta, huella)
+            except OSError as e:
+                print(f"⚠️  No se pudo guardar el snapshot: {e}")
+        
+        if archivo_coordenadas:
+            self.cargar_coordenadas(archivo_coordenadas, latencia_por_km)
+        return True
+    
+    def guardar_snapshot(self, carpeta, hash_origen=None):
+        """
+        Guarda el grafo compilado, el índice de ciudades, las tablas y jerarquías calculadas como
+        arreglos .npy (se pueden mapear en memoria) más un meta.json con el hash del CSV
+        """
+        compacto = self.compacto
+        temporal = carpeta + ".tmp"
+        shutil.rmtree(temporal, ignore_errors=True)
+        os.makedirs(temporal)
+        
+        for nombre in ARREGLOS_SNAPSHOT:
+            np.save(os.path.join(temporal, f"{nombre}.npy"), getattr(compacto, nombre))
+        for criterio, tabla in self.tablas.items():
+            np.save(os.path.join(temporal, f"distancias_{criterio}.npy"), tabla['distancias'])
+            np.save(os.path.join(temporal, f"siguiente_{criterio}.npy"), tabla['siguiente'])
+        for criterio, jerarquia in self.jerarquias.items():
+            for nombre, arreglo in jerarquia.arreglos().items():
+                np.save(os.path.join(temporal, f"jerarquia_{criterio}_{nombre}.npy"), arreglo)
+        with open(os.path.join(temporal, "ciudades.txt"), "w", encoding='utf-8') as archivo:
+            archivo.write("\n".join(self.ciudades))
+        with open(os.path.join(temporal, "meta.json"), "w", encoding='utf-8') as archivo:
+            json.dump({
+                'formato': FORMATO_SNAPSHOT,
+                'hash_csv': hash_origen,
+                'politica_duplicados': self.politica_duplicados,
+                'ciudades': compacto.num_ciudades,
+                'conexiones': compacto.num_conexiones,
+                'tablas': list(self.tablas),
+                'jerarquias': list(self.jerarquias)
+            }, archivo, indent=2)
+        
+        # reemplazar el snapshot anterior solo cuando el nuevo está completo
+        shutil.rmtree(carpeta, ignore_errors=True)
+        os.replace(temporal, carpeta)
+        print(f"💾 Snapshot guardado en: {carpeta}")
+    
+    @instrumentacion.instrumentado()
+    def cargar_snapshot(self, carpeta, hash_origen=None, politica_duplicados=None):
+        """
+        Mapea en memoria un snapshot creado con guardar_snapshot
+        Devuelve False si no existe, es de otro formato o no coincide con el hash del CSV
+        (o con la política de duplicados pedida)
+        """
+        try:
+            with open(os.path.join(carpeta, "meta.json"), encoding='utf-8') as archivo:
+                meta = json.load(archivo)
+        except (OSError, ValueError):
+            return False
+        if meta.get('formato') != FORMATO_SNAPSHOT:
+            return False
+        if hash_origen is not None and meta.get('hash_csv') != hash_origen:
+            print("🔄 El CSV cambió desde el último snapshot; se volverá a leer")
+            return False
+        if politica_duplicados is not None and meta.get('politica_duplicados') != politica_duplicados:
+            print("🔄 El snapshot usa otra política de duplicados; se volverá a leer")
+            return False
+        
+        print("⚡ Cargando snapshot binario:", carpeta)
+        try:
+            # copy-on-write: se lee del disco bajo demanda y los cambios quedan solo en memoria
+            arreglos = {nombre: np.load(os.path.join(carpeta, f"{nombre}.npy"), mmap_mode='c')
+                        for nombre in ARREGLOS_SNAPSHOT}
+            with open(os.path.join(carpeta, "ciudades.txt"), encoding='utf-8') as archivo:
+                contenido = archivo.read()
+            tablas = {}
+            for criterio in meta.get('tablas', []):
+                tablas[criterio] = {
+                    'distancias': np.load(os.path.join(carpeta, f"distancias_{criterio}.npy"), mmap_mode='c'),
+                    'siguiente': np.load(os.path.join(carpeta, f"siguiente_{criterio}.npy"), mmap_mode='c')
+                }
+            jerarquias = {}
+            for criterio in meta.get('jerarquias', []):
+                jerarquias[criterio] = JerarquiaContraccion({
+                    nombre: np.load(os.path.join(carpeta, f"jerarquia_{criterio}_{nombre}.npy"), mmap_mode='c')
+                    for nombre in ARREGLOS_JERARQUIA})
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Snapshot dañado ({e}); se volverá a leer el CSV")
+            return False
+        
+        nombres = contenido.split("\n") if contenido else []
+        self.compacto = GrafoCompacto.desde_arreglos(nombres, arreglos)
+        self.politica_duplicados = meta.get('politica_duplicados', 'conservar')
+        self.ciudades = self.compacto.nombres
+        self._grafo_modificado()
+        self.tablas = tablas
+        self.jerarquias = jerarquias
+        print(f"✅ Red cargada: {len(self.ciudades)} ciudades, {self._contar_conexiones()} conexiones")
+        return True
+    
+    @instrumentacion.instrumentado()
+    def calcular_tablas(self, criterios=('latencia',), procesos=None):
+        """
+        Calcula las tablas de rutas todos-contra-todos para uno o más criterios
+        Usa un pool de procesos con el grafo en memoria compartida (procesos=None usa todos los núcleos)
+        Resultado en self.tablas[criterio]: 'distancias' (float64) y 'siguiente' (int32, -1 sin salto),
+        donde siguiente[s, t] es la ciudad a la que s envía el tráfico hacia t
+        El criterio 'ancho_banda' no es aditivo y lanza ValueError
+        """
+        from tablas_rutas import calcular_tablas
+        
+        compacto = self.compacto
+        criterios = list(criterios)
+        pesos = np.vstack([self.pesos_criterio(criterio)[compacto.arista] for criterio in criterios])
+        print(f"🧮 Calculando tablas todos-contra-todos ({', '.join(criterios)}) "
+              f"para {compacto.num_ciudades} ciudades...")
+        
+        distancias, predecesores = calcular_tablas(compacto.offsets, compacto.destinos, pesos, procesos)
+        
+        # la fila t es el árbol con raíz t: el predecesor de s en ese árbol es su siguiente salto hacia t
+        for k, criterio in enumerate(criterios):
+            self.tablas[criterio] = {
+                'distancias': distancias[k],
+                'siguiente': predecesores[k].T
+            }
+        print(f"✅ Tablas calculadas ({distancias.nbytes + predecesores.nbytes:,} bytes)")
+        return self.tablas
+    
+    def guardar_tablas(self, archivo):
+        """Guarda las tablas calculadas en un archivo .npz junto con el índice de ciudades"""
+        matrices = {}
+        for criterio, tabla in self.tablas.items():
+            matrices[f"distancias_{criterio}"] = tabla['distancias']
+            matrices[f"siguiente_{criterio}"] = tabla['siguiente']
+        np.savez(archivo, ciudades=np.array(self.ciudades), criterios=np.array(list(self.tablas)),
+                 **matrices)
+        print(f"💾 Tablas guardadas en: {archivo}")
+    
+    def cargar_tablas(self, archivo):
+        """Carga tablas guardadas con guardar_tablas (deben corresponder a la red cargada)"""
+        with np.load(archivo) as datos:
+            if datos['ciudades'].tolist() != self.ciudades:
+                print("❌ Las tablas no corresponden a la red cargada")
+                return False
+            for criterio in datos['criterios'].tolist():
+                if criterio in self.criterios and not self.es_aditivo(criterio):
+                    continue  # tablas aditivas de versiones anteriores: ya no corresponden
+                self.tablas[criterio] = {
+                    'distancias': datos[f"distancias_{criterio}"],
+                    'siguiente': datos[f"siguiente_{criterio}"]
+                }
+        print(f"📂 Tablas cargadas desde: {archivo}")
+        return True
+    
+    def ruta_desde_tablas(self, origen, destino, criterio='latencia'):
+        """
+        Ruta siguiendo la tabla de siguiente salto, sin ejecutar Dijkstra
+        Devuelve (ruta, distancia) como ruta_optima; ante empates puede elegir otra ruta equivalente
+        """
+        tabla = self.tablas[criterio]
+        compacto = self.compacto
+        s = compacto.indice[origen]
+        t = compacto.indice[destino]
+        
+        distancia = float(tabla['distancias'][s, t])
+        if distancia == float('inf'):
+            return None, distancia
+        
+        siguiente = tabla['siguiente']
+        camino = [s]
+        while camino[-1] != t:
+            camino.append(int(siguiente[camino[-1], t]))
+        return [compacto.nombres[v] for v in camino], distancia
+    
+    def _simular_fallas(self, grupos, criterio, procesos):
+        """
+        Simula fallas de grupos de conexiones sobre la tabla del criterio (se calcula si falta)
+        El criterio 'ancho_banda' no es aditivo y lanza ValueError
+        """
+        from fallas import barrer_fallas
+        
+        pesos = self._pesos_materializados(criterio)[1]
+        if criterio not in self.tablas:
+            self.calcular_tablas([criterio], procesos)
+        tabla = self.tablas[criterio]
+        compacto = self.compacto
+        resultados = barrer_fallas(compacto.offsets, compacto.destinos, compacto.arista, pesos,
+                                   compacto.extremo_a, compacto.extremo_b, tabla['distancias'],
+                                   np.ascontiguousarray(tabla['siguiente'].T), grupos, procesos)
+        
+        nombres = compacto.nombres
+        for grupo, (origenes, destinos, antes, despues) in resultados:
+            aumento = despues - antes
+            orden = np.argsort(-aumento, kind='stable')  # primero los que más empeoran
+            e = grupo[0]
+            yield {
+                'conexiones': list(grupo),
+                'ciudad_a': nombres[compacto.extremo_a[e]],
+                'ciudad_b': nombres[compacto.extremo_b[e]],
+                'pares_afectados': len(origenes),
+                'pares_desconectados': int(np.isinf(despues).sum()),
+                'aumento_maximo': float(aumento.max()) if len(aumento) else 0.0,
+                'pares': [(nombres[origenes[i]], nombres[destinos[i]], float(antes[i]), float(despues[i]))
+                          for i in orden.tolist()]
+            }
+    
+    def barrido_fallas(self, criterio='latencia', procesos=None):
+        """
+        Análisis "¿qué pasa si cae?" de cada conexión por separado, en paralelo
+        Devuelve un generador con un dict por conexión: sus ciudades, los pares que
+        empeoran como (origen, destino, antes, después) de mayor a menor aumento,
+        cuántos quedan desconectados y el mayor aumento
+        """
+        return self._simular_fallas(None, criterio, procesos)
+    
+    def impacto_falla(self, ciudad_a, ciudad_b, criterio='latencia'):
+        """Pares que empeoran si caen todas las conexiones entre dos ciudades (mismo dict que barrido_fallas)"""
+        ids = self._conexiones_entre(ciudad_a, ciudad_b)
+        if not ids:
+            raise ValueError(f"No hay conexión entre {ciudad_a} y {ciudad_b}")
+        return next(self._simular_fallas([ids], criterio, procesos=1))
+    
+    @instrumentacion.instrumentado()
+    def preparar_jerarquias(self, criterios=('latencia',)):
+        """
+        Preprocesa jerarquías de contracción para uno o más criterios; desde entonces
+        ruta_optima responde ese criterio con una búsqueda bidireccional hacia arriba.
+        Conviene cuando la red cambia poco y se hacen muchas consultas punto a punto
+        El criterio 'ancho_banda' no es aditivo y lanza ValueError
+        """
+        import time
+        
+        compacto = self.compacto
+        offsets, destinos, _ = compacto.listas()
+        for criterio in criterios:
+            pesos = self._pesos_materializados(criterio)[1]
+            print(f"🏗️  Construyendo jerarquía de contracción ({criterio}) "
+                  f"para {compacto.num_ciudades} ciudades...")
+            inicio = time.perf_counter()
+            jerarquia = JerarquiaContraccion(construir_jerarquia(offsets, destinos, pesos))
+            self.jerarquias[criterio] = jerarquia
+            print(f"✅ Jerarquía lista en {time.perf_counter() - inicio:.1f} s "
+                  f"({jerarquia.num_atajos()} atajos)")
+        return self.jerarquias
+    
+    def verificar_jerarquias(self, criterio='latencia', muestras=100, semilla=0):
+        """
+        Compara las rutas de la jerarquía con dijkstra_optimizado en pares al azar
+        Revisa que la distancia coincida y que la ruta desplegada sea un camino real con esa distancia
+        Devuelve un dict con consultas, errores y ejemplos de error
+        """
+        import random
+        from k_rutas import costo_camino
+        
+        compacto = self.compacto
+        jerarquia = self.jerarquias[criterio]
+        offsets, destinos, _ = compacto.listas()
+        pesos = self._pesos_materializados(criterio)[1]
+        generador = random.Random(semilla)
+        
+        resultado = {'consultas': 0, 'errores': 0, 'ejemplos_error': []}
+        origenes = generador.sample(range(compacto.num_ciudades), min(muestras, compacto.num_ciudades))
+        for s in origenes:
+            distancias, _ = self.dijkstra_optimizado(compacto.nombres[s], criterio)
+            t = generador.randrange(compacto.num_ciudades)
+            esperada = distancias[compacto.nombres[t]]
+            distancia, camino = jerarquia.consultar(s, t)
+            
+            correcta = np.isclose(distancia, esperada, rtol=1e-9, atol=1e-9) or distancia == esperada
+            if correcta and camino is not None:
+                tramos_validos = all(v in destinos[offsets[u]:offsets[u + 1]] for u, v in zip(camino, camino[1:]))
+                correcta = (tramos_validos and camino[0] == s and camino[-1] == t and
+                            np.isclose(costo_camino(offsets, destinos, pesos, camino), esperada,
+                                       rtol=1e-9, atol=1e-9))
+            resultado['consultas'] += 1
+            if not correcta:
+                resultado['errores'] += 1
+                if len(resultado['ejemplos_error']) < MAX_EJEMPLOS_ERROR:
+                    resultado['ejemplos_error'].append((compacto.nombres[s], compacto.nombres[t],
+                                                        esperada, distancia))
+        estado = "✅" if resultado['errores'] == 0 else "❌"
+        print(f"{estado} Verificación de la jerarquía ({criterio}): "
+              f"{resultado['consultas']} consultas, {resultado['errores']} errores")
+        return resultado
+    
+    def guardar_jerarquias(self, archivo):
+        """Guarda las jerarquías calculadas en un archivo .npz junto con el índice de ciudades"""
+        arreglos = {}
+        for criterio, jerarquia in self.jerarquias.items():
+            for nombre, arreglo in jerarquia.arreglos().items():
+                arreglos[f"{nombre}_{criterio}"] = arreglo
+        np.savez(archivo, ciudades=np.array(self.ciudades), criterios=np.array(list(self.jerarquias)),
+                 **arreglos)
+        print(f"💾 Jerarquías guardadas en: {archivo}")
+    
+    def cargar_jerarquias(self, archivo):
+        """Carga jerarquías guardadas con guardar_jerarquias (deben corresponder a la red cargada)"""
+        with np.load(archivo) as datos:
+            if datos['ciudades'].tolist() != self.ciudades:
+                print("❌ Las jerarquías no corresponden a la red cargada")
+                return False
+            for criterio in datos['criterios'].tolist():
+                self.jerarquias[criterio] = JerarquiaContraccion(
+                    {nombre: datos[f"{nombre}_{criterio}"] for nombre in ARREGLOS_JERARQUIA})
+        print(f"📂 Jerarquías cargadas desde: {archivo}")
+        return True
+    
+    def rutas_en_lote(self, consultas, procesos=None):
+        """
+        Resuelve muchas consultas {'origen', 'destino', 'criterio'} agrupadas por (origen, criterio)
+        Devuelve un generador de resultados (ruta, distancia y métricas) en orden de llegada
+        """
+        from consultas_lote import resolver_consultas
+        return resolver_consultas(self, consultas, procesos)
+    
+    def demandas_desde_archivo(self, archivo):
+        """
+        Lee una matriz de tráfico CSV ciudad_origen,ciudad_destino,demanda_mbps
+        Devuelve (origenes, destinos, mbps) con ids de ciudad, o None si el archivo no se pudo leer
+        """
+        from trafico import leer_demandas
+        
+        print("📡 Cargando demandas de tráfico desde archivo:", archivo)
+        try:
+            origenes, destinos, mbps, reporte = leer_demandas(archivo, self.ciudades)
+        except FileNotFoundError:
+            print("❌ ERROR: No se encontró el archivo", archivo)
+            return None
+        except (OSError, EOFError, UnicodeDecodeError) as e:
+            print(f"❌ ERROR al leer {archivo}: {e}")
+            return None
+        print(f"✅ {reporte['cargadas']} demandas cargadas ({mbps.sum():,.1f} Mbps en total)")
+        if reporte['errores']:
+            print(f"⚠️  {reporte['errores']} filas con errores fueron omitidas, por ejemplo:")
+            for numero, motivo, contenido in reporte['ejemplos_error'][:5]:
+                print(f"   línea {numero}: {motivo} → {contenido}")
+        return origenes, destinos, mbps
+    
+    def demandas_gravedad(self, total_mbps, cantidad=None, semilla=0, masas=None):
+        """
+        Matriz de tráfico por modelo de gravedad (ver trafico.demandas_gravedad)
+        masas: ciudad -> peso (p. ej. población); por defecto, el ancho de banda total de cada ciudad
+        Devuelve (origenes, destinos, mbps) con ids de ciudad
+        """
+        from trafico import demandas_gravedad
+        
+        compacto = self.compacto
+        if masas is None:
+            capacidad = np.asarray(compacto.ancho_banda, dtype=np.float64)
+            pesos_ciudad = (np.bincount(compacto.extremo_a, weights=capacidad, minlength=compacto.num_ciudades) +
+                            np.bincount(compacto.extremo_b, weights=capacidad, minlength=compacto.num_ciudades))
+        else:
+            pesos_ciudad = np.array([masas.get(ciudad, 0) for ciudad in compacto.nombres], dtype=np.float64)
+        return demandas_gravedad(pesos_ciudad, total_mbps, cantidad, semilla)
+    
+    @instrumentacion.instrumentado()
+    def simular_trafico(self, demandas, criterio='latencia', iteraciones=0, umbral=1.0, procesos=None):
+        """
+        Enruta todas las demandas (origenes, destinos, mbps) por el criterio y acumula la carga de cada enlace
+        iteraciones > 0: vuelve a enrutar con los pesos penalizados por la congestión (función BPR)
+        y promedia las cargas entre vueltas (promedios sucesivos), así el tráfico se reparte
+        por rutas alternativas en lugar de oscilar entre ellas
+        Devuelve un dict con la carga por sentido (conexiones x 2), la utilización de cada conexión,
+        las sobrecargadas (utilización > umbral, de mayor a menor) y un resumen por iteración
+        El criterio 'ancho_banda' no es aditivo y lanza ValueError
+        """
+        from trafico import agrupar_demandas, asignar_demandas, factor_congestion, utilizacion
+        
+        compacto = self.compacto
+        origenes, destinos, mbps = agrupar_demandas(*demandas, compacto.num_ciudades)
+        pesos_base = self.pesos_criterio(criterio)
+        
+        # con la tabla todos-contra-todos ya calculada no hace falta ningún Dijkstra
+        arboles = None
+        if criterio in self.tablas:
+            arboles = self.tablas[criterio]['siguiente'].T
+        
+        carga = None
+        resumen = []
+        for iteracion in range(iteraciones + 1):
+            if carga is None:
+                pesos = pesos_base
+            else:
+                pesos = pesos_base * factor_congestion(utilizacion(carga, compacto.ancho_banda))
+                arboles = None
+            nueva, no_enrutada = asignar_demandas(compacto.offsets, compacto.destinos, pesos[compacto.arista],
+                                                  compacto.extremo_a, compacto.arista, compacto.num_conexiones,
+                                                  origenes, destinos, mbps, procesos, arboles)
+            carga = nueva if carga is None else carga + (nueva - carga) / (iteracion + 1)
+            uso = utilizacion(carga, compacto.ancho_banda)
+            resumen.append({'iteracion': iteracion, 'utilizacion_maxima': float(uso.max(initial=0)),
+                            'sobrecargadas': int((uso > umbral).sum())})
+        
+        sobrecargadas = np.flatnonzero(uso > umbral)
+        return {
+            'criterio': criterio,
+            'demanda_total': float(mbps.sum()),
+            'demanda_no_enrutada': no_enrutada,
+            'carga': carga,
+            'utilizacion': uso,
+            'sobrecargadas': sobrecargadas[np.argsort(-uso[sobrecargadas], kind='stable')],
+            'iteraciones': resumen
+        }
     
     def reconstruir_ruta(self, anteriores, destino):
         """Reconstruye la ruta desde origen hasta destino"""
@@ -156,33 +1534,74 @@ class RedISP:
         
         return list(reversed(ruta))
     
+    @instrumentacion.instrumentado()
     def obtener_metricas_ruta(self, ruta):
-        """Calcula las métricas totales de una ruta"""
+        """
+        Calcula las métricas totales de una ruta
+        Con conexiones paralelas, el ancho de banda limitante usa la más ancha de cada tramo
+        """
         if len(ruta) < 2:
             return None
         
-        latencia_total = 0
-        costo_total = 0
-        ancho_banda_minimo = float('inf')
+        compacto = self.compacto
+        camino = [compacto.indice[ciudad] for ciudad in ruta]
+        return metricas_camino(compacto.clave_arco, compacto.arista_de_clave, compacto.num_ciudades,
+                               compacto.latencia, compacto.costo, compacto.ancho_banda_par(), camino)
+    
+    @instrumentacion.instrumentado()
+    def metricas_rutas(self, rutas):
+        """
+        Métricas de muchas rutas en una sola pasada vectorizada (mismo resultado que
+        obtener_metricas_ruta, salvo redondeo en el último decimal de rutas muy largas)
+        """
+        compacto = self.compacto
+        caminos = [[compacto.indice[ciudad] for ciudad in ruta] for ruta in rutas]
+        latencia, costo, ancho_banda, saltos = metricas_caminos(
+            compacto.clave_arco, compacto.arista_de_clave, compacto.num_ciudades,
+            compacto.latencia, compacto.costo, compacto.ancho_banda_par(), caminos)
         
-        for i in range(len(ruta) - 1):
-            ciudad_actual = ruta[i]
-            ciudad_siguiente = ruta[i + 1]
-            
-            # buscar la conexión
-            for conexion in self.grafo[ciudad_actual]:
-                if conexion['destino'] == ciudad_siguiente:
-                    latencia_total += conexion['latencia']
-                    costo_total += conexion['costo']
-                    ancho_banda_minimo = min(ancho_banda_minimo, conexion['ancho_banda'])
-                    break
+        resultado = []
+        for i, n_saltos in enumerate(saltos.tolist()):
+            if n_saltos == 0:
+                resultado.append(None)
+                continue
+            resultado.append({
+                'latencia_total': float(latencia[i]),
+                'costo_total': float(costo[i]),
+                'ancho_banda_limitante': float(ancho_banda[i]),
+                'saltos': n_saltos
+            })
+        return resultado
+    
+    @instrumentacion.instrumentado()
+    def metricas_desde_origen(self, origen, criterio='latencia'):
+        """
+        Rutas óptimas desde origen a todas las ciudades con sus métricas
+        Las métricas se acumulan sobre el árbol de caminos mínimos (tiempo lineal en el
+        número de ciudades). Devuelve ciudad -> (ruta, métricas) solo para las alcanzables
+        """
+        compacto = self.compacto
+        fuente = compacto.indice[origen]
+        if criterio == CRITERIO_MAS_ANCHO:
+            _, previo = self._arbol_mas_ancho(fuente)
+        else:
+            _, previo = self._arbol_ids(fuente, criterio)
+        latencia, costo, ancho_banda, saltos = metricas_arbol(
+            compacto.clave_arco, compacto.arista_de_clave, compacto.latencia, compacto.costo,
+            compacto.ancho_banda_par(), previo, fuente)
         
-        return {
-            'latencia_total': latencia_total,
-            'costo_total': costo_total,
-            'ancho_banda_limitante': ancho_banda_minimo,
-            'saltos': len(ruta) - 1
-        }
+        nombres = compacto.nombres
+        rutas = {}
+        for v, n_saltos in enumerate(saltos.tolist()):
+            if n_saltos <= 0:
+                continue
+            rutas[nombres[v]] = ([nombres[u] for u in camino_desde_previo(previo, v)], {
+                'latencia_total': float(latencia[v]),
+                'costo_total': float(costo[v]),
+                'ancho_banda_limitante': float(ancho_banda[v]),
+                'saltos': n_saltos
+            })
+        return rutas
     
     def mostrar_ciudades(self):
         """Muestra todas las ciudades disponibles"""
@@ -192,228 +1611,139 @@ class RedISP:
             print(f"{i:2d}. {ciudad}")
         print("-" * 40)
     
+    @instrumentacion.instrumentado()
+    def posiciones_grafo(self):
+        """
+        Posiciones (ciudad -> x, y) para dibujar la red, calculadas una vez por versión del grafo
+        Con menos de MAX_CIUDADES_SPRING ciudades se usa spring_layout de networkx; en redes más grandes,
+        las coordenadas geográficas si están todas cargadas, o un layout de fuerzas escalable.
+        Se guardan en self.carpeta_layouts por huella de la topología, y tras agregar o quitar
+        unas pocas conexiones se parte de las posiciones anteriores (ajuste corto)
+        """
+        compacto = self.compacto
+        nombres = compacto.nombres
+        if self._layout is not None and self._layout[0] == self.version:
+            instrumentacion.contar(aciertos_layout=1)
+            return dict(zip(nombres, self._layout[2]))
+        
+        n = compacto.num_ciudades
+        if n < MAX_CIUDADES_SPRING:
+            metodo = 'spring'
+        elif all(ciudad in self.coordenadas for ciudad in nombres):
+            metodo = 'coordenadas'
+        else:
+            metodo = 'fuerzas'
+        
+        archivo = None
+        posiciones = None
+        if metodo == 'coordenadas':
+            latitudes, longitudes = zip(*(self.coordenadas[ciudad] for ciudad in nombres))
+            posiciones = layout_coordenadas(latitudes, longitudes)
+        elif self.carpeta_layouts:
+            huella = huella_topologia(nombres, compacto.extremo_a, compacto.extremo_b, metodo)
+            archivo = os.path.join(self.carpeta_layouts, f"{huella}.npz")
+            posiciones = cargar_layout(archivo, nombres)
+            if posiciones is not None:
+                instrumentacion.contar(layouts_disco=1)
+        
+        if posiciones is None:
+            iniciales = self._posiciones_previas()
+            if iniciales is None:
+                instrumentacion.contar(layouts_calculados=1)
+            else:
+                instrumentacion.contar(layouts_ajustados=1)
+            if metodo == 'spring':
+                G = nx.Graph()
+                G.add_nodes_from(nombres)
+                G.add_edges_from(zip((nombres[a] for a in compacto.extremo_a.tolist()),
+                                     (nombres[b] for b in compacto.extremo_b.tolist())))
+                if iniciales is None:
+                    pos = nx.spring_layout(G, k=4, iterations=100, seed=42)
+                else:
+                    pos = nx.spring_layout(G, k=4, pos=dict(zip(nombres, iniciales)),
+                                           iterations=ITERACIONES_AJUSTE, seed=42)
+                posiciones = np.array([pos[ciudad] for ciudad in nombres], dtype=np.float64).reshape(-1, 2)
+            elif iniciales is None:
+                posiciones = layout_fuerzas(n, compacto.extremo_a, compacto.extremo_b)
+            else:
+                posiciones = layout_fuerzas(n, compacto.extremo_a, compacto.extremo_b, iniciales,
+                                            ITERACIONES_AJUSTE)
+            if archivo is not None:
+                try:
+                    guardar_layout(archivo, nombres, posiciones)
+                except OSError as e:
+                    print(f"⚠️  No se pudo guardar el layout: {e}")
+        
+        self._layout = (self.version, list(nombres), posiciones)
+        return dict(zip(nombres, posiciones))
+    
+    def _posiciones_previas(self):
+        """
+        Posiciones del dibujo de una versión anterior como punto de partida, o None si no hay
+        o si la red cambió demasiado (menos de MIN_FRACCION_CONOCIDAS de las ciudades ya ubicadas)
+        """
+        if self._layout is None:
+            return None
+        compacto = self.compacto
+        anteriores = dict(zip(self._layout[1], self._layout[2]))
+        conocidas = np.array([ciudad in anteriores for ciudad in compacto.nombres], dtype=bool)
+        if not compacto.num_ciudades or conocidas.mean() < MIN_FRACCION_CONOCIDAS:
+            return None
+        posiciones = np.array([anteriores.get(ciudad, (0.0, 0.0)) for ciudad in compacto.nombres],
+                              dtype=np.float64)
+        return completar_posiciones(posiciones, conocidas, compacto.extremo_a, compacto.extremo_b)
+    
+    @instrumentacion.instrumentado()
     def crear_imagen_grafo(self, ruta_destacada=None, nombre_archivo="red_isp_grafo.png", 
-                          criterio_visual='latencia', mostrar_etiquetas=True):
+                          criterio_visual='latencia', mostrar_etiquetas=True, dpi=DPI_IMAGEN):
         """
         Crea una imagen visual del grafo de la red ISP con métricas
         ruta_destacada: lista de ciudades que forman una ruta a destacar
         criterio_visual: 'latencia', 'costo', 'ancho_banda' para colorear/dimensionar
         mostrar_etiquetas: si mostrar valores en las conexiones
+        dpi: resolución de la imagen (la extensión .svg guarda en vectorial)
+        Para muchas imágenes sin ventanas, ver renderizar_lote
         """
         print(f"📊 Generando imagen del grafo (criterio: {criterio_visual})...")
         
         try:
-            import matplotlib.pyplot as plt
-            import networkx as nx
-            import matplotlib.cm as cm
-            import numpy as np
-            
-            # Crear grafo de NetworkX
-            G = nx.Graph()
-            
-            # Agregar nodos (ciudades)
-            for ciudad in self.ciudades:
-                G.add_node(ciudad)
-            
-            # Agregar aristas con pesos y recopilar valores para normalización
-            aristas_agregadas = set()
-            valores_criterio = []
-            
-            for ciudad_origen in self.grafo:
-                for conexion in self.grafo[ciudad_origen]:
-                    ciudad_destino = conexion['destino']
-                    # Evitar duplicar aristas bidireccionales
-                    arista = tuple(sorted([ciudad_origen, ciudad_destino]))
-                    if arista not in aristas_agregadas:
-                        G.add_edge(ciudad_origen, ciudad_destino, 
-                                 latencia=conexion['latencia'],
-                                 costo=conexion['costo'],
-                                 ancho_banda=conexion['ancho_banda'])
-                        aristas_agregadas.add(arista)
-                        
-                        # Recopilar valores para normalización
-                        if criterio_visual == 'latencia':
-                            valores_criterio.append(conexion['latencia'])
-                        elif criterio_visual == 'costo':
-                            valores_criterio.append(conexion['costo'])
-                        elif criterio_visual == 'ancho_banda':
-                            valores_criterio.append(conexion['ancho_banda'])
-            
-            # Configurar el layout del grafo
-            plt.figure(figsize=(20, 14))
-            pos = nx.spring_layout(G, k=4, iterations=100, seed=42)
-            
-            # Normalizar valores para colores y anchos
-            if valores_criterio:
-                min_val = min(valores_criterio)
-                max_val = max(valores_criterio)
-                
-                # Crear mapas de colores y anchos para cada arista
-                edge_colors = []
-                edge_widths = []
-                edge_labels = {}
-                
-                for edge in G.edges():
-                    ciudad_a, ciudad_b = edge
-                    edge_data = G[ciudad_a][ciudad_b]
-                    
-                    if criterio_visual == 'latencia':
-                        valor = edge_data['latencia']
-                        unidad = 'ms'
-                    elif criterio_visual == 'costo':
-                        valor = edge_data['costo']
-                        unidad = 'S/'
-                    elif criterio_visual == 'ancho_banda':
-                        valor = edge_data['ancho_banda']
-                        unidad = 'Mbps'
-                    else:
-                        valor = edge_data['latencia']
-                        unidad = 'ms'
-                    
-                    # Normalizar valor (0-1)
-                    if max_val > min_val:
-                        valor_norm = (valor - min_val) / (max_val - min_val)
-                    else:
-                        valor_norm = 0.5
-                    
-                    # Para ancho de banda, invertir colores (mayor = mejor = verde)
-                    if criterio_visual == 'ancho_banda':
-                        color_norm = 1 - valor_norm
-                        width = 1 + valor_norm * 4  # Más ancho = mejor ancho de banda
-                    else:
-                        color_norm = valor_norm
-                        width = 1 + (1 - valor_norm) * 4  # Más ancho = mejor (menor latencia/costo)
-                    
-                    edge_colors.append(color_norm)
-                    edge_widths.append(width)
-                    
-                    # Etiqueta con valor
-                    if mostrar_etiquetas:
-                        if criterio_visual == 'costo':
-                            edge_labels[edge] = f"{valor:.3f}{unidad}"
-                        else:
-                            edge_labels[edge] = f"{valor:.1f}{unidad}"
-                
-                # Elegir mapa de colores según criterio
-                if criterio_visual == 'latencia':
-                    cmap = cm.Reds  # Rojo = alta latencia (malo)
-                elif criterio_visual == 'costo':
-                    cmap = cm.Oranges  # Naranja = alto costo (malo)
-                elif criterio_visual == 'ancho_banda':
-                    cmap = cm.Greens  # Verde = alto ancho de banda (bueno)
-                else:
-                    cmap = cm.Blues
-                
-                # Dibujar aristas con colores y anchos basados en criterio
-                edges = nx.draw_networkx_edges(G, pos, 
-                                             edge_color=edge_colors,
-                                             edge_cmap=cmap,
-                                             width=edge_widths,
-                                             alpha=0.7)
-                
-                # Agregar barra de colores
-                sm = plt.cm.ScalarMappable(cmap=cmap, 
-                                         norm=plt.Normalize(vmin=min_val, vmax=max_val))
-                sm.set_array([])
-                cbar = plt.colorbar(sm, ax=plt.gca(), shrink=0.8)
-                
-                if criterio_visual == 'latencia':
-                    cbar.set_label('Latencia (ms)', rotation=270, labelpad=20)
-                elif criterio_visual == 'costo':
-                    cbar.set_label('Costo (S/ por MB)', rotation=270, labelpad=20)
-                elif criterio_visual == 'ancho_banda':
-                    cbar.set_label('Ancho de Banda (Mbps)', rotation=270, labelpad=20)
-                
-                # Mostrar etiquetas de valores en las conexiones
-                if mostrar_etiquetas and len(edge_labels) < 50:  # No mostrar si hay muchas conexiones
-                    nx.draw_networkx_edge_labels(G, pos, edge_labels, font_size=6, alpha=0.8)
-            
-            # Si hay una ruta destacada, dibujarla con estilo especial
-            if ruta_destacada and len(ruta_destacada) > 1:
-                aristas_ruta = []
-                for i in range(len(ruta_destacada) - 1):
-                    aristas_ruta.append((ruta_destacada[i], ruta_destacada[i + 1]))
-                
-                nx.draw_networkx_edges(G, pos, edgelist=aristas_ruta, 
-                                     edge_color='purple', width=6, alpha=0.9,
-                                     style='dashed')
-            
-            # Dibujar nodos (ciudades) con tamaños variables según conectividad
-            node_sizes = []
-            for ciudad in G.nodes():
-                conexiones = len(self.grafo[ciudad])
-                size = 1000 + conexiones * 200  # Tamaño base + factor de conectividad
-                node_sizes.append(size)
+            fases = instrumentacion.fases('crear_imagen_grafo')
+            datos = datos_dibujo(self)
+            fases.marcar('layout')
             
-            nx.draw_networkx_nodes(G, pos, node_color='lightblue', 
-                                 node_size=node_sizes, alpha=0.9, edgecolors='black')
+            # capa base (conexiones, barra de colores, ciudades) en una figura de pyplot para poder mostrarla
+            lienzo = Lienzo(datos, criterio_visual, mostrar_etiquetas, figura=plt.figure(figsize=(20, 14)))
             
-            # Destacar nodos de la ruta si existe
-            if ruta_destacada:
-                ruta_sizes = [1200 + len(self.grafo[ciudad]) * 200 for ciudad in ruta_destacada]
-                nx.draw_networkx_nodes(G, pos, nodelist=ruta_destacada, 
-                                     node_color='gold', node_size=ruta_sizes, 
-                                     alpha=0.9, edgecolors='purple', linewidths=3)
-            
-            # Agregar etiquetas de las ciudades
-            nx.draw_networkx_labels(G, pos, font_size=9, font_weight='bold')
-            
-            # Configurar el título
-            criterio_nombres = {
-                'latencia': 'Latencia (ms)',
-                'costo': 'Costo (S/)',
-                'ancho_banda': 'Ancho de Banda (Mbps)'
-            }
-            
-            titulo = f"Red ISP - Perú\nVisualización por {criterio_nombres.get(criterio_visual, criterio_visual)}"
-            titulo += f"\n{len(self.ciudades)} ciudades, {len(G.edges())} conexiones"
-            
-            if ruta_destacada:
-                titulo += f"\nRuta destacada: {' → '.join(ruta_destacada)}"
-            
-            plt.title(titulo, fontsize=16, fontweight='bold', pad=20)
-            
-            # Agregar leyenda
-            legend_elements = [
-                plt.Line2D([0], [0], color='lightblue', marker='o', linestyle='None',
-                          markersize=10, label='Ciudades (tamaño = conectividad)'),
-                plt.Line2D([0], [0], color='gray', linewidth=2, alpha=0.7,
-                          label=f'Conexiones (color/grosor = {criterio_visual})')
-            ]
-            
-            if ruta_destacada:
-                legend_elements.append(
-                    plt.Line2D([0], [0], color='purple', linewidth=4, linestyle='--',
-                              label='Ruta destacada')
-                )
-            
-            plt.legend(handles=legend_elements, loc='upper left', bbox_to_anchor=(0.02, 0.98))
-            
-            plt.axis('off')
-            plt.tight_layout()
-            
-            # Guardar la imagen
-            import os
-
             # Crear carpeta de salida si no existe (por seguridad)
-            os.makedirs("salidas", exist_ok=True)
-
+            os.makedirs(CARPETA_IMAGENES, exist_ok=True)
+            
             # Guardar dentro de la carpeta salidas/
-            ruta_salida = os.path.join("salidas", nombre_archivo)
-            plt.savefig(ruta_salida, dpi=300, bbox_inches='tight')
-
+            ruta_salida = os.path.join(CARPETA_IMAGENES, nombre_archivo)
+            fases.marcar('dibujo')
+            lienzo.guardar(ruta_salida, ruta_destacada, dpi)
+            fases.marcar('guardado')
+            
             plt.show()
+            plt.close(lienzo.figura)
             
             print(f"✅ Imagen guardada como: {nombre_archivo}")
-            print(f"📊 Criterio visualizado: {criterio_nombres.get(criterio_visual, criterio_visual)}")
-            if valores_criterio:
-                print(f"📈 Rango de valores: {min_val:.3f} - {max_val:.3f}")
+            print(f"📊 Criterio visualizado: {CRITERIO_NOMBRES.get(criterio_visual, criterio_visual)}")
+            if lienzo.rango:
+                print(f"📈 Rango de valores: {lienzo.rango[0]:.3f} - {lienzo.rango[1]:.3f}")
             
         except ImportError:
             print("❌ Error: Se requieren las librerías matplotlib y networkx")
             print("💡 Instala con: pip install matplotlib networkx numpy")
         except Exception as e:
             print(f"❌ Error al crear imagen: {e}")
+    
+    def renderizar_lote(self, trabajos, procesos=None, dpi=DPI_IMAGEN, formato='png'):
+        """
+        Dibuja muchas imágenes {'ruta' | 'origen', 'destino', 'criterio', 'criterio_visual', 'etiquetas'}
+        en procesos sin ventanas, con la capa base dibujada una vez por criterio visual
+        Devuelve un generador de resultados (archivo en salidas/ o error) en orden de llegada
+        """
+        return renderizar_trabajos(self, trabajos, procesos, dpi, formato)
 
 def pedir_entrada(mensaje):
     """Función auxiliar para pedir datos al usuario"""
@@ -423,7 +1753,292 @@ def pedir_entrada(mensaje):
     except:
         return None
 
-def menu_principal():
+def parsear_argumentos(argv=None):
+    """Lee los argumentos de la línea de comandos"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Simulador de tráfico en red ISP - Perú")
+    parser.add_argument('archivo', nargs='?', default=ARCHIVO_RED,
+                        help="CSV con las conexiones de la red (por defecto: red_isp_peru.csv)")
+    parser.add_argument('coordenadas', nargs='?', default=ARCHIVO_COORDENADAS,
+                        help="CSV opcional ciudad,latitud,longitud para A* geográfico")
+    parser.add_argument('--tablas', metavar='CRITERIOS',
+                        help="calcular tablas todos-contra-todos (ej.: latencia,costo) y salir")
+    parser.add_argument('--salida', default=os.path.join("salidas", "tablas_rutas.npz"),
+                        help="archivo .npz donde guardar las tablas")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="procesos para el cálculo en paralelo (por defecto: todos los núcleos)")
+    parser.add_argument('--jerarquias', metavar='CRITERIOS',
+                        help="preprocesar jerarquías de contracción (ej.: latencia,costo), "
+                             "guardarlas en el snapshot y salir")
+    parser.add_argument('--verificar', type=int, default=0, metavar='N',
+                        help="con --jerarquias: comparar N rutas al azar con Dijkstra")
+    parser.add_argument('--consultas', '--queries', metavar='ARCHIVO',
+                        help="resolver consultas en lote desde un archivo JSON lines y salir")
+    parser.add_argument('--resultados', '--out', default="resultados.jsonl", metavar='ARCHIVO',
+                        help="archivo JSON lines donde escribir los resultados del lote")
+    parser.add_argument('--fallas', metavar='CRITERIO',
+                        help="simular la caída de cada conexión y escribir los pares que empeoran "
+                             "en --resultados (JSON lines), luego salir")
+    parser.add_argument('--cortes', action='store_true',
+                        help="construir el árbol de cortes mínimos (Gomory–Hu) sobre el ancho de banda, "
+                             "escribir sus tramos en --resultados (JSON lines) y salir")
+    parser.add_argument('--trafico', metavar='DEMANDAS',
+                        help="simular tráfico desde un CSV origen,destino,mbps (o 'gravedad' para "
+                             "generar la matriz) y escribir la carga de cada enlace en --resultados")
+    parser.add_argument('--criterio', default='latencia',
+                        help="con --trafico: criterio con el que se enrutan las demandas")
+    parser.add_argument('--iteraciones', type=int, default=0,
+                        help="con --trafico: vueltas de re-enrutamiento según la congestión")
+    parser.add_argument('--demanda-total', type=float, default=100_000.0, metavar='MBPS',
+                        help="con --trafico gravedad: demanda total de la matriz generada")
+    parser.add_argument('--num-demandas', type=int, default=None, metavar='N',
+                        help="con --trafico gravedad: pares muestreados (por defecto, todos los pares)")
+    parser.add_argument('--snapshot', default=None,
+                        help="carpeta del snapshot binario (por defecto: <archivo>.snapshot)")
+    parser.add_argument('--sin-snapshot', action='store_true',
+                        help="leer siempre el CSV sin usar ni guardar snapshots")
+    parser.add_argument('--duplicados', default='conservar', choices=POLITICAS_DUPLICADOS,
+                        help="qué hacer con conexiones repetidas entre el mismo par de ciudades")
+    parser.add_argument('--render', metavar='TRABAJOS',
+                        help="dibujar en lote (sin ventanas y en paralelo) las imágenes de un archivo "
+                             "JSON lines de trabajos en salidas/, escribir el resultado de cada uno en "
+                             "--resultados y salir")
+    parser.add_argument('--dpi', type=int, default=DPI_IMAGEN,
+                        help=f"con --render: resolución de las imágenes (por defecto {DPI_IMAGEN})")
+    parser.add_argument('--previa', action='store_true',
+                        help=f"con --render: vistas previas a {DPI_PREVIA} dpi (reemplaza a --dpi)")
+    parser.add_argument('--formato', default='png', choices=FORMATOS,
+                        help="con --render: formato de las imágenes (svg es vectorial)")
+    parser.add_argument('--instrumentar', action='store_true',
+                        help="medir tiempos y contadores de cada operación (también con "
+                             "RED_ISP_INSTRUMENTACION=1) y mostrar un resumen al salir")
+    parser.add_argument('--metricas', metavar='ARCHIVO',
+                        help="exportar las métricas al salir: .prom/.txt en formato Prometheus, "
+                             "cualquier otro en JSON (implica --instrumentar)")
+    parser.add_argument('--perfil', metavar='ARCHIVO',
+                        help="perfilar la sesión con cProfile y guardar las estadísticas (.prof)")
+    parser.add_argument('--memoria', action='store_true',
+                        help="seguir las reservas de memoria con tracemalloc (pico y lugares principales)")
+    return parser.parse_args(argv)
+
+def cargar_red(archivo_red, archivo_coordenadas=None, snapshot=True, carpeta=None,
+               politica_duplicados='conservar'):
+    """
+    Crea la red ISP y la carga (con las coordenadas por defecto para la red de ejemplo)
+    snapshot=True reutiliza el snapshot binario del CSV si sigue vigente
+    Termina el programa si el archivo de la red no se puede leer
+    """
+    red = RedISP()
+    if archivo_coordenadas is None and archivo_red == "red_isp_peru.csv":
+        archivo_coordenadas = "coordenadas_peru.csv"  # coordenadas de la red por defecto
+    if snapshot:
+        cargada = red.cargar_red_con_snapshot(archivo_red, archivo_coordenadas, carpeta=carpeta,
+                                              politica_duplicados=politica_duplicados)
+    else:
+        cargada = red.cargar_red_desde_archivo(archivo_red, archivo_coordenadas,
+                                               politica_duplicados=politica_duplicados)
+    if not cargada:
+        sys.exit()
+    return red
+
+def calcular_tablas_cli(argumentos):
+    """Modo no interactivo: calcula las tablas todos-contra-todos y las guarda en disco"""
+    red = cargar_red(argumentos.archivo, argumentos.coordenadas,
+                     not argumentos.sin_snapshot, argumentos.snapshot, argumentos.duplicados)
+    criterios = [criterio.strip() for criterio in argumentos.tablas.split(',') if criterio.strip()]
+    desconocidos = [criterio for criterio in criterios if not red.es_aditivo(criterio)]
+    if desconocidos:
+        print(f"❌ Criterios no válidos: {', '.join(desconocidos)}")
+        return
+    
+    red.calcular_tablas(criterios, procesos=argumentos.procesos)
+    carpeta = os.path.dirname(argumentos.salida)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    red.guardar_tablas(argumentos.salida)
+    
+    # dejar las tablas también en el snapshot para el próximo arranque
+    if not argumentos.sin_snapshot:
+        red.guardar_snapshot(argumentos.snapshot or carpeta_snapshot(argumentos.archivo),
+                             hash_archivo(argumentos.archivo))
+
+def preparar_jerarquias_cli(argumentos):
+    """Modo no interactivo: construye las jerarquías de contracción y las deja en el snapshot"""
+    red = cargar_red(argumentos.archivo, argumentos.coordenadas,
+                     not argumentos.sin_snapshot, argumentos.snapshot, argumentos.duplicados)
+    criterios = [criterio.strip() for criterio in argumentos.jerarquias.split(',') if criterio.strip()]
+    desconocidos = [criterio for criterio in criterios if not red.es_aditivo(criterio)]
+    if desconocidos:
+        print(f"❌ Criterios no válidos: {', '.join(desconocidos)}")
+        return
+    
+    red.preparar_jerarquias(criterios)
+    if argumentos.verificar > 0:
+        for criterio in criterios:
+            red.verificar_jerarquias(criterio, argumentos.verificar)
+    if argumentos.sin_snapshot:
+        carpeta = os.path.dirname(argumentos.salida)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        red.guardar_jerarquias(os.path.join(carpeta, "jerarquias.npz"))
+    else:
+        red.guardar_snapshot(argumentos.snapshot or carpeta_snapshot(argumentos.archivo),
+                             hash_archivo(argumentos.archivo))
+
+def consultas_lote_cli(argumentos):
+    """Modo no interactivo: resuelve un archivo de consultas y escribe los resultados en JSON lines"""
+    import time
+    from consultas_lote import escribir_resultados, leer_consultas
+    
+    red = cargar_red(argumentos.archivo, argumentos.coordenadas,
+                     not argumentos.sin_snapshot, argumentos.snapshot, argumentos.duplicados)
+    if not os.path.exists(argumentos.consultas):
+        print("❌ ERROR: No se encontró el archivo de consultas", argumentos.consultas)
+        return
+    
+    print(f"📦 Resolviendo consultas de {argumentos.consultas}...")
+    inicio = time.perf_counter()
+    resultados = red.rutas_en_lote(leer_consultas(argumentos.consultas), argumentos.procesos)
+    total = escribir_resultados(resultados, argumentos.resultados)
+    duracion = time.perf_counter() - inicio
+    print(f"✅ {total} consultas resueltas en {duracion:.2f} s → {argumentos.resultados}")
+
+def barrido_fallas_cli(argumentos):
+    """Modo no interactivo: simula la caída de cada conexión y escribe el impacto en JSON lines"""
+    import time
+    
+    red = cargar_red(argumentos.archivo, argumentos.coordenadas,
+                     not argumentos.sin_snapshot, argumentos.snapshot, argumentos.duplicados)
+    if not red.es_aditivo(argumentos.fallas):
+        print(f"❌ Criterio no válido: {argumentos.fallas}")
+        return
+    
+    print(f"🚧 Simulando la caída de {red.compacto.num_conexiones} conexiones ({argumentos.fallas})...")
+    inicio = time.perf_counter()
+    criticas = 0
+    with open(argumentos.resultados, 'w', encoding='utf-8') as salida:
+        for impacto in red.barrido_fallas(argumentos.fallas, argumentos.procesos):
+            if impacto['pares_afectados']:
+                criticas += 1
+            # JSON estándar: un par desconectado se escribe con null
+            impacto['pares'] = [(origen, destino, antes, despues if despues != float('inf') else None)
+                                for origen, destino, antes, despues in impacto['pares']]
+            if impacto['aumento_maximo'] == float('inf'):
+                impacto['aumento_maximo'] = None
+            salida.write(json.dumps(impacto, ensure_ascii=False) + "\n")
+    duracion = time.perf_counter() - inicio
+    print(f"✅ {red.compacto.num_conexiones} fallas simuladas en {duracion:.2f} s "
+          f"({criticas} afectan al menos un par) → {argumentos.resultados}")
+
+def arbol_cortes_cli(argumentos):
+    """Modo no interactivo: construye el árbol de cortes mínimos y escribe sus tramos en JSON lines"""
+    import time
+    
+    red = cargar_red(argumentos.archivo, argumentos.coordenadas,
+                     not argumentos.sin_snapshot, argumentos.snapshot, argumentos.duplicados)
+    nombres = red.compacto.nombres
+    print(f"🧱 Calculando el árbol de cortes mínimos ({len(nombres) - 1} flujos máximos)...")
+    inicio = time.perf_counter()
+    padre, valor, _ = red.arbol_cortes_minimos()
+    with open(argumentos.resultados, 'w', encoding='utf-8') as salida:
+        for i in range(1, len(nombres)):
+            tramo = {'ciudad': nombres[i], 'padre': nombres[padre[i]], 'flujo_maximo': valor[i]}
+            salida.write(json.dumps(tramo, ensure_ascii=False) + "\n")
+    duracion = time.perf_counter() - inicio
+    print(f"✅ Árbol de {len(nombres) - 1} tramos calculado en {duracion:.2f} s → {argumentos.resultados}")
+
+def mostrar_simulacion_trafico(red, simulacion, cantidad=10):
+    """Resumen de una simulación de tráfico: iteraciones y enlaces más cargados"""
+    compacto = red.compacto
+    print(f"\n🚦 SIMULACIÓN DE TRÁFICO ({simulacion['criterio'].upper()})")
+    print("="*70)
+    print(f"📦 Demanda total: {simulacion['demanda_total']:,.1f} Mbps")
+    if simulacion['demanda_no_enrutada']:
+        print(f"⛔ Demanda sin ruta: {simulacion['demanda_no_enrutada']:,.1f} Mbps")
+    for vuelta in simulacion['iteraciones']:
+        print(f"   Iteración {vuelta['iteracion']}: utilización máxima {vuelta['utilizacion_maxima']:.0%}, "
+              f"{vuelta['sobrecargadas']} enlaces sobrecargados")
+    
+    uso = simulacion['utilizacion']
+    sobrecargadas = set(simulacion['sobrecargadas'].tolist())
+    print("\n🔥 Enlaces más cargados:")
+    for e in np.argsort(-uso, kind='stable')[:cantidad].tolist():
+        marca = "⚠️ " if e in sobrecargadas else "  "
+        ida, vuelta = simulacion['carga'][e]
+        print(f" {marca} {compacto.nombres[compacto.extremo_a[e]]} - {compacto.nombres[compacto.extremo_b[e]]}: "
+              f"{uso[e]:.0%} ({max(ida, vuelta):,.1f} de {compacto.ancho_banda[e]:,.0f} Mbps)")
+
+def simular_trafico_cli(argumentos):
+    """Modo no interactivo: enruta una matriz de tráfico y escribe la carga de cada enlace en JSON lines"""
+    import time
+    
+    red = cargar_red(argumentos.archivo, argumentos.coordenadas,
+                     not argumentos.sin_snapshot, argumentos.snapshot, argumentos.duplicados)
+    if not red.es_aditivo(argumentos.criterio):
+        print(f"❌ Criterio no válido: {argumentos.criterio}")
+        return
+    if argumentos.trafico == 'gravedad':
+        demandas = red.demandas_gravedad(argumentos.demanda_total, argumentos.num_demandas)
+    else:
+        demandas = red.demandas_desde_archivo(argumentos.trafico)
+        if demandas is None:
+            return
+    
+    inicio = time.perf_counter()
+    simulacion = red.simular_trafico(demandas, argumentos.criterio, argumentos.iteraciones,
+                                     procesos=argumentos.procesos)
+    duracion = time.perf_counter() - inicio
+    mostrar_simulacion_trafico(red, simulacion)
+    
+    compacto = red.compacto
+    sobrecargadas = set(simulacion['sobrecargadas'].tolist())
+    with open(argumentos.resultados, 'w', encoding='utf-8') as salida:
+        for e, ((ida, vuelta), uso) in enumerate(zip(simulacion['carga'].tolist(),
+                                                     simulacion['utilizacion'].tolist())):
+            salida.write(json.dumps({
+                'conexion': e,
+                'ciudad_a': compacto.nombres[compacto.extremo_a[e]],
+                'ciudad_b': compacto.nombres[compacto.extremo_b[e]],
+                'carga_a_b': ida,
+                'carga_b_a': vuelta,
+                'ancho_banda': float(compacto.ancho_banda[e]),
+                'utilizacion': uso,
+                'sobrecargada': e in sobrecargadas
+            }, ensure_ascii=False) + "\n")
+    print(f"\n✅ {len(demandas[0])} demandas simuladas en {duracion:.2f} s → {argumentos.resultados}")
+
+def renderizar_lote_cli(argumentos):
+    """Modo no interactivo: dibuja las imágenes de un archivo de trabajos y escribe los resultados en JSON lines"""
+    import time
+    from consultas_lote import escribir_resultados, leer_consultas
+    
+    red = cargar_red(argumentos.archivo, argumentos.coordenadas,
+                     not argumentos.sin_snapshot, argumentos.snapshot, argumentos.duplicados)
+    if not os.path.exists(argumentos.render):
+        print("❌ ERROR: No se encontró el archivo de trabajos", argumentos.render)
+        return
+    
+    dpi = DPI_PREVIA if argumentos.previa else argumentos.dpi
+    print(f"🖼️  Dibujando las imágenes de {argumentos.render} ({argumentos.formato}, {dpi} dpi)...")
+    inicio = time.perf_counter()
+    errores = []
+    
+    def contar_errores(resultados):
+        for resultado in resultados:
+            if 'error' in resultado:
+                errores.append(resultado)
+            yield resultado
+    
+    resultados = red.renderizar_lote(leer_consultas(argumentos.render), argumentos.procesos,
+                                     dpi, argumentos.formato)
+    total = escribir_resultados(contar_errores(resultados), argumentos.resultados)
+    duracion = time.perf_counter() - inicio
+    print(f"✅ {total - len(errores)} de {total} imágenes en {duracion:.2f} s → {CARPETA_IMAGENES}/ "
+          f"(resultados en {argumentos.resultados})")
+
+def menu_principal(archivo_red=ARCHIVO_RED, archivo_coordenadas=ARCHIVO_COORDENADAS,
+                   snapshot=True, carpeta=None, politica_duplicados='conservar'):
     """Función principal del programa"""
     print("🌐" + "="*60)
     print("   SIMULADOR DE TRÁFICO EN RED ISP - PERÚ")
@@ -431,8 +2046,7 @@ def menu_principal():
     print("="*60)
     
     # crear instancia de la red ISP
-    red = RedISP()
-    red.cargar_red_desde_archivo(ARCHIVO_RED)
+    red = cargar_red(archivo_red, archivo_coordenadas, snapshot, carpeta, politica_duplicados)
     
     while True:
         print("\n📋 MENÚ PRINCIPAL")
@@ -441,6 +2055,10 @@ def menu_principal():
         print("3️⃣  Ver todas las rutas desde una ciudad")
         print("4️⃣  Mostrar estadísticas de la red")
         print("5️⃣  Crear imagen del grafo de la red")
+        print("6️⃣  Rutas de respaldo (k mejores rutas)")
+        print("7️⃣  Análisis de falla de un enlace")
+        print("8️⃣  Simular tráfico (carga de los enlaces)")
+        print("9️⃣  Capacidad máxima entre dos ciudades (corte mínimo)")
         print("0️⃣  Salir del simulador")
         print("-" * 50)
         
@@ -459,6 +2077,14 @@ def menu_principal():
             mostrar_estadisticas(red)
         elif opcion == "5":
             crear_imagen_grafo(red)
+        elif opcion == "6":
+            rutas_respaldo(red)
+        elif opcion == "7":
+            analizar_falla(red)
+        elif opcion == "8":
+            simular_trafico(red)
+        elif opcion == "9":
+            capacidad_entre_ciudades(red)
         else:
             print("❌ Opción no válida")
         
@@ -490,15 +2116,14 @@ def simular_ruta_simple(red):
     criterios = {'1': 'latencia', '2': 'costo', '3': 'ancho_banda', '4': 'compuesto'}
     criterio = criterios.get(criterio_num, 'latencia')
     
-    # ejecutar Dijkstra
-    distancias, anteriores = red.dijkstra_optimizado(origen, criterio)
+    # ejecutar Dijkstra punto a punto
+    ruta, _ = calcular_ruta(red, origen, destino, criterio)
     
-    if distancias[destino] == float('inf'):
+    if ruta is None:
         print(f"❌ No hay conexión entre {origen} y {destino}")
         return
     
     # mostrar resultados
-    ruta = red.reconstruir_ruta(anteriores, destino)
     metricas = red.obtener_metricas_ruta(ruta)
     
     print(f"\n✅ RUTA ÓPTIMA ENCONTRADA ({criterio.upper()})")
@@ -508,6 +2133,7 @@ def simular_ruta_simple(red):
     print(f"💰 Costo total: S/ {metricas['costo_total']:.4f} por MB")
     print(f"📶 Ancho de banda limitante: {metricas['ancho_banda_limitante']:.0f} Mbps")
     print(f"🔗 Número de saltos: {metricas['saltos']}")
+    print(f"🔎 Nodos expandidos: {red.ultima_busqueda['expandidos']} ({red.ultima_busqueda['algoritmo']})")
     
     # Preguntar si quiere crear imagen con la ruta destacada
     crear_img = pedir_entrada("\n¿Crear imagen del grafo con esta ruta destacada? (s/n): ")
@@ -546,17 +2172,22 @@ def comparar_criterios(red):
     criterios = ['latencia', 'costo', 'ancho_banda', 'compuesto']
     nombres_criterios = ['⏱️  Latencia', '💰 Costo', '📶 Ancho Banda', '⚖️  Compuesto']
     
+    # incluir también los criterios personalizados registrados en la red
+    for criterio in red.criterios:
+        if criterio not in criterios:
+            criterios.append(criterio)
+            nombres_criterios.append(f"🧮 {criterio}")
+    
     print(f"\n📊 COMPARACIÓN DE RUTAS: {origen} → {destino}")
     print("="*70)
     
     for i, criterio in enumerate(criterios):
-        distancias, anteriores = red.dijkstra_optimizado(origen, criterio)
+        ruta, _ = calcular_ruta(red, origen, destino, criterio)
         
-        if distancias[destino] == float('inf'):
+        if ruta is None:
             print(f"{nombres_criterios[i]}: Sin conexión")
             continue
         
-        ruta = red.reconstruir_ruta(anteriores, destino)
         metricas = red.obtener_metricas_ruta(ruta)
         
         print(f"\n{nombres_criterios[i]}:")
@@ -564,6 +2195,184 @@ def comparar_criterios(red):
         print(f"   Latencia: {metricas['latencia_total']:.1f}ms | "
               f"Costo: S/{metricas['costo_total']:.4f}/MB | "
               f"Ancho: {metricas['ancho_banda_limitante']:.0f}Mbps")
+    
+    # rutas intermedias entre los criterios: frontera de Pareto
+    ver_frontera = pedir_entrada("\n¿Mostrar todas las rutas no dominadas (frontera de Pareto)? (s/n): ")
+    if ver_frontera and ver_frontera.lower() in ['s', 'si', 'sí', 'y', 'yes']:
+        tolerancia = pedir_entrada("Tolerancia epsilon (0 = frontera exacta, p. ej. 0.05): ")
+        try:
+            epsilon = max(0.0, float(tolerancia)) if tolerancia else 0.0
+        except ValueError:
+            epsilon = 0.0
+        frontera = red.rutas_pareto(origen, destino, epsilon)
+        print(f"\n🎯 FRONTERA DE PARETO ({len(frontera)} rutas):")
+        for ruta, metricas in frontera:
+            if metricas is None:
+                continue
+            print(f"   {' → '.join(ruta)}")
+            print(f"      Latencia: {metricas['latencia_total']:.1f}ms | "
+                  f"Costo: S/{metricas['costo_total']:.4f}/MB | "
+                  f"Ancho: {metricas['ancho_banda_limitante']:.0f}Mbps")
+
+def rutas_respaldo(red):
+    """Muestra la ruta principal y las rutas de respaldo entre dos ciudades"""
+    print("\n🛟 RUTAS DE RESPALDO ENTRE DOS CIUDADES")
+    red.mostrar_ciudades()
+    
+    origen = pedir_entrada("📍 Ciudad de origen: ")
+    if not origen or origen not in red.ciudades:
+        print("❌ Ciudad de origen no válida")
+        return
+    
+    destino = pedir_entrada("🎯 Ciudad de destino: ")
+    if not destino or destino not in red.ciudades:
+        print("❌ Ciudad de destino no válida")
+        return
+    
+    print("\n📊 Criterios de optimización:")
+    print("1. Latencia (menor tiempo)")
+    print("2. Costo (menor precio)")
+    print("3. Compuesto (balance de todos)")
+    criterio_num = pedir_entrada("Selecciona criterio (1-3): ")
+    criterios = {'1': 'latencia', '2': 'costo', '3': 'compuesto'}
+    criterio = criterios.get(criterio_num, 'latencia')
+    
+    cantidad = pedir_entrada("¿Cuántas rutas? (por defecto 3): ")
+    k = int(cantidad) if cantidad and cantidad.isdigit() else 3
+    
+    print("\n🔀 Diversidad de las rutas:")
+    print("1. Sin restricción (k mejores rutas)")
+    print("2. Sin enlaces compartidos")
+    print("3. Sin ciudades intermedias compartidas")
+    modo_num = pedir_entrada("Selecciona modo (1-3): ")
+    disjuntas = {'2': 'enlaces', '3': 'ciudades'}.get(modo_num)
+    
+    rutas = red.k_rutas_optimas(origen, destino, k, criterio, disjuntas)
+    if not rutas:
+        print(f"❌ No hay conexión entre {origen} y {destino}")
+        return
+    
+    print(f"\n🛟 RUTAS {origen} → {destino} ({criterio.upper()})")
+    print("="*70)
+    for i, (ruta, distancia) in enumerate(rutas, 1):
+        metricas = red.obtener_metricas_ruta(ruta)
+        etiqueta = "Principal" if i == 1 else f"Respaldo {i - 1}"
+        print(f"\n{i}. {etiqueta} (distancia {distancia:.4f}):")
+        print(f"   Ruta: {' → '.join(ruta)}")
+        if metricas:
+            print(f"   Latencia: {metricas['latencia_total']:.1f}ms | "
+                  f"Costo: S/{metricas['costo_total']:.4f}/MB | "
+                  f"Ancho: {metricas['ancho_banda_limitante']:.0f}Mbps | "
+                  f"Saltos: {metricas['saltos']}")
+    if len(rutas) < k:
+        print(f"\nℹ️  Solo existen {len(rutas)} rutas con esas condiciones")
+
+def analizar_falla(red):
+    """Muestra qué pares de ciudades empeoran si cae el enlace entre dos ciudades"""
+    print("\n🚧 ANÁLISIS DE FALLA DE UN ENLACE")
+    red.mostrar_ciudades()
+    
+    ciudad_a = pedir_entrada("📍 Primera ciudad del enlace: ")
+    if not ciudad_a or ciudad_a not in red.ciudades:
+        print("❌ Ciudad no válida")
+        return
+    
+    ciudad_b = pedir_entrada("📍 Segunda ciudad del enlace: ")
+    if not ciudad_b or ciudad_b not in red.ciudades:
+        print("❌ Ciudad no válida")
+        return
+    
+    print("\n📊 Criterios de optimización:")
+    print("1. Latencia (menor tiempo)")
+    print("2. Costo (menor precio)")
+    print("3. Compuesto (balance de todos)")
+    criterio_num = pedir_entrada("Selecciona criterio (1-3): ")
+    criterios = {'1': 'latencia', '2': 'costo', '3': 'compuesto'}
+    criterio = criterios.get(criterio_num, 'latencia')
+    
+    try:
+        impacto = red.impacto_falla(ciudad_a, ciudad_b, criterio)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    
+    print(f"\n🚧 FALLA {ciudad_a} - {ciudad_b} ({criterio.upper()})")
+    print("="*70)
+    if not impacto['pares_afectados']:
+        print("✅ Ningún par de ciudades empeora: la red tiene rutas equivalentes")
+    else:
+        print(f"📉 Pares que empeoran: {impacto['pares_afectados']}")
+        print(f"⛔ Pares que quedan desconectados: {impacto['pares_desconectados']}")
+        for origen, destino, antes, despues in impacto['pares'][:15]:
+            if despues == float('inf'):
+                print(f"   {origen} ↔ {destino}: {antes:.2f} → sin conexión")
+            else:
+                print(f"   {origen} ↔ {destino}: {antes:.2f} → {despues:.2f} (+{despues - antes:.2f})")
+        if impacto['pares_afectados'] > 15:
+            print(f"   ... y {impacto['pares_afectados'] - 15} pares más")
+    
+    aplicar = pedir_entrada("\n¿Quitar el enlace de la red para esta sesión? (s/n): ")
+    if aplicar and aplicar.lower() in ['s', 'si', 'sí', 'y', 'yes']:
+        red.eliminar_conexion(ciudad_a, ciudad_b)
+
+def simular_trafico(red):
+    """Simula una matriz de tráfico sobre la red y muestra los enlaces sobrecargados"""
+    print("\n🚦 SIMULACIÓN DE TRÁFICO")
+    print("1. Leer demandas desde un archivo CSV (origen,destino,mbps)")
+    print("2. Generar demandas con un modelo de gravedad")
+    fuente = pedir_entrada("Selecciona opción (1-2): ")
+    if fuente == "1":
+        archivo = pedir_entrada("📄 Archivo de demandas: ")
+        demandas = red.demandas_desde_archivo(archivo) if archivo else None
+        if demandas is None:
+            return
+    else:
+        total = pedir_entrada("📦 Demanda total en Mbps (por defecto 100000): ")
+        try:
+            total = float(total) if total else 100_000.0
+        except ValueError:
+            total = 100_000.0
+        demandas = red.demandas_gravedad(total)
+    
+    print("\n📊 Criterios de optimización:")
+    print("1. Latencia (menor tiempo)")
+    print("2. Costo (menor precio)")
+    print("3. Compuesto (balance de todos)")
+    criterio_num = pedir_entrada("Selecciona criterio (1-3): ")
+    criterios = {'1': 'latencia', '2': 'costo', '3': 'compuesto'}
+    criterio = criterios.get(criterio_num, 'latencia')
+    
+    iteraciones = pedir_entrada("🔁 Iteraciones de re-enrutamiento por congestión (por defecto 0): ")
+    iteraciones = int(iteraciones) if iteraciones and iteraciones.isdigit() else 0
+    
+    simulacion = red.simular_trafico(demandas, criterio, iteraciones)
+    mostrar_simulacion_trafico(red, simulacion)
+
+def capacidad_entre_ciudades(red):
+    """Flujo máximo entre dos ciudades y enlaces del corte mínimo que lo limitan"""
+    print("\n🧱 CAPACIDAD MÁXIMA ENTRE DOS CIUDADES")
+    red.mostrar_ciudades()
+    
+    origen = pedir_entrada("📍 Ciudad de origen: ")
+    if not origen or origen not in red.ciudades:
+        print("❌ Ciudad de origen no válida")
+        return
+    
+    destino = pedir_entrada("🎯 Ciudad de destino: ")
+    if not destino or destino not in red.ciudades or destino == origen:
+        print("❌ Ciudad de destino no válida")
+        return
+    
+    resultado = red.corte_minimo(origen, destino)
+    if resultado['flujo'] == 0:
+        print(f"❌ No hay conexión entre {origen} y {destino}")
+        return
+    
+    print(f"\n📶 Flujo máximo {origen} → {destino}: {resultado['flujo']:.0f} Mbps")
+    print(f"   (una sola ruta llega como máximo a {red.ancho_maximo_entre(origen, destino):.0f} Mbps)")
+    print(f"\n✂️  CORTE MÍNIMO ({len(resultado['corte'])} conexiones):")
+    for ciudad_a, ciudad_b, ancho in resultado['corte']:
+        print(f"   {ciudad_a} - {ciudad_b}: {ancho:.0f} Mbps")
 
 def rutas_desde_origen(red):
     """Muestra todas las rutas desde una ciudad origen"""
@@ -575,7 +2384,7 @@ def rutas_desde_origen(red):
         print("❌ Ciudad de origen no válida")
         return
     
-    distancias, anteriores = red.dijkstra_optimizado(origen, 'latencia')
+    rutas = red.metricas_desde_origen(origen, 'latencia')
     
     print(f"\n📡 RUTAS DESDE {origen.upper()}:")
     print("="*60)
@@ -584,11 +2393,10 @@ def rutas_desde_origen(red):
         if ciudad == origen:
             continue
         
-        if distancias[ciudad] == float('inf'):
+        if ciudad not in rutas:
             print(f"❌ {ciudad}: Sin conexión")
         else:
-            ruta = red.reconstruir_ruta(anteriores, ciudad)
-            metricas = red.obtener_metricas_ruta(ruta)
+            ruta, metricas = rutas[ciudad]
             print(f"✅ {ciudad}: {' → '.join(ruta)} "
                   f"({metricas['latencia_total']:.1f}ms)")
 
@@ -600,15 +2408,18 @@ def mostrar_estadisticas(red):
     print(f"🔗 Total de conexiones: {red._contar_conexiones()}")
     
     # calcular estadísticas de conectividad
-    conexiones_por_ciudad = {}
-    for ciudad in red.grafo:
-        conexiones_por_ciudad[ciudad] = len(red.grafo[ciudad])
+    grados = red.compacto.grados().tolist()
+    conexiones_por_ciudad = dict(zip(red.ciudades, grados))
     
     ciudad_mas_conectada = max(conexiones_por_ciudad, key=conexiones_por_ciudad.get)
     max_conexiones = conexiones_por_ciudad[ciudad_mas_conectada]
     
     print(f"🌟 Ciudad más conectada: {ciudad_mas_conectada} ({max_conexiones} conexiones)")
     
+    cache = red.estadisticas_cache()
+    print(f"🗃️  Caché de rutas: {cache['entradas']}/{cache['tamano']} árboles, "
+          f"{cache['aciertos']} aciertos, {cache['fallos']} fallos")
+    
     # mostrar todas las ciudades y sus conexiones
     print(f"\n🔗 CONEXIONES POR CIUDAD:")
     for ciudad in sorted(red.ciudades):
@@ -670,13 +2481,12 @@ def crear_imagen_grafo(red):
         criterio_ruta = criterios_ruta.get(criterio_ruta_num, 'latencia')
         
         # Calcular ruta óptima
-        distancias, anteriores = red.dijkstra_optimizado(origen, criterio_ruta)
+        ruta, _ = calcular_ruta(red, origen, destino, criterio_ruta)
         
-        if distancias[destino] == float('inf'):
+        if ruta is None:
             print(f"❌ No hay conexión entre {origen} y {destino}")
             return
         
-        ruta = red.reconstruir_ruta(anteriores, destino)
         nombre_archivo = pedir_entrada("Nombre del archivo (sin extensión): ") or f"ruta_{origen}_{destino}_{criterio_visual}"
         nombre_archivo += ".png"
         
@@ -696,14 +2506,42 @@ def crear_imagen_grafo(red):
 
 # Ejecutar el programa
 if __name__ == "__main__":
+    argumentos = parsear_argumentos()
+    instrumentacion.configurar(argumentos.instrumentar, argumentos.metricas, argumentos.perfil,
+                               argumentos.memoria)
+    # modos no interactivos: terminan sin abrir el menú ni la galería
+    if argumentos.tablas:
+        calcular_tablas_cli(argumentos)
+        sys.exit()
+    if argumentos.jerarquias:
+        preparar_jerarquias_cli(argumentos)
+        sys.exit()
+    if argumentos.consultas:
+        consultas_lote_cli(argumentos)
+        sys.exit()
+    if argumentos.fallas:
+        barrido_fallas_cli(argumentos)
+        sys.exit()
+    if argumentos.cortes:
+        arbol_cortes_cli(argumentos)
+        sys.exit()
+    if argumentos.trafico:
+        simular_trafico_cli(argumentos)
+        sys.exit()
+    if argumentos.render:
+        renderizar_lote_cli(argumentos)
+        sys.exit()
+    
     try:
-        menu_principal()
+        menu_principal(argumentos.archivo, argumentos.coordenadas,
+                       not argumentos.sin_snapshot, argumentos.snapshot, argumentos.duplicados)
     except KeyboardInterrupt:
         print("\n\n👋 Programa interrumpido por el usuario")
     except Exception as e:
         print(f"\n💥 Error inesperado: {e}")
         print("Contacta al administrador del sistema")
     finally:
+        instrumentacion.finalizar()
         # Al cerrar el simulador, lanzar la galería
         print("\n🌐 Abriendo galería de imágenes...")
         import subprocess
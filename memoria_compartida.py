@@ -0,0 +1,52 @@
+"""
+Publicación de arreglos NumPy en memoria compartida para los procesos de trabajo
+El proceso principal copia cada arreglo una sola vez a un bloque compartido; los
+procesos del pool se conectan por nombre y los leen sin copiarlos ni serializarlos.
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+
+def publicar(contenidos):
+    """
+    Crea un bloque compartido por arreglo
+    contenidos: nombre -> arreglo, o nombre -> (forma, dtype) para un bloque de salida vacío
+    Devuelve (bloques, arreglos, descriptores); los descriptores se pasan a abrir()
+    """
+    bloques, arreglos = {}, {}
+    try:
+        for clave, contenido in contenidos.items():
+            if isinstance(contenido, tuple):
+                forma, dtype = contenido
+                contenido = None
+            else:
+                contenido = np.ascontiguousarray(contenido)
+                forma, dtype = contenido.shape, contenido.dtype
+            tamano = max(1, int(np.prod(forma)) * np.dtype(dtype).itemsize)
+            bloques[clave] = shared_memory.SharedMemory(create=True, size=tamano)
+            arreglos[clave] = np.ndarray(forma, dtype=dtype, buffer=bloques[clave].buf)
+            if contenido is not None:
+                arreglos[clave][...] = contenido
+    except Exception:
+        arreglos.clear()
+        liberar(bloques)
+        raise
+    descriptores = {clave: (bloques[clave].name, arreglo.shape, arreglo.dtype.str)
+                    for clave, arreglo in arreglos.items()}
+    return bloques, arreglos, descriptores
+
+def abrir(descriptores):
+    """Se conecta (desde un proceso de trabajo) a los bloques publicados"""
+    bloques, arreglos = {}, {}
+    for clave, (nombre, forma, dtype) in descriptores.items():
+        bloques[clave] = shared_memory.SharedMemory(name=nombre)
+        arreglos[clave] = np.ndarray(forma, dtype=dtype, buffer=bloques[clave].buf)
+    return bloques, arreglos
+
+def liberar(bloques, arreglos=None):
+    """Cierra y elimina los bloques (soltar antes las vistas NumPy que los usan)"""
+    if arreglos is not None:
+        arreglos.clear()
+    for bloque in bloques.values():
+        bloque.close()
+        bloque.unlink()
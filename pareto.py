@@ -0,0 +1,100 @@
+"""
+Búsqueda multiobjetivo de rutas (latencia, costo y ancho de banda) por etiquetas
+Cada etiqueta es una ruta parcial con su latencia y costo acumulados y su ancho de
+banda limitante; se descartan las etiquetas dominadas (peores o iguales en las tres
+métricas) y el resultado es la frontera de Pareto de rutas no dominadas al destino.
+Con epsilon > 0 también se descartan las que no mejoran en más de un factor (1 + epsilon)
+a alguna ya encontrada, lo que acota el tamaño de la frontera en redes grandes.
+Con cotas (lo mejor que puede lograr cada ciudad hasta el destino en cada métrica) las
+etiquetas se ordenan por su valor optimista y se podan apenas ese valor queda dominado
+por una ruta ya encontrada, como en A* multiobjetivo.
+"""
+import heapq
+
+def _domina(a, b, factor):
+    """a = (latencia, costo, ancho) domina (con tolerancia factor) a b"""
+    return a[0] <= b[0] * factor and a[1] <= b[1] * factor and a[2] * factor >= b[2]
+
+def frontera_pareto(offsets, destinos, latencia, costo, ancho_banda, fuente, destino, epsilon=0.0,
+                    cotas=None):
+    """
+    Frontera de Pareto de rutas de fuente a destino sobre listas CSR
+    latencia/costo/ancho_banda: valor de cada arco
+    cotas (opcional): listas (latencia mínima, costo mínimo, ancho máximo) de cada ciudad
+    al destino; deben ser optimistas y consistentes, p. ej. caminos mínimos desde el destino
+    Las etiquetas se procesan en orden lexicográfico (latencia, costo, -ancho) optimista, así
+    que una etiqueta asentada nunca queda dominada por otra posterior
+    Devuelve una lista de (camino de ids, (latencia, costo, ancho limitante)) por latencia
+    """
+    if epsilon < 0:
+        raise ValueError("epsilon no puede ser negativo")
+    factor = 1 + epsilon
+    n = len(offsets) - 1
+    if cotas is None:
+        cotas = ([0] * n, [0] * n, [float('inf')] * n)
+    cota_latencia, cota_costo, cota_ancho = cotas
+    infinito = float('inf')
+    if cota_latencia[fuente] == infinito:
+        return []
+
+    # etiquetas en listas paralelas: valores, nodo, etiqueta padre y si sigue viva
+    valores = [(0, 0, float('inf'))]
+    nodo = [fuente]
+    padre = [-1]
+    viva = [True]
+    vivas_en = [[] for _ in range(n)]  # etiquetas no descartadas de cada nodo
+    vivas_en[fuente].append(0)
+    asentadas_destino = []
+
+    cola = [(cota_latencia[fuente], cota_costo[fuente], -cota_ancho[fuente], 0)]
+    while cola:
+        _, _, _, etiqueta = heapq.heappop(cola)
+        if not viva[etiqueta]:
+            continue
+        u = nodo[etiqueta]
+        if u == destino:
+            asentadas_destino.append(etiqueta)
+            continue  # no se extienden rutas que pasan por el destino
+
+        lat_u, costo_u, ancho_u = valores[etiqueta]
+        for i in range(offsets[u], offsets[u + 1]):
+            v = destinos[i]
+            if cota_latencia[v] == infinito:
+                continue
+            nuevo = (lat_u + latencia[i], costo_u + costo[i], min(ancho_u, ancho_banda[i]))
+            optimista = (nuevo[0] + cota_latencia[v], nuevo[1] + cota_costo[v], min(nuevo[2], cota_ancho[v]))
+
+            # poda por el destino: ni la mejor continuación supera a una ruta ya encontrada
+            if any(_domina(valores[e], optimista, factor) for e in asentadas_destino):
+                continue
+            if any(_domina(valores[e], nuevo, factor) for e in vivas_en[v]):
+                continue
+
+            # la nueva etiqueta descarta las de v que domina (sin tolerancia)
+            restantes = []
+            for e in vivas_en[v]:
+                if _domina(nuevo, valores[e], 1):
+                    viva[e] = False
+                else:
+                    restantes.append(e)
+            nueva = len(valores)
+            valores.append(nuevo)
+            nodo.append(v)
+            padre.append(etiqueta)
+            viva.append(True)
+            restantes.append(nueva)
+            vivas_en[v] = restantes
+            heapq.heappush(cola, (optimista[0], optimista[1], -optimista[2], nueva))
+
+    frontera = []
+    for etiqueta in asentadas_destino:
+        if not viva[etiqueta]:
+            continue
+        camino = []
+        e = etiqueta
+        while e >= 0:
+            camino.append(nodo[e])
+            e = padre[e]
+        camino.reverse()
+        frontera.append((camino, valores[etiqueta]))
+    return frontera
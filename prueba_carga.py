@@ -0,0 +1,125 @@
+"""
+Prueba de carga de la API de rutas (servidor_rutas.py)
+Cada cliente es un proceso aparte con una conexión HTTP/1.1 keep-alive que envía consultas
+una tras otra durante el tiempo indicado (así el cliente no queda limitado por el GIL).
+Las consultas de /api/ruta se eligen al azar con semilla fija entre las ciudades que
+informa /api/ciudades y los criterios pedidos. Al final se muestran consultas por segundo,
+errores y los percentiles de latencia, y opcionalmente se guardan en JSON.
+"""
+import http.client
+import json
+import random
+import sys
+import time
+from multiprocessing import Pool
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+CRITERIOS = ('latencia', 'costo', 'ancho_banda', 'compuesto')
+
+def _conectar(url):
+    partes = urlsplit(url)
+    return http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=30)
+
+def obtener_ciudades(url):
+    conexion = _conectar(url)
+    try:
+        conexion.request('GET', '/api/ciudades')
+        respuesta = conexion.getresponse()
+        if respuesta.status != 200:
+            raise RuntimeError(f"/api/ciudades respondió {respuesta.status}")
+        return json.loads(respuesta.read())['ciudades']
+    finally:
+        conexion.close()
+
+def _cliente(tarea):
+    """Envía consultas durante duracion segundos; devuelve (latencias en s, errores)"""
+    url, ciudades, criterios, duracion, semilla = tarea
+    generador = random.Random(semilla)
+    conexion = _conectar(url)
+    latencias, errores = [], 0
+    fin = time.perf_counter() + duracion
+    try:
+        while time.perf_counter() < fin:
+            origen, destino = generador.sample(ciudades, 2)
+            camino = '/api/ruta?' + urlencode({'origen': origen, 'destino': destino,
+                                               'criterio': generador.choice(criterios)})
+            inicio = time.perf_counter()
+            try:
+                conexion.request('GET', camino)
+                respuesta = conexion.getresponse()
+                respuesta.read()
+                if respuesta.status != 200:
+                    errores += 1
+            except (OSError, http.client.HTTPException):
+                errores += 1
+                conexion.close()
+                conexion = _conectar(url)
+                continue
+            latencias.append(time.perf_counter() - inicio)
+    finally:
+        conexion.close()
+    return latencias, errores
+
+def ejecutar(url, clientes=8, duracion=10.0, criterios=CRITERIOS, semilla=0):
+    """Corre la prueba y devuelve el resumen (consultas por segundo, errores, latencias en ms)"""
+    ciudades = obtener_ciudades(url)
+    if len(ciudades) < 2:
+        raise RuntimeError("la red necesita al menos dos ciudades")
+    tareas = [(url, ciudades, list(criterios), duracion, semilla + i) for i in range(clientes)]
+    inicio = time.perf_counter()
+    with Pool(clientes) as pool:
+        resultados = pool.map(_cliente, tareas)
+    transcurrido = time.perf_counter() - inicio
+    latencias = np.array([latencia for parciales, _ in resultados for latencia in parciales])
+    errores = sum(errores for _, errores in resultados)
+    resumen = {
+        'url': url,
+        'clientes': clientes,
+        'duracion_s': duracion,
+        'consultas': int(len(latencias)),
+        'errores': errores,
+        'consultas_por_s': len(latencias) / transcurrido,
+    }
+    if len(latencias):
+        resumen.update({f"{nombre}_ms": float(np.percentile(latencias, percentil) * 1000)
+                        for nombre, percentil in (('p50', 50), ('p95', 95), ('p99', 99))})
+        resumen['max_ms'] = float(latencias.max() * 1000)
+    return resumen
+
+def parsear_argumentos(argv=None):
+    """Lee los argumentos de la línea de comandos"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de rutas")
+    parser.add_argument('url', nargs='?', default="http://127.0.0.1:8000",
+                        help="dirección del servidor (por defecto: http://127.0.0.1:8000)")
+    parser.add_argument('--clientes', type=int, default=8, help="clientes concurrentes (procesos)")
+    parser.add_argument('--duracion', type=float, default=10.0, help="segundos de prueba")
+    parser.add_argument('--criterios', default=",".join(CRITERIOS),
+                        help="criterios de las consultas separados por comas")
+    parser.add_argument('--semilla', type=int, default=0, help="semilla de las consultas")
+    parser.add_argument('--salida', default=None, help="JSON donde guardar el resumen")
+    argumentos = parser.parse_args(argv)
+    argumentos.criterios = [criterio for criterio in argumentos.criterios.split(",") if criterio.strip()]
+    return argumentos
+
+if __name__ == "__main__":
+    argumentos = parsear_argumentos()
+    print(f"🚀 {argumentos.clientes} clientes contra {argumentos.url} durante {argumentos.duracion:g} s...")
+    try:
+        resumen = ejecutar(argumentos.url, argumentos.clientes, argumentos.duracion,
+                           argumentos.criterios, argumentos.semilla)
+    except (OSError, RuntimeError) as e:
+        print(f"❌ No se pudo hacer la prueba: {e}")
+        sys.exit(1)
+    print(f"✅ {resumen['consultas']} consultas, {resumen['errores']} errores → "
+          f"{resumen['consultas_por_s']:.0f} consultas/s")
+    if resumen['consultas']:
+        print(f"   Latencia: p50 {resumen['p50_ms']:.2f} ms | p95 {resumen['p95_ms']:.2f} ms | "
+              f"p99 {resumen['p99_ms']:.2f} ms | máx {resumen['max_ms']:.2f} ms")
+    if argumentos.salida:
+        with open(argumentos.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resumen, archivo, ensure_ascii=False, indent=2)
+        print(f"📄 Resumen → {argumentos.salida}")
@@ -0,0 +1,347 @@
+"""
+Dibujo de la red por capas y render de imágenes en lote, sin ventanas
+La capa base (conexiones coloreadas según el criterio visual, barra de colores, ciudades y
+sus nombres) se dibuja una vez por (criterio visual, etiquetas); cada imagen solo agrega
+la ruta destacada, el título y la leyenda, y los quita antes de la siguiente.
+En lote, las figuras son de matplotlib.figure (lienzo Agg, sin pyplot ni ventanas) y los
+trabajos se agrupan por capa base y se reparten entre procesos.
+Formato de entrada (JSON lines): {"origen": "Lima", "destino": "Cusco", "criterio": "costo",
+"criterio_visual": "latencia", "etiquetas": true} o {"ruta": ["Lima", ...]}; sin ruta ni
+origen/destino se dibuja la red completa. "archivo" fija el nombre de la imagen.
+"""
+import os
+import textwrap
+from multiprocessing import Pool
+
+import matplotlib.cm as cm
+import networkx as nx
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import Normalize
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+
+CARPETA_IMAGENES = "salidas"
+FORMATOS = ('png', 'svg')
+# Resolución de las imágenes finales y de las vistas previas (--dpi)
+DPI_IMAGEN = 300
+DPI_PREVIA = 72
+# Caracteres por línea y ciudades como máximo de la ruta en el título
+ANCHO_TITULO = 120
+MAX_CIUDADES_TITULO = 24
+# Imágenes de una misma capa base que se envían juntas a un proceso
+TAMANO_TANDA = 8
+
+CRITERIO_NOMBRES = {
+    'latencia': 'Latencia (ms)',
+    'costo': 'Costo (S/)',
+    'ancho_banda': 'Ancho de Banda (Mbps)'
+}
+UNIDADES = {'latencia': 'ms', 'costo': 'S/', 'ancho_banda': 'Mbps'}
+MAPAS_COLOR = {'latencia': cm.Reds, 'costo': cm.Oranges, 'ancho_banda': cm.Greens}
+ETIQUETAS_BARRA = {
+    'latencia': 'Latencia (ms)',
+    'costo': 'Costo (S/ por MB)',
+    'ancho_banda': 'Ancho de Banda (Mbps)'
+}
+
+# Datos del proceso de trabajo (se llenan en _inicializar_proceso)
+_compartido = {}
+
+def datos_dibujo(red):
+    """
+    Lo que necesita un Lienzo, en tipos simples (se envía una vez a cada proceso):
+    ciudades, una conexión por par de ciudades (la primera del archivo), posiciones y grados
+    """
+    compacto = red.compacto
+    nombres = list(compacto.nombres)
+    conexiones = []
+    vistas = set()
+    for e, (a, b) in enumerate(zip(compacto.extremo_a.tolist(), compacto.extremo_b.tolist())):
+        par = (a, b) if a < b else (b, a)
+        if par not in vistas:
+            vistas.add(par)
+            conexiones.append((nombres[a], nombres[b], float(compacto.latencia[e]),
+                               float(compacto.costo[e]), float(compacto.ancho_banda[e])))
+    posiciones = red.posiciones_grafo()
+    return {
+        'ciudades': nombres,
+        'conexiones': conexiones,
+        'posiciones': {ciudad: (float(x), float(y)) for ciudad, (x, y) in posiciones.items()},
+        'grados': dict(zip(nombres, compacto.grados().tolist())),
+    }
+
+class Lienzo:
+    """Figura con la capa base de la red lista para guardar una imagen por ruta destacada"""
+
+    def __init__(self, datos, criterio_visual='latencia', mostrar_etiquetas=True, figura=None):
+        self.criterio_visual = criterio_visual
+        self.grados = datos['grados']
+        self.pos = datos['posiciones']
+        self.G = G = nx.Graph()
+        G.add_nodes_from(datos['ciudades'])
+        valores_criterio = []
+        for ciudad_a, ciudad_b, latencia, costo, ancho_banda in datos['conexiones']:
+            G.add_edge(ciudad_a, ciudad_b, latencia=latencia, costo=costo, ancho_banda=ancho_banda)
+            if criterio_visual in UNIDADES:
+                valores_criterio.append(G[ciudad_a][ciudad_b][criterio_visual])
+
+        # marcos: recorte 'tight' ya calculado por (líneas del título, dpi), solo con figura propia
+        self._marcos = None
+        if figura is None:
+            figura = Figure(figsize=(20, 14))
+            FigureCanvasAgg(figura)
+            self._marcos = {}
+        self.figura = figura
+        self.ax = ax = self.figura.gca()
+        self.rango = None
+
+        # Normalizar valores para colores y anchos
+        if valores_criterio:
+            min_val = min(valores_criterio)
+            max_val = max(valores_criterio)
+            self.rango = (min_val, max_val)
+            unidad = UNIDADES[criterio_visual]
+
+            # Crear mapas de colores y anchos para cada arista
+            edge_colors = []
+            edge_widths = []
+            edge_labels = {}
+            for edge in G.edges():
+                valor = G.edges[edge][criterio_visual]
+
+                # Normalizar valor (0-1)
+                valor_norm = (valor - min_val) / (max_val - min_val) if max_val > min_val else 0.5
+
+                # Para ancho de banda, invertir colores (mayor = mejor = verde)
+                if criterio_visual == 'ancho_banda':
+                    edge_colors.append(1 - valor_norm)
+                    edge_widths.append(1 + valor_norm * 4)  # Más ancho = mejor ancho de banda
+                else:
+                    edge_colors.append(valor_norm)
+                    edge_widths.append(1 + (1 - valor_norm) * 4)  # Más ancho = mejor (menor latencia/costo)
+
+                # Etiqueta con valor
+                if mostrar_etiquetas:
+                    if criterio_visual == 'costo':
+                        edge_labels[edge] = f"{valor:.3f}{unidad}"
+                    else:
+                        edge_labels[edge] = f"{valor:.1f}{unidad}"
+
+            # Dibujar aristas con colores y anchos basados en criterio
+            cmap = MAPAS_COLOR[criterio_visual]
+            nx.draw_networkx_edges(G, self.pos, edge_color=edge_colors, edge_cmap=cmap,
+                                   width=edge_widths, alpha=0.7, ax=ax)
+
+            # Agregar barra de colores
+            sm = cm.ScalarMappable(cmap=cmap, norm=Normalize(vmin=min_val, vmax=max_val))
+            sm.set_array([])
+            cbar = self.figura.colorbar(sm, ax=ax, shrink=0.8)
+            cbar.set_label(ETIQUETAS_BARRA[criterio_visual], rotation=270, labelpad=20)
+
+            # Mostrar etiquetas de valores en las conexiones
+            if mostrar_etiquetas and len(edge_labels) < 50:  # No mostrar si hay muchas conexiones
+                nx.draw_networkx_edge_labels(G, self.pos, edge_labels, font_size=6, alpha=0.8, ax=ax)
+
+        # Dibujar nodos (ciudades) con tamaños variables según conectividad
+        node_sizes = [1000 + self.grados[ciudad] * 200 for ciudad in G.nodes()]
+        nx.draw_networkx_nodes(G, self.pos, node_color='lightblue', node_size=node_sizes,
+                               alpha=0.9, edgecolors='black', ax=ax)
+
+        # Agregar etiquetas de las ciudades
+        nx.draw_networkx_labels(G, self.pos, font_size=9, font_weight='bold', ax=ax)
+        ax.axis('off')
+
+    def _capa_ruta(self, ruta_destacada):
+        """Aristas y ciudades de la ruta (por debajo de los nombres, como en el dibujo completo)"""
+        aristas_ruta = list(zip(ruta_destacada, ruta_destacada[1:]))
+        artistas = []
+        if aristas_ruta:
+            artistas.append(nx.draw_networkx_edges(self.G, self.pos, edgelist=aristas_ruta,
+                                                   edge_color='purple', width=6, alpha=0.9,
+                                                   style='dashed', ax=self.ax))
+        ruta_sizes = [1200 + self.grados[ciudad] * 200 for ciudad in ruta_destacada]
+        artistas.append(nx.draw_networkx_nodes(self.G, self.pos, nodelist=ruta_destacada,
+                                               node_color='gold', node_size=ruta_sizes, alpha=0.9,
+                                               edgecolors='purple', linewidths=3, ax=self.ax))
+        return artistas
+
+    def guardar(self, ruta_salida, ruta_destacada=None, dpi=DPI_IMAGEN):
+        """Guarda la imagen con la ruta destacada (el formato sale de la extensión del archivo)"""
+        artistas = self._capa_ruta(ruta_destacada) if ruta_destacada else []
+        try:
+            titulo = (f"Red ISP - Perú\nVisualización por "
+                      f"{CRITERIO_NOMBRES.get(self.criterio_visual, self.criterio_visual)}")
+            titulo += f"\n{self.G.number_of_nodes()} ciudades, {self.G.number_of_edges()} conexiones"
+            if ruta_destacada:
+                titulo += "\n" + texto_ruta(ruta_destacada)
+            self.ax.set_title(titulo, fontsize=16, fontweight='bold', pad=20)
+
+            # Agregar leyenda
+            legend_elements = [
+                Line2D([0], [0], color='lightblue', marker='o', linestyle='None',
+                       markersize=10, label='Ciudades (tamaño = conectividad)'),
+                Line2D([0], [0], color='gray', linewidth=2, alpha=0.7,
+                       label=f'Conexiones (color/grosor = {self.criterio_visual})')
+            ]
+            if ruta_destacada:
+                legend_elements.append(Line2D([0], [0], color='purple', linewidth=4, linestyle='--',
+                                              label='Ruta destacada'))
+            self.ax.legend(handles=legend_elements, loc='upper left', bbox_to_anchor=(0.02, 0.98))
+
+            if self._marcos is None:
+                self.figura.tight_layout()
+                self.figura.savefig(ruta_salida, dpi=dpi, bbox_inches='tight')
+                return
+            # el recorte solo depende del título y de la capa base: se calcula una vez por forma
+            # del título, y así cada imagen se dibuja una sola vez en vez de dos
+            clave = (titulo.count("\n"), dpi)
+            if clave not in self._marcos:
+                self.figura.tight_layout()
+                # sin motor de layout, savefig no hace la pasada de dibujo previa
+                self.figura.set_layout_engine(None)
+                self.figura.dpi = dpi
+                caja = self.figura.get_tightbbox(self.figura.canvas.get_renderer())
+                self._marcos[clave] = caja.padded(rcParams['savefig.pad_inches'])
+            self.figura.savefig(ruta_salida, dpi=dpi, bbox_inches=self._marcos[clave])
+        finally:
+            for artista in artistas:
+                artista.remove()
+
+def texto_ruta(ruta):
+    """
+    Línea del título con la ruta destacada; las rutas largas se parten en líneas de ANCHO_TITULO
+    caracteres y se abrevian por el medio (si no, el recorte 'tight' ensancha la imagen sin límite)
+    """
+    if len(ruta) > MAX_CIUDADES_TITULO:
+        mitad = MAX_CIUDADES_TITULO // 2
+        ruta = ruta[:mitad] + [f"… ({len(ruta) - 2 * mitad} ciudades más) …"] + ruta[-mitad:]
+    return textwrap.fill(f"Ruta destacada: {' → '.join(ruta)}", ANCHO_TITULO)
+
+def nombre_imagen(trabajo, formato='png'):
+    """Nombre de archivo de un trabajo (mismo esquema que el menú: ruta_<origen>_<destino>_<criterio>_<visual>)"""
+    if trabajo.get('archivo'):
+        base = os.path.splitext(os.path.basename(str(trabajo['archivo'])))[0]
+    else:
+        visual = trabajo.get('criterio_visual', 'latencia')
+        if trabajo.get('origen') and trabajo.get('destino'):
+            base = (f"ruta_{trabajo['origen']}_{trabajo['destino']}_"
+                    f"{trabajo.get('criterio', 'latencia')}_{visual}")
+        elif trabajo.get('ruta'):
+            base = f"ruta_{trabajo['ruta'][0]}_{trabajo['ruta'][-1]}_{visual}"
+        else:
+            base = f"red_isp_{visual}"
+    return f"{base}.{formato}"
+
+def calcular_ruta(red, origen, destino, criterio):
+    """Ruta de los menús, la API y los dibujos en lote: el criterio de ancho de banda maximiza el cuello de botella"""
+    return red.ruta_optima(origen, destino, criterio)
+
+def _preparar_trabajo(red, trabajo):
+    """Ruta a destacar de un trabajo (calculándola si trae origen/destino), o un mensaje de error"""
+    if trabajo.get('error'):
+        return None, trabajo['error']
+    visual = trabajo.get('criterio_visual', 'latencia')
+    if not isinstance(visual, str):
+        return None, f"criterio visual no válido: {visual}"
+    ruta = trabajo.get('ruta')
+    if ruta is not None:
+        if not isinstance(ruta, list) or not all(isinstance(c, str) and c in red.compacto.indice for c in ruta):
+            return None, "ruta no válida: todas sus ciudades deben existir en la red"
+        return ruta, None
+    if trabajo.get('origen') is None and trabajo.get('destino') is None:
+        return None, None  # red completa
+    for campo in ('origen', 'destino'):
+        if not isinstance(trabajo.get(campo), str) or trabajo[campo] not in red.compacto.indice:
+            return None, f"ciudad de {campo} no válida: {trabajo.get(campo)}"
+    criterio = trabajo.get('criterio', 'latencia')
+    if not isinstance(criterio, str) or criterio not in red.criterios:
+        return None, f"criterio no válido: {criterio}"
+    ruta, _ = calcular_ruta(red, trabajo['origen'], trabajo['destino'], criterio)
+    if ruta is None:
+        return None, "sin conexión"
+    return ruta, None
+
+def _inicializar_proceso(datos):
+    """Inicializador del pool: recibe los datos del dibujo una vez por proceso"""
+    _compartido['datos'] = datos
+    _compartido['lienzos'] = {}
+
+def _dibujar_tanda(tarea):
+    """Dibuja una tanda de imágenes que comparten capa base; devuelve (índice, error) de cada una"""
+    (criterio_visual, etiquetas), pendientes, dpi = tarea
+    lienzos = _compartido['lienzos']
+    resultados = []
+    try:
+        clave = (criterio_visual, etiquetas)
+        if clave not in lienzos:
+            lienzos[clave] = Lienzo(_compartido['datos'], criterio_visual, etiquetas)
+        lienzo = lienzos[clave]
+    except Exception as e:
+        return [(indice, f"no se pudo dibujar la capa base: {e}") for indice, _, _ in pendientes]
+    for indice, ruta, ruta_salida in pendientes:
+        try:
+            lienzo.guardar(ruta_salida, ruta, dpi)
+            resultados.append((indice, None))
+        except Exception as e:
+            resultados.append((indice, f"error al guardar: {e}"))
+    return resultados
+
+def renderizar_trabajos(red, trabajos, procesos=None, dpi=DPI_IMAGEN, formato='png',
+                        carpeta=CARPETA_IMAGENES):
+    """
+    Dibuja un flujo de trabajos y devuelve los resultados a medida que terminan
+    Cada resultado trae el índice del trabajo en la entrada, el archivo generado y la ruta,
+    o un error. Las rutas con origen/destino se calculan antes, en este proceso
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no válido: {formato} (opciones: {', '.join(FORMATOS)})")
+    os.makedirs(carpeta, exist_ok=True)
+
+    tandas = {}
+    for indice, trabajo in enumerate(trabajos):
+        ruta, error = _preparar_trabajo(red, trabajo)
+        resultado = {'indice': indice, 'criterio_visual': trabajo.get('criterio_visual', 'latencia')}
+        if 'id' in trabajo:
+            resultado['id'] = trabajo['id']
+        if error:
+            resultado['error'] = error
+            yield resultado
+            continue
+        resultado['archivo'] = os.path.join(carpeta, nombre_imagen(trabajo, formato))
+        resultado['ruta'] = ruta
+        clave = (resultado['criterio_visual'], bool(trabajo.get('etiquetas', True)))
+        tandas.setdefault(clave, []).append(resultado)
+
+    tareas = []
+    for clave, resultados in tandas.items():
+        for inicio in range(0, len(resultados), TAMANO_TANDA):
+            tanda = resultados[inicio:inicio + TAMANO_TANDA]
+            tareas.append((clave, [(r['indice'], r['ruta'], r['archivo']) for r in tanda], dpi))
+    if not tareas:
+        return
+    por_indice = {r['indice']: r for resultados in tandas.values() for r in resultados}
+
+    datos = datos_dibujo(red)
+    procesos = max(1, min(procesos or os.cpu_count() or 1, len(tareas)))
+    pool = None
+    if procesos > 1:
+        pool = Pool(procesos, initializer=_inicializar_proceso, initargs=(datos,))
+        dibujadas = pool.imap_unordered(_dibujar_tanda, tareas)
+    else:
+        _inicializar_proceso(datos)
+        dibujadas = map(_dibujar_tanda, tareas)
+    try:
+        for resultados in dibujadas:
+            for indice, error in resultados:
+                resultado = por_indice.pop(indice)
+                if error:
+                    resultado['error'] = error
+                    del resultado['archivo']
+                yield resultado
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        else:
+            _compartido.clear()
@@ -0,0 +1,275 @@
+"""
+Núcleo de caminos mínimos sobre arreglos CSR (offsets/destinos/pesos por arco)
+No depende de RedISP, así que lo usan tanto la red como los procesos de trabajo
+"""
+import heapq
+
+import numpy as np
+
+# Criterio que no es una suma de pesos: se resuelve con el camino más ancho (máximo cuello de botella)
+CRITERIO_MAS_ANCHO = 'ancho_banda'
+
+def dijkstra_csr(offsets, destinos, pesos, fuente, destino=None, estadisticas=None):
+    """
+    Dijkstra sobre listas CSR; devuelve listas de distancias y predecesores por id
+    Si se indica destino (id), termina apenas ese nodo queda asentado
+    estadisticas (dict opcional) recibe los nodos expandidos, los arcos revisados y
+    las entradas insertadas / extraídas de la cola de prioridad
+    """
+    n = len(offsets) - 1
+    
+    # inicializar distancias
+    infinito = float('inf')
+    dist = [infinito] * n
+    previo = [-1] * n
+    dist[fuente] = 0
+    expandidos = obsoletos = aristas = 0
+    
+    # cola de prioridad
+    cola = [(0, fuente)]
+    
+    while cola:
+        distancia_actual, u = heapq.heappop(cola)
+        
+        # si ya procesamos esta ciudad con mejor distancia, continuar
+        if distancia_actual > dist[u]:
+            obsoletos += 1
+            continue
+        expandidos += 1
+        
+        # punto a punto: el destino ya tiene su distancia definitiva
+        if u == destino:
+            break
+        
+        # revisar todas las conexiones de esta ciudad (peso precalculado por arco)
+        inicio, fin = offsets[u], offsets[u + 1]
+        aristas += fin - inicio
+        for i in range(inicio, fin):
+            v = destinos[i]
+            nueva_distancia = distancia_actual + pesos[i]
+            
+            # si encontramos mejor camino, actualizar
+            if nueva_distancia < dist[v]:
+                dist[v] = nueva_distancia
+                previo[v] = u
+                heapq.heappush(cola, (nueva_distancia, v))
+    
+    if estadisticas is not None:
+        registrar_busqueda(estadisticas, expandidos, obsoletos, aristas, len(cola))
+    return dist, previo
+
+def registrar_busqueda(estadisticas, expandidos, obsoletos, aristas, pendientes):
+    """
+    Contadores de una búsqueda con cola de prioridad; las entradas extraídas son las
+    expandidas más las obsoletas, y las insertadas además las que quedaron en la cola
+    """
+    extraidos = expandidos + obsoletos
+    estadisticas['expandidos'] = expandidos
+    estadisticas['aristas_revisadas'] = aristas
+    estadisticas['extraidos_cola'] = extraidos
+    estadisticas['insertados_cola'] = extraidos + pendientes
+
+def camino_desde_previo(previo, destino):
+    """Reconstruye la secuencia de ids desde el origen del árbol hasta destino"""
+    camino = [destino]
+    u = previo[destino]
+    while u >= 0:
+        camino.append(u)
+        u = previo[u]
+    camino.reverse()
+    return camino
+
+def indice_arcos(offsets, destinos, arista, pesos=None):
+    """
+    Índice (u, v) -> id de conexión: claves u * n + v ordenadas y la conexión de cada clave
+    Con conexiones paralelas se queda la primera de la lista de adyacencia de u; con pesos
+    por arco, la de menor peso (la que usa Dijkstra; en empate, la primera)
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    n = len(offsets) - 1
+    colas = np.repeat(np.arange(n, dtype=np.int64), np.diff(offsets))
+    claves = colas * n + np.asarray(destinos, dtype=np.int64)
+    if pesos is None:
+        claves, primero = np.unique(claves, return_index=True)
+    else:
+        # ordenar por clave y dentro de cada clave por peso (estable: en empate gana la primera)
+        orden = np.lexsort((np.asarray(pesos), claves))
+        claves, primero = np.unique(claves[orden], return_index=True)
+        primero = orden[primero]
+    return claves, np.asarray(arista)[primero].astype(np.int32)
+
+def buscar_aristas(claves, arista_de_clave, n, u, v):
+    """Ids de conexión entre los pares (u[i], v[i]) con una búsqueda vectorizada; -1 si no existe"""
+    buscadas = np.asarray(u, dtype=np.int64) * n + np.asarray(v, dtype=np.int64)
+    if len(claves) == 0:
+        return np.full(buscadas.shape, -1, dtype=np.int64)
+    posicion = np.minimum(np.searchsorted(claves, buscadas), len(claves) - 1)
+    return np.where(claves[posicion] == buscadas, arista_de_clave[posicion], -1)
+
+def metricas_camino(claves, arista_de_clave, n, latencia, costo, ancho_banda, camino):
+    """
+    Latencia y costo totales, ancho de banda limitante y saltos de un camino de ids
+    Entre cada par de ciudades se usa la primera conexión de la lista de adyacencia
+    (las columnas pueden venir ya combinadas por par, como GrafoCompacto.ancho_banda_par)
+    """
+    if len(camino) < 2:
+        return None
+    
+    aristas = buscar_aristas(claves, arista_de_clave, n, camino[:-1], camino[1:])
+    aristas = aristas[aristas >= 0]
+    
+    # suma en el orden del camino (mismo redondeo que sumar conexión por conexión)
+    latencia_total = 0
+    costo_total = 0
+    for valor in latencia[aristas].tolist():
+        latencia_total += valor
+    for valor in costo[aristas].tolist():
+        costo_total += valor
+    ancho_banda_minimo = min(ancho_banda[aristas].tolist(), default=float('inf'))
+    
+    return {
+        'latencia_total': latencia_total,
+        'costo_total': costo_total,
+        'ancho_banda_limitante': ancho_banda_minimo,
+        'saltos': len(camino) - 1
+    }
+
+def metricas_caminos(claves, arista_de_clave, n, latencia, costo, ancho_banda, caminos):
+    """
+    Métricas de muchos caminos a la vez: los saltos de todos los caminos se concatenan,
+    se buscan sus conexiones en una sola operación y se reducen por segmento.
+    Devuelve arreglos (latencia_total, costo_total, ancho_banda_limitante, saltos);
+    los caminos de menos de dos ciudades quedan con saltos = 0 y métricas NaN
+    """
+    saltos = np.array([max(len(camino) - 1, 0) for camino in caminos], dtype=np.int64)
+    latencia_total = np.full(len(caminos), np.nan)
+    costo_total = np.full(len(caminos), np.nan)
+    ancho_minimo = np.full(len(caminos), np.nan)
+    con_saltos = np.flatnonzero(saltos > 0)
+    if len(con_saltos) == 0:
+        return latencia_total, costo_total, ancho_minimo, saltos
+    
+    tramos = [np.asarray(caminos[i], dtype=np.int64) for i in con_saltos.tolist()]
+    u = np.concatenate([tramo[:-1] for tramo in tramos])
+    v = np.concatenate([tramo[1:] for tramo in tramos])
+    aristas = buscar_aristas(claves, arista_de_clave, n, u, v)
+    
+    # saltos sin conexión aportan 0 a las sumas y no limitan el ancho de banda
+    existe = aristas >= 0
+    seguras = np.where(existe, aristas, 0)
+    inicios = np.zeros(len(con_saltos), dtype=np.int64)
+    np.cumsum(saltos[con_saltos][:-1], out=inicios[1:])
+    latencia_total[con_saltos] = np.add.reduceat(np.where(existe, latencia[seguras], 0.0), inicios)
+    costo_total[con_saltos] = np.add.reduceat(np.where(existe, costo[seguras], 0.0), inicios)
+    ancho_minimo[con_saltos] = np.minimum.reduceat(np.where(existe, ancho_banda[seguras], np.inf), inicios)
+    return latencia_total, costo_total, ancho_minimo, saltos
+
+def metricas_arbol(claves, arista_de_clave, latencia, costo, ancho_banda, previo, fuente):
+    """
+    Métricas del camino desde fuente hasta cada nodo de su árbol de caminos mínimos
+    Cada nodo suma su conexión a las métricas de su padre, nivel por nivel, así que
+    el costo es lineal en el número de nodos (no en la suma de las longitudes de los caminos).
+    Devuelve arreglos por nodo (latencia_total, costo_total, ancho_banda_limitante, saltos);
+    los nodos sin camino quedan con latencia infinita y saltos = -1
+    """
+    previo = np.asarray(previo, dtype=np.int64)
+    n = len(previo)
+    tiene_padre = previo >= 0
+    hijos = np.flatnonzero(tiene_padre)
+    
+    # profundidad de cada nodo por saltos de puntero (log de la altura del árbol)
+    salto = np.where(tiene_padre, previo, np.arange(n))
+    profundidad = tiene_padre.astype(np.int64)
+    while True:
+        siguiente = salto[salto]
+        if np.array_equal(siguiente, salto):
+            break
+        profundidad += profundidad[salto]
+        salto = siguiente
+    
+    arista_padre = np.full(n, -1, dtype=np.int64)
+    arista_padre[hijos] = buscar_aristas(claves, arista_de_clave, n, previo[hijos], hijos)
+    latencia_total = np.full(n, np.inf)
+    latencia_total[fuente] = 0.0
+    costo_total = np.zeros(n)
+    ancho_minimo = np.full(n, np.inf)
+    
+    # recorrer por niveles: cada nivel depende solo del anterior
+    por_nivel = hijos[np.argsort(profundidad[hijos], kind='stable')]
+    limites = np.searchsorted(profundidad[por_nivel], np.arange(1, profundidad.max(initial=0) + 2))
+    for inicio, fin in zip(limites[:-1].tolist(), limites[1:].tolist()):
+        nivel = por_nivel[inicio:fin]
+        padres = previo[nivel]
+        e = arista_padre[nivel]
+        latencia_total[nivel] = latencia_total[padres] + latencia[e]
+        costo_total[nivel] = costo_total[padres] + costo[e]
+        ancho_minimo[nivel] = np.minimum(ancho_minimo[padres], ancho_banda[e])
+    
+    saltos = np.where(np.isinf(latencia_total), -1, profundidad)
+    return latencia_total, costo_total, ancho_minimo, saltos
+
+def camino_mas_ancho(offsets, destinos, capacidad, fuente, destino=None, estadisticas=None):
+    """
+    Camino de máximo cuello de botella (widest path): Dijkstra con cola de máximos
+    sobre el menor ancho de banda del camino. Devuelve listas (ancho limitante, predecesor)
+    por id; el origen tiene ancho infinito y las ciudades sin camino quedan con 0.
+    Si se indica destino (id), termina apenas ese nodo queda asentado
+    """
+    n = len(offsets) - 1
+    
+    ancho = [0.0] * n
+    previo = [-1] * n
+    ancho[fuente] = float('inf')
+    expandidos = 0
+    
+    # heapq es de mínimos: se guarda el ancho con signo negativo
+    cola = [(-ancho[fuente], fuente)]
+    
+    while cola:
+        ancho_actual, u = heapq.heappop(cola)
+        ancho_actual = -ancho_actual
+        
+        if ancho_actual < ancho[u]:
+            continue
+        expandidos += 1
+        
+        if u == destino:
+            break
+        
+        for i in range(offsets[u], offsets[u + 1]):
+            v = destinos[i]
+            nuevo_ancho = min(ancho_actual, capacidad[i])
+            
+            if nuevo_ancho > ancho[v]:
+                ancho[v] = nuevo_ancho
+                previo[v] = u
+                heapq.heappush(cola, (-nuevo_ancho, v))
+    
+    if estadisticas is not None:
+        estadisticas['expandidos'] = expandidos
+    return ancho, previo
+
+def camino_min_saltos(offsets, destinos, capacidad, fuente, destino, ancho_minimo):
+    """
+    Búsqueda en anchura usando solo arcos con capacidad >= ancho_minimo
+    Devuelve el camino de ids con menos saltos de fuente a destino, o None
+    """
+    previo = {fuente: -1}
+    frontera = [fuente]
+    while frontera and destino not in previo:
+        siguiente = []
+        for u in frontera:
+            for i in range(offsets[u], offsets[u + 1]):
+                v = destinos[i]
+                if v not in previo and capacidad[i] >= ancho_minimo:
+                    previo[v] = u
+                    siguiente.append(v)
+        frontera = siguiente
+    
+    if destino not in previo:
+        return None
+    camino = [destino]
+    while previo[camino[-1]] >= 0:
+        camino.append(previo[camino[-1]])
+    camino.reverse()
+    return camino
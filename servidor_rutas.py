@@ -0,0 +1,364 @@
+"""
+API HTTP (JSON) de rutas sobre una sola RedISP cargada en memoria
+Endpoints (GET, parámetros en la consulta):
+  /api/ciudades                                   ciudades de la red
+  /api/ruta?origen=&destino=&criterio=            ruta, distancia y métricas
+  /api/comparar?origen=&destino=                  la ruta de cada criterio
+  /api/desde?origen=&criterio=                    rutas desde una ciudad a todas las demás
+  /api/estadisticas                               ciudades, conexiones, grados y cachés
+  /api/imagen?origen=&destino=&criterio=&visual=  PNG de la ruta destacada (en salidas/)
+El servidor es asyncio (HTTP/1.1 con keep-alive, sin dependencias): las respuestas ya
+calculadas se sirven desde el bucle de eventos, y los cálculos van a un pool de hilos.
+RedISP no es segura entre hilos, así que los cálculos pasan de a uno por un candado; por
+eso las respuestas se guardan ya serializadas por versión del grafo, y las consultas
+idénticas que llegan mientras otra igual se está calculando esperan ese mismo resultado
+en vez de repetirlo. Las imágenes se dibujan con su propio candado (matplotlib tampoco es
+segura entre hilos) sobre una capa base por criterio visual, así un dibujo no frena las rutas.
+"""
+import asyncio
+import json
+import os
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+os.environ.setdefault('MPLBACKEND', 'Agg')  # dibujar sin ventana
+
+from main import ARCHIVO_COORDENADAS, ARCHIVO_RED, calcular_ruta, cargar_red
+from render_lote import (CARPETA_IMAGENES, CRITERIO_NOMBRES, DPI_IMAGEN, DPI_PREVIA, Lienzo, datos_dibujo,
+                         nombre_imagen)
+
+PUERTO = 8000
+# Hilos que hacen los cálculos y los dibujos (las conexiones las atiende el bucle de eventos)
+HILOS_CALCULO = 8
+# Segundos que una conexión keep-alive puede quedar inactiva antes de cerrarla
+ESPERA_CONEXION = 15
+# Respuestas guardadas (LRU); las de versiones anteriores del grafo ya no se consultan
+MAX_RESPUESTAS = 10_000
+
+ENDPOINTS = ('ciudades', 'ruta', 'comparar', 'desde', 'estadisticas', 'imagen')
+RAZONES = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+class ConsultaInvalida(ValueError):
+    """Parámetros de una consulta que no se pueden resolver (respuesta 400)"""
+
+def _json(datos):
+    return json.dumps(datos, ensure_ascii=False).encode('utf-8')
+
+def _finito(valor):
+    """Distancia para JSON: sin conexión (infinito) se informa como null"""
+    return None if valor is None or valor == float('inf') else float(valor)
+
+class ServicioRutas:
+    """
+    Consultas de la API sobre una RedISP compartida, seguro entre hilos
+    preparar() valida una consulta y devuelve su clave y la función que la calcula;
+    las respuestas calculadas se guardan por (versión del grafo, consulta)
+    """
+
+    def __init__(self, red, carpeta_imagenes=CARPETA_IMAGENES, dpi=DPI_IMAGEN):
+        self.red = red
+        self.carpeta_imagenes = carpeta_imagenes
+        self.dpi = dpi
+        self.candado_red = threading.Lock()  # un cálculo a la vez sobre la red
+        self.candado_dibujo = threading.Lock()  # un dibujo a la vez (matplotlib)
+        self.candado = threading.Lock()  # respuestas y contadores
+        self.respuestas = OrderedDict()  # (versión, consulta) -> JSON en bytes o archivo de imagen, LRU
+        self.lienzos = {}  # (versión, criterio visual) -> Lienzo con la capa base dibujada
+        self.contadores = {'consultas': 0, 'en_cache': 0, 'coalescidas': 0, 'calculadas': 0, 'imagenes': 0}
+
+    def contar(self, **valores):
+        with self.candado:
+            for clave, valor in valores.items():
+                self.contadores[clave] += valor
+
+    def clave(self, consulta):
+        return (self.red.version, consulta)
+
+    def buscar(self, clave):
+        """Respuesta guardada para la clave, o None (las imágenes borradas de disco no cuentan)"""
+        with self.candado:
+            self.contadores['consultas'] += 1
+            valor = self.respuestas.get(clave)
+            if valor is None:
+                return None
+            if clave[1][0] == 'imagen' and not os.path.exists(valor):
+                del self.respuestas[clave]  # se borró de salidas/ (por ejemplo, desde la galería)
+                return None
+            self.respuestas.move_to_end(clave)
+            self.contadores['en_cache'] += 1
+            return valor
+
+    def calcular(self, clave, calcular):
+        """Calcula una consulta y guarda la respuesta"""
+        valor = calcular()
+        with self.candado:
+            self.contadores['calculadas'] += 1
+            self.respuestas[clave] = valor
+            if len(self.respuestas) > MAX_RESPUESTAS:
+                self.respuestas.popitem(last=False)
+        return valor
+
+    def consultar(self, endpoint, parametros):
+        """Respuesta de un endpoint (uso directo desde Python, sin servidor)"""
+        consulta, calcular = self.preparar(endpoint, parametros)
+        if consulta is None:
+            return calcular()
+        clave = self.clave(consulta)
+        valor = self.buscar(clave)
+        return valor if valor is not None else self.calcular(clave, calcular)
+
+    def preparar(self, endpoint, parametros):
+        """
+        (consulta, calcular) de un endpoint con sus parámetros (diccionario de textos)
+        consulta es None si la respuesta no se guarda; ConsultaInvalida si algo no es válido
+        """
+        def parametro(nombre, defecto=None):
+            valor = parametros.get(nombre) or defecto
+            if valor is None:
+                raise ConsultaInvalida(f"falta el parámetro {nombre}")
+            return valor
+
+        if endpoint == 'ciudades':
+            return ('ciudades',), lambda: _json({'ciudades': sorted(self.red.ciudades)})
+        if endpoint == 'estadisticas':
+            return None, self._estadisticas
+        if endpoint == 'desde':
+            origen, criterio = parametro('origen'), parametro('criterio', 'latencia')
+            self._validar(origen, criterio=criterio)
+            return ('desde', origen, criterio), lambda: self._desde(origen, criterio)
+
+        origen, destino = parametro('origen'), parametro('destino')
+        if endpoint == 'comparar':
+            self._validar(origen, destino)
+            return ('comparar', origen, destino), lambda: self._comparar(origen, destino)
+        criterio = parametro('criterio', 'latencia')
+        self._validar(origen, destino, criterio)
+        if endpoint == 'ruta':
+            return ('ruta', origen, destino, criterio), lambda: self._ruta_json(origen, destino, criterio)
+        if endpoint == 'imagen':
+            visual = parametro('visual', 'latencia')
+            if visual not in CRITERIO_NOMBRES:
+                raise ConsultaInvalida(f"criterio visual no válido: {visual}")
+            return (('imagen', origen, destino, criterio, visual),
+                    lambda: self._imagen(origen, destino, criterio, visual))
+        raise ConsultaInvalida(f"endpoint desconocido: {endpoint}")
+
+    def _validar(self, origen=None, destino=None, criterio=None):
+        indice = self.red.compacto.indice
+        for campo, ciudad in (('origen', origen), ('destino', destino)):
+            if ciudad is not None and ciudad not in indice:
+                raise ConsultaInvalida(f"ciudad de {campo} no válida: {ciudad}")
+        if criterio is not None and criterio not in self.red.criterios:
+            raise ConsultaInvalida(f"criterio no válido: {criterio}")
+
+    def _ruta(self, origen, destino, criterio):
+        """Ruta como en los menús (ancho de banda = camino más ancho) con sus métricas"""
+        ruta, distancia = calcular_ruta(self.red, origen, destino, criterio)
+        resultado = {'criterio': criterio, 'ruta': ruta, 'distancia': _finito(distancia) if ruta else None}
+        if ruta is None:
+            resultado['error'] = "sin conexión"
+        else:
+            resultado['metricas'] = self.red.obtener_metricas_ruta(ruta) or {
+                'latencia_total': 0, 'costo_total': 0, 'ancho_banda_limitante': None, 'saltos': 0}
+        return resultado
+
+    def _ruta_json(self, origen, destino, criterio):
+        with self.candado_red:
+            resultado = self._ruta(origen, destino, criterio)
+        return _json({'origen': origen, 'destino': destino, **resultado})
+
+    def _comparar(self, origen, destino):
+        with self.candado_red:
+            rutas = {criterio: self._ruta(origen, destino, criterio) for criterio in self.red.criterios}
+        return _json({'origen': origen, 'destino': destino, 'rutas': rutas})
+
+    def _desde(self, origen, criterio):
+        with self.candado_red:
+            rutas = self.red.metricas_desde_origen(origen, criterio)
+            sin_conexion = sorted(ciudad for ciudad in self.red.ciudades if ciudad != origen and ciudad not in rutas)
+        return _json({'origen': origen, 'criterio': criterio,
+                      'rutas': {ciudad: {'ruta': ruta, 'metricas': metricas}
+                                for ciudad, (ruta, metricas) in sorted(rutas.items())},
+                      'sin_conexion': sin_conexion})
+
+    def _estadisticas(self):
+        with self.candado_red:
+            red = self.red
+            grados = dict(zip(red.ciudades, red.compacto.grados().tolist()))
+            datos = {
+                'ciudades': len(red.ciudades),
+                'conexiones': red._contar_conexiones(),
+                'version': red.version,
+                'ciudad_mas_conectada': max(grados, key=grados.get) if grados else None,
+                'grados': dict(sorted(grados.items())),
+                'cache_arboles': red.estadisticas_cache(),
+            }
+        with self.candado:
+            datos['servicio'] = {**self.contadores, 'respuestas_guardadas': len(self.respuestas)}
+        return _json(datos)
+
+    def _imagen(self, origen, destino, criterio, visual):
+        """Dibuja la ruta destacada con el nombre de los menús (así la muestra la galería); devuelve el archivo"""
+        version = self.red.version
+        with self.candado_red:
+            ruta, _ = calcular_ruta(self.red, origen, destino, criterio)
+            if ruta is None:
+                raise ConsultaInvalida(f"sin conexión entre {origen} y {destino}")
+            lienzo = self.lienzos.get((version, visual))
+            datos = datos_dibujo(self.red) if lienzo is None else None
+        archivo = os.path.join(self.carpeta_imagenes, nombre_imagen(
+            {'origen': origen, 'destino': destino, 'criterio': criterio, 'criterio_visual': visual}))
+        with self.candado_dibujo:
+            if lienzo is None:
+                lienzo = self.lienzos.get((version, visual))
+            if lienzo is None:
+                # la capa base de una versión anterior ya no sirve
+                self.lienzos = {clave: anterior for clave, anterior in self.lienzos.items() if clave[0] == version}
+                lienzo = self.lienzos[(version, visual)] = Lienzo(datos, visual, mostrar_etiquetas=False)
+            os.makedirs(self.carpeta_imagenes, exist_ok=True)
+            lienzo.guardar(archivo, ruta, self.dpi)
+        self.contar(imagenes=1)
+        return archivo
+
+def _leer_archivo(archivo):
+    """Contenido y ETag (fecha de modificación y tamaño) de un archivo"""
+    with open(archivo, 'rb') as entrada:
+        estado = os.fstat(entrada.fileno())
+        return entrada.read(), f'"{estado.st_mtime_ns:x}-{estado.st_size:x}"'
+
+def _respuesta(estado, cuerpo=b"", tipo='application/json', mantener=True, cabeceras=(), solo_cabeceras=False):
+    """Respuesta HTTP/1.1 completa en bytes"""
+    lineas = [f"HTTP/1.1 {estado} {RAZONES[estado]}", f"Content-Type: {tipo}", f"Content-Length: {len(cuerpo)}"]
+    lineas += [f"{nombre}: {valor}" for nombre, valor in cabeceras]
+    if not mantener:
+        lineas.append("Connection: close")
+    cabecera = ("\r\n".join(lineas) + "\r\n\r\n").encode('latin-1')
+    return cabecera if solo_cabeceras or estado == 304 else cabecera + cuerpo
+
+class ServidorRutas:
+    """Servidor HTTP asyncio de la API: cada conexión es una tarea del bucle de eventos"""
+
+    def __init__(self, servicio, hilos=HILOS_CALCULO):
+        self.servicio = servicio
+        self.pool = ThreadPoolExecutor(hilos, thread_name_prefix='rutas')
+        self.en_curso = {}  # clave -> Future del cálculo en curso (solo se usa desde el bucle)
+
+    async def resolver(self, endpoint, parametros):
+        """Respuesta de un endpoint: guardada, compartida con un cálculo idéntico en curso o calculada"""
+        consulta, calcular = self.servicio.preparar(endpoint, parametros)
+        bucle = asyncio.get_running_loop()
+        if consulta is None:
+            return await bucle.run_in_executor(self.pool, calcular)
+        clave = self.servicio.clave(consulta)
+        valor = self.servicio.buscar(clave)
+        if valor is not None:
+            return valor
+        futuro = self.en_curso.get(clave)
+        if futuro is not None:
+            self.servicio.contar(coalescidas=1)
+        else:
+            futuro = self.en_curso[clave] = bucle.run_in_executor(self.pool, self.servicio.calcular, clave, calcular)
+            futuro.add_done_callback(lambda _: self.en_curso.pop(clave, None))
+        # shield: si el cliente se desconecta, el cálculo sigue para los demás que lo esperan
+        return await asyncio.shield(futuro)
+
+    async def _responder(self, metodo, objetivo, cabeceras, mantener):
+        partes = urlsplit(objetivo)
+        endpoint = partes.path[len('/api/'):] if partes.path.startswith('/api/') else None
+        if endpoint not in ENDPOINTS:
+            return _respuesta(404, _json({'error': f"no existe {partes.path}"}), mantener=mantener)
+        if metodo not in ('GET', 'HEAD'):
+            return _respuesta(405, _json({'error': f"método no permitido: {metodo}"}), mantener=mantener,
+                              cabeceras=[('Allow', 'GET, HEAD')])
+        try:
+            valor = await self.resolver(endpoint, dict(parse_qsl(partes.query)))
+            if endpoint != 'imagen':
+                return _respuesta(200, valor, mantener=mantener, solo_cabeceras=metodo == 'HEAD')
+            contenido, etiqueta = await asyncio.get_running_loop().run_in_executor(self.pool, _leer_archivo, valor)
+        except ConsultaInvalida as e:
+            return _respuesta(400, _json({'error': str(e)}), mantener=mantener)
+        except Exception:
+            traceback.print_exc()
+            return _respuesta(500, _json({'error': "error interno"}), mantener=mantener)
+        estado = 304 if cabeceras.get('if-none-match') == etiqueta else 200
+        return _respuesta(estado, contenido, 'image/png', mantener, solo_cabeceras=metodo == 'HEAD',
+                          cabeceras=[('ETag', etiqueta), ('Cache-Control', 'no-cache')])
+
+    async def atender(self, lector, escritor):
+        """Atiende las peticiones de una conexión en orden hasta que se cierre o quede inactiva"""
+        try:
+            while True:
+                try:
+                    cabecera = await asyncio.wait_for(lector.readuntil(b"\r\n\r\n"), ESPERA_CONEXION)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                    break
+                try:
+                    linea, *lineas = cabecera.decode('latin-1').split("\r\n")
+                    metodo, objetivo, version = linea.split(" ")
+                    cabeceras = {}
+                    for campo in lineas:
+                        if campo:
+                            nombre, _, valor = campo.partition(":")
+                            cabeceras[nombre.strip().lower()] = valor.strip()
+                    largo = int(cabeceras.get('content-length', 0))
+                    if 'transfer-encoding' in cabeceras or largo < 0:
+                        raise ValueError(cabeceras.get('transfer-encoding'))
+                except ValueError:
+                    escritor.write(_respuesta(400, _json({'error': "petición HTTP inválida"}), mantener=False))
+                    break
+                if largo:
+                    await lector.readexactly(largo)  # la API no usa cuerpos: se descartan
+                conexion = cabeceras.get('connection', '').lower()
+                mantener = conexion == 'keep-alive' if version == 'HTTP/1.0' else conexion != 'close'
+                escritor.write(await self._responder(metodo, objetivo, cabeceras, mantener))
+                await escritor.drain()
+                if not mantener:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self, host='0.0.0.0', puerto=PUERTO):
+        servidor = await asyncio.start_server(self.atender, host, puerto, backlog=1024)
+        async with servidor:
+            await servidor.serve_forever()
+
+def parsear_argumentos(argv=None):
+    """Lee los argumentos de la línea de comandos"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="API HTTP de rutas de la red ISP")
+    parser.add_argument('archivo', nargs='?', default=ARCHIVO_RED,
+                        help="CSV con las conexiones de la red (por defecto: red_isp_peru.csv)")
+    parser.add_argument('coordenadas', nargs='?', default=ARCHIVO_COORDENADAS,
+                        help="CSV opcional ciudad,latitud,longitud para A* geográfico")
+    parser.add_argument('--host', default='0.0.0.0', help="dirección en la que escuchar")
+    parser.add_argument('--puerto', type=int, default=PUERTO, help=f"puerto (por defecto {PUERTO})")
+    parser.add_argument('--hilos', type=int, default=HILOS_CALCULO,
+                        help="hilos para los cálculos y dibujos que no están en caché")
+    parser.add_argument('--dpi', type=int, default=DPI_IMAGEN,
+                        help=f"resolución de las imágenes de /api/imagen (por defecto {DPI_IMAGEN})")
+    parser.add_argument('--previa', action='store_true',
+                        help=f"imágenes a {DPI_PREVIA} dpi (reemplaza a --dpi)")
+    parser.add_argument('--sin-snapshot', action='store_true',
+                        help="leer siempre el CSV sin usar ni guardar snapshots")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    argumentos = parsear_argumentos()
+    red = cargar_red(argumentos.archivo, argumentos.coordenadas, snapshot=not argumentos.sin_snapshot)
+    servicio = ServicioRutas(red, dpi=DPI_PREVIA if argumentos.previa else argumentos.dpi)
+    servidor = ServidorRutas(servicio, argumentos.hilos)
+    print(f"🌐 API de rutas en http://{argumentos.host}:{argumentos.puerto}/api/ "
+          f"({argumentos.hilos} hilos de cálculo)")
+    try:
+        asyncio.run(servidor.servir(argumentos.host, argumentos.puerto))
+    except KeyboardInterrupt:
+        print("\n👋 Servidor detenido")
+    finally:
+        servidor.pool.shutdown(wait=False)
@@ -0,0 +1,102 @@
+"""
+Tablas de rutas todos-contra-todos (distancias y siguiente salto) en paralelo
+El grafo CSR y los pesos se publican una sola vez en memoria compartida de solo
+lectura; cada proceso calcula bloques de orígenes y escribe sus filas directamente
+en las matrices compartidas de salida, sin enviar el grafo por cada tarea.
+"""
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+import memoria_compartida
+from rutas_csr import dijkstra_csr
+
+# Datos del proceso de trabajo (se llenan en _inicializar_proceso)
+_compartido = {}
+
+def _inicializar_proceso(descriptores):
+    """Inicializador del pool: abre los bloques compartidos una vez por proceso"""
+    bloques, arreglos = memoria_compartida.abrir(descriptores)
+    _preparar(arreglos)
+    _compartido['bloques'] = bloques  # mantener vivos los bloques abiertos
+
+def _preparar(arreglos):
+    """Guarda los arreglos del proceso y convierte la estructura a listas para el bucle interno"""
+    _compartido['offsets'] = arreglos['offsets'].tolist()
+    _compartido['destinos'] = arreglos['destinos'].tolist()
+    _compartido['pesos'] = arreglos['pesos']
+    _compartido['pesos_listas'] = {}
+    _compartido['distancias'] = arreglos['distancias']
+    _compartido['predecesores'] = arreglos['predecesores']
+    _compartido['fuentes'] = arreglos['fuentes'].tolist() if 'fuentes' in arreglos else None
+
+def _calcular_filas(tarea):
+    """Calcula las filas [inicio, fin) (árboles de esos orígenes) para el criterio k"""
+    k, inicio, fin = tarea
+    pesos_listas = _compartido['pesos_listas']
+    if k not in pesos_listas:
+        pesos_listas[k] = _compartido['pesos'][k].tolist()
+    offsets, destinos, pesos = _compartido['offsets'], _compartido['destinos'], pesos_listas[k]
+
+    distancias = _compartido['distancias']
+    predecesores = _compartido['predecesores']
+    fuentes = _compartido['fuentes']
+    for fila in range(inicio, fin):
+        fuente = fuentes[fila] if fuentes is not None else fila
+        dist, previo = dijkstra_csr(offsets, destinos, pesos, fuente)
+        distancias[k, fila, :] = dist
+        predecesores[k, fila, :] = previo
+    return fin - inicio
+
+def calcular_tablas(offsets, destinos, pesos, procesos=None, tamano_bloque=None, fuentes=None):
+    """
+    Árboles de caminos mínimos desde todos los orígenes para uno o más criterios
+    pesos: matriz (criterios x arcos) con el peso de cada arco por criterio
+    Devuelve (distancias, predecesores) de forma (criterios, n, n); la fila [k, t]
+    es el árbol con raíz t, así que predecesores[k, t, s] es el siguiente salto de s hacia t
+    fuentes (opcional): calcular solo los árboles de esas raíces; la fila i es la de fuentes[i]
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    destinos = np.asarray(destinos, dtype=np.int32)
+    pesos = np.atleast_2d(np.asarray(pesos, dtype=np.float64))
+    criterios, n = pesos.shape[0], len(offsets) - 1
+    filas = n if fuentes is None else len(fuentes)
+    entradas = {'offsets': offsets, 'destinos': destinos, 'pesos': pesos}
+    if fuentes is not None:
+        entradas['fuentes'] = np.asarray(fuentes, dtype=np.int64)
+
+    procesos = procesos or os.cpu_count() or 1
+    procesos = max(1, min(procesos, filas))
+    if tamano_bloque is None:
+        # varios bloques por proceso para repartir bien la carga
+        tamano_bloque = max(1, filas // (procesos * 8))
+    tareas = [(k, inicio, min(inicio + tamano_bloque, filas))
+              for k in range(criterios) for inicio in range(0, filas, tamano_bloque)]
+
+    if procesos == 1:
+        # sin pool: mismo código de trabajo sobre arreglos locales
+        distancias = np.empty((criterios, filas, n), dtype=np.float64)
+        predecesores = np.empty((criterios, filas, n), dtype=np.int32)
+        _preparar(dict(entradas, distancias=distancias, predecesores=predecesores))
+        try:
+            for tarea in tareas:
+                _calcular_filas(tarea)
+        finally:
+            _compartido.clear()
+        return distancias, predecesores
+
+    bloques, arreglos, descriptores = memoria_compartida.publicar(dict(
+        entradas,
+        distancias=((criterios, filas, n), np.float64),
+        predecesores=((criterios, filas, n), np.int32),
+    ))
+    try:
+        with Pool(procesos, initializer=_inicializar_proceso, initargs=(descriptores,)) as pool:
+            for _ in pool.imap_unordered(_calcular_filas, tareas):
+                pass
+
+        # copiar fuera de la memoria compartida antes de liberarla
+        return arreglos['distancias'].copy(), arreglos['predecesores'].copy()
+    finally:
+        memoria_compartida.liberar(bloques, arreglos)
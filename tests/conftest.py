@@ -0,0 +1,35 @@
+"""Utilidades comunes de las pruebas: redes pequeñas en CSV temporales"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generador_red import generar_red  # noqa: E402
+from main import RedISP  # noqa: E402
+
+ENCABEZADO = "ciudad_origen,ciudad_destino,latencia_ms,costo_soles,ancho_banda_mbps\n"
+
+@pytest.fixture
+def red_desde_filas(tmp_path):
+    """Construye una RedISP a partir de filas (a, b, latencia, costo, ancho_banda)"""
+    def construir(filas):
+        archivo = tmp_path / "red.csv"
+        archivo.write_text(ENCABEZADO + "".join(f"{a},{b},{lat},{costo},{ancho}\n"
+                                                for a, b, lat, costo, ancho in filas), encoding='utf-8')
+        red = RedISP()
+        assert red.cargar_red_desde_archivo(str(archivo)) is not False
+        return red
+    return construir
+
+@pytest.fixture
+def red_generada(tmp_path):
+    """Construye una RedISP sintética con generador_red (semilla fija)"""
+    def construir(ciudades, semilla=0, **opciones):
+        archivo = tmp_path / f"red_{ciudades}_{semilla}.csv"
+        generar_red(str(archivo), ciudades, semilla=semilla, **opciones)
+        red = RedISP()
+        assert red.cargar_red_desde_archivo(str(archivo)) is not False
+        return red
+    return construir
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from main import GrafoCompacto
+from rutas_csr import dijkstra_csr
+
+CRITERIOS = ('latencia', 'costo')
+
+def _preparar(red_generada):
+    """Red con árboles en caché y tablas de todos los criterios, lista para cambiarla"""
+    red = red_generada(60, semilla=11)
+    origenes = red.ciudades[::6]
+    for criterio in CRITERIOS:
+        for origen in origenes:
+            red.dijkstra_optimizado(origen, criterio)
+    red.calcular_tablas(CRITERIOS, procesos=1)
+    return red, origenes
+
+def _enlace_usado(red, origen):
+    """Un tramo del árbol de latencia de origen (su caída cambia ese árbol)"""
+    _, anteriores = red.dijkstra_optimizado(origen, 'latencia')
+    ciudad, padre = next(iter(anteriores.items()))
+    return padre, ciudad
+
+def _verificar(red, origenes):
+    """Los árboles reparados (de la caché) y las tablas coinciden con un Dijkstra desde cero"""
+    compacto = red.compacto
+    for criterio in CRITERIOS:
+        tabla = red.tablas[criterio]['distancias']
+        for origen in origenes:
+            fuente = compacto.indice[origen]
+            aciertos = red.aciertos_cache
+            distancias, anteriores = red.dijkstra_optimizado(origen, criterio)
+            assert red.aciertos_cache == aciertos + 1  # el árbol se reparó, no se recalculó
+            nuevas, _ = red._dijkstra_ids(fuente, criterio)
+            np.testing.assert_allclose([distancias[ciudad] for ciudad in compacto.nombres], nuevas)
+            np.testing.assert_allclose(tabla[fuente], nuevas)
+            # cada predecesor es un tramo real del camino mínimo
+            pesos = red.pesos_criterio(criterio)
+            for ciudad, padre in anteriores.items():
+                peso = min(pesos[e] for e in red._conexiones_entre(padre, ciudad))
+                assert np.isclose(distancias[padre] + peso, distancias[ciudad])
+
+def test_agregar_conexion_repara_arboles(red_generada):
+    red, origenes = _preparar(red_generada)
+    distancias, _ = red.dijkstra_optimizado(origenes[0], 'latencia')
+    lejana = max(distancias, key=distancias.get)
+    red.agregar_conexion(origenes[0], lejana, 0.5, 0.001, 1000)
+    _verificar(red, origenes)
+
+def test_eliminar_conexion_repara_arboles(red_generada):
+    red, origenes = _preparar(red_generada)
+    red.eliminar_conexion(*_enlace_usado(red, origenes[1]))
+    _verificar(red, origenes)
+
+@pytest.mark.parametrize('factor', [0.1, 20.0])
+def test_actualizar_conexion_repara_arboles(red_generada, factor):
+    red, origenes = _preparar(red_generada)
+    ciudad_a, ciudad_b = _enlace_usado(red, origenes[2])
+    e = red._conexiones_entre(ciudad_a, ciudad_b)[0]
+    compacto = red.compacto
+    red.actualizar_conexion(ciudad_a, ciudad_b, latencia=float(compacto.latencia[e]) * factor,
+                            costo=float(compacto.costo[e]) * factor)
+    _verificar(red, origenes)
+
+def test_barrido_fallas_coincide_con_quitar_cada_conexion(red_generada):
+    red = red_generada(25, semilla=12)
+    compacto = red.compacto
+    n = compacto.num_ciudades
+    pesos = red.pesos_criterio('latencia')
+    antes = red.calcular_tablas(('latencia',), procesos=1)['latencia']['distancias']
+
+    afectados = 0
+    for impacto in red.barrido_fallas('latencia', procesos=1):
+        e, = impacto['conexiones']
+        conservar = np.ones(compacto.num_conexiones, dtype=bool)
+        conservar[e] = False
+        sin_e = GrafoCompacto(compacto.nombres, compacto.extremo_a[conservar], compacto.extremo_b[conservar],
+                              compacto.latencia[conservar], compacto.costo[conservar],
+                              compacto.ancho_banda[conservar])
+        offsets, destinos, arista = sin_e.listas()
+        pesos_arco = pesos[conservar][arista].tolist()
+        esperados = {}
+        for s in range(n):
+            despues, _ = dijkstra_csr(offsets, destinos, pesos_arco, s)
+            for t in range(s + 1, n):
+                if despues[t] != antes[s, t]:
+                    esperados[(compacto.nombres[s], compacto.nombres[t])] = (antes[s, t], despues[t])
+
+        obtenidos = {(origen, destino): (previa, nueva) for origen, destino, previa, nueva in impacto['pares']}
+        assert obtenidos.keys() == esperados.keys()
+        for par, (previa, nueva) in esperados.items():
+            assert np.allclose(obtenidos[par], (previa, nueva))
+        assert impacto['pares_desconectados'] == sum(np.isinf(nueva) for _, nueva in esperados.values())
+        afectados += len(esperados)
+    assert afectados > 0
@@ -0,0 +1,117 @@
+import gzip
+
+import numpy as np
+import pytest
+
+from cargador_csv import POLITICAS_DUPLICADOS, _parsear_bloque_por_filas, es_encabezado, parsear_bloque
+from main import RedISP
+
+ENCABEZADO = "ciudad_origen,ciudad_destino,latencia_ms,costo_soles,ancho_banda_mbps"
+
+# (línea, motivo esperado o None si la fila es válida)
+LINEAS = [
+    ("Lima,Cusco,10,0.5,1000", None),
+    ("Lima,Arequipa,abc,0.5,1000", "valor numérico inválido"),
+    ("Cusco,Puno,8,0.3", "se esperaban 5 columnas y hay 4"),
+    ("Puno,Arequipa,-1,0.3,500", "latencia o costo negativo"),
+    (" ,Tacna,4,0.2,100", "ciudad vacía"),
+    ("Tacna,Arequipa,6,0.2,0", "ancho de banda no positivo"),
+    ("Tacna,Moquegua,nan,0.2,100", "valor no finito"),
+    ('"Cerro de Pasco",Huanuco,7,0.4,200', None),
+    ("Arequipa,Puno,5,0.1,800", None),
+]
+
+def _escribir(tmp_path, lineas, encabezado=True, comprimido=False):
+    contenido = "\n".join(([ENCABEZADO] if encabezado else []) + list(lineas)) + "\n"
+    if comprimido:
+        archivo = tmp_path / "red.csv.gz"
+        with gzip.open(archivo, "wt", encoding='utf-8') as salida:
+            salida.write(contenido)
+    else:
+        archivo = tmp_path / "red.csv"
+        archivo.write_text(contenido, encoding='utf-8')
+    return str(archivo)
+
+@pytest.mark.parametrize('linea,esperado', [
+    (ENCABEZADO, True),
+    ("origen,destino,latencia,costo,ancho", True),
+    ("Lima,Cusco,10,0.5,1000", False),
+    ("Lima,Cusco,10", False),
+])
+def test_es_encabezado(linea, esperado):
+    assert es_encabezado(linea) is esperado
+
+def test_bloque_con_filas_danadas_informa_cada_error():
+    lineas = [linea for linea, _ in LINEAS]
+    numeros = list(range(10, 10 + len(lineas)))
+    origenes, destinos, latencia, costo, ancho, errores = parsear_bloque(numeros, lineas)
+    esperados = [(numero, motivo, linea) for numero, (linea, motivo) in zip(numeros, LINEAS) if motivo]
+    assert errores == esperados
+    assert origenes.tolist() == ['Lima', 'Cerro de Pasco', 'Arequipa']
+    assert destinos.tolist() == ['Cusco', 'Huanuco', 'Puno']
+    assert latencia.tolist() == [10, 7, 5] and costo.tolist() == [0.5, 0.4, 0.1]
+    assert ancho.tolist() == [1000, 200, 800]
+
+def test_validacion_vectorizada_coincide_con_la_fila_por_fila():
+    # sin columnas faltantes ni textos en las métricas el bloque se convierte de una vez
+    lineas = [linea for linea, motivo in LINEAS if motivo not in ("valor numérico inválido",
+                                                                   "se esperaban 5 columnas y hay 4")]
+    numeros = list(range(1, len(lineas) + 1))
+    rapido, lento = parsear_bloque(numeros, lineas), _parsear_bloque_por_filas(numeros, lineas)
+    assert rapido[5] == lento[5] and len(rapido[5]) == 4
+    for columna_rapida, columna_lenta in zip(rapido[:5], lento[:5]):
+        assert np.array_equal(columna_rapida, columna_lenta)
+
+@pytest.mark.parametrize('comprimido', [False, True])
+@pytest.mark.parametrize('tamano_bloque', [2, 3, 1000])
+def test_carga_en_bloques_omite_filas_danadas(tmp_path, tamano_bloque, comprimido):
+    archivo = _escribir(tmp_path, [linea for linea, _ in LINEAS], comprimido=comprimido)
+    red = RedISP()
+    assert red.cargar_red_desde_archivo(archivo, tamano_bloque=tamano_bloque)
+    reporte = red.reporte_carga
+    assert (reporte['filas'], reporte['cargadas'], reporte['errores']) == (9, 3, 6)
+    # la línea 1 es el encabezado
+    assert [numero for numero, _, _ in reporte['ejemplos_error']] == [3, 4, 5, 6, 7, 8]
+    assert sorted(red.ciudades) == ['Arequipa', 'Cerro de Pasco', 'Cusco', 'Huanuco', 'Lima', 'Puno']
+
+def test_archivo_sin_encabezado(tmp_path):
+    red = RedISP()
+    assert red.cargar_red_desde_archivo(_escribir(tmp_path, ["Lima,Cusco,10,0.5,1000", "Cusco,Puno,8,0.3,500"],
+                                                  encabezado=False))
+    assert red.reporte_carga['cargadas'] == 2 and red.reporte_carga['errores'] == 0
+    assert sorted(red.ciudades) == ['Cusco', 'Lima', 'Puno']
+
+DUPLICADOS = [
+    "Lima,Cusco,10,0.5,100",
+    "Cusco,Lima,5,0.9,200",
+    "Lima,Cusco,20,0.1,50",
+    "Lima,Cusco,8,0.7,900",
+    "Cusco,Puno,3,0.2,300",
+]
+# métricas (latencia, costo, ancho) de la conexión Lima-Cusco que queda con cada política
+ELEGIDA = {
+    'primera': (10, 0.5, 100),
+    'ultima': (8, 0.7, 900),
+    'min_latencia': (5, 0.9, 200),
+    'min_costo': (20, 0.1, 50),
+    'max_ancho_banda': (8, 0.7, 900),
+}
+
+@pytest.mark.parametrize('politica', POLITICAS_DUPLICADOS)
+def test_politicas_de_duplicados(tmp_path, politica):
+    red = RedISP()
+    assert red.cargar_red_desde_archivo(_escribir(tmp_path, DUPLICADOS), politica_duplicados=politica)
+    compacto = red.compacto
+    conexiones = red._conexiones_entre('Lima', 'Cusco')
+    metricas = sorted((compacto.latencia[e], compacto.costo[e], compacto.ancho_banda[e]) for e in conexiones)
+    if politica == 'conservar':
+        assert len(metricas) == 4 and red.reporte_carga['duplicados_descartados'] == 0
+    else:
+        assert metricas == [ELEGIDA[politica]]
+        assert red.reporte_carga['duplicados_descartados'] == 3
+    assert len(red._conexiones_entre('Cusco', 'Puno')) == 1
+    assert red.politica_duplicados == politica
+
+def test_politica_desconocida(tmp_path):
+    with pytest.raises(ValueError):
+        RedISP().cargar_red_desde_archivo(_escribir(tmp_path, DUPLICADOS), politica_duplicados='promedio')
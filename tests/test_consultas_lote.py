@@ -0,0 +1,28 @@
+import numpy as np
+
+def _consultas(red, cantidad, criterio, semilla=0):
+    nombres = red.compacto.nombres
+    generador = np.random.default_rng(semilla)
+    pares = generador.integers(0, len(nombres), size=(cantidad, 2)).tolist()
+    return [{'origen': nombres[s], 'destino': nombres[t], 'criterio': criterio} for s, t in pares]
+
+def test_lote_ancho_banda_coincide_con_ruta_mas_ancha(red_generada):
+    red = red_generada(120, semilla=2)
+    consultas = _consultas(red, 60, 'ancho_banda')
+    # un origen con varios destinos (árbol completo) además de los de un solo destino
+    consultas += [dict(consulta, origen=consultas[0]['origen']) for consulta in consultas[1:6]]
+    for resultado in red.rutas_en_lote(consultas, procesos=1):
+        consulta = consultas[resultado['indice']]
+        ruta, ancho = red.ruta_mas_ancha(consulta['origen'], consulta['destino'])
+        assert resultado['ruta'] == ruta
+        if consulta['origen'] != consulta['destino']:
+            assert resultado['distancia'] == ancho
+            assert resultado['metricas']['ancho_banda_limitante'] == ancho
+
+def test_lote_latencia_coincide_con_ruta_optima(red_generada):
+    red = red_generada(80, semilla=4)
+    consultas = _consultas(red, 30, 'latencia')
+    for resultado in red.rutas_en_lote(consultas, procesos=1):
+        consulta = consultas[resultado['indice']]
+        _, distancia = red.ruta_optima(consulta['origen'], consulta['destino'], 'latencia')
+        assert np.isclose(resultado['distancia'], distancia)
@@ -0,0 +1,35 @@
+import os
+
+import numpy as np
+
+from main import RedISP
+
+ARCHIVO_RED = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "red_isp_peru.csv")
+
+def _red_ejemplo():
+    red = RedISP()
+    assert red.cargar_red_desde_archivo(ARCHIVO_RED) is not False
+    return red
+
+def test_registrar_de_nuevo_descarta_las_tablas():
+    red = _red_ejemplo()
+    red.registrar_criterio('mio', latencia=1)
+    red.calcular_tablas(('mio',), procesos=1)
+    red.registrar_criterio('mio', costo=1)
+    assert 'mio' not in red.tablas
+    red.calcular_tablas(('mio',), procesos=1)
+    _, distancia = red.ruta_desde_tablas('Tacna', 'Iquitos', 'mio')
+    _, esperada = red.ruta_optima('Tacna', 'Iquitos', 'mio')
+    assert np.isclose(distancia, esperada)
+
+def test_tablas_descartadas_no_vuelven_en_el_snapshot(tmp_path):
+    red = _red_ejemplo()
+    red.registrar_criterio('mio', latencia=1)
+    red.calcular_tablas(('mio',), procesos=1)
+    red.registrar_criterio('mio', costo=1)
+    carpeta = str(tmp_path / "red.snapshot")
+    red.guardar_snapshot(carpeta)
+
+    otra = RedISP()
+    assert otra.cargar_snapshot(carpeta)
+    assert 'mio' not in otra.tablas
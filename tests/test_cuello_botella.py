@@ -0,0 +1,51 @@
+import pytest
+
+from render_lote import calcular_ruta
+
+# la ruta directa A - C es más corta pero más angosta que el rodeo por X, Y, Z
+FILAS_RODEO = [('A', 'X', 1, 1, 900), ('X', 'Y', 1, 1, 900), ('Y', 'Z', 1, 1, 900), ('Z', 'C', 1, 1, 900),
+               ('A', 'C', 1, 1, 700)]
+
+def test_ancho_banda_es_el_camino_mas_ancho_en_todas_las_entradas(red_desde_filas):
+    red = red_desde_filas(FILAS_RODEO)
+    esperada = (['A', 'X', 'Y', 'Z', 'C'], 900)
+    assert calcular_ruta(red, 'A', 'C', 'ancho_banda') == esperada
+    assert red.ruta_optima('A', 'C', 'ancho_banda') == esperada
+    anchos, anteriores = red.dijkstra_optimizado('A', 'ancho_banda')
+    assert anchos['C'] == 900 and anteriores['C'] == 'Z'
+    ruta, metricas = red.metricas_desde_origen('A', 'ancho_banda')['C']
+    assert ruta == esperada[0] and metricas['ancho_banda_limitante'] == 900
+
+@pytest.mark.parametrize('operacion', [
+    lambda red: red.k_rutas_optimas('A', 'C', 1, 'ancho_banda'),
+    lambda red: red.calcular_tablas(('ancho_banda',), procesos=1),
+    lambda red: red.preparar_jerarquias(('ancho_banda',)),
+    lambda red: next(red.barrido_fallas('ancho_banda', procesos=1)),
+    lambda red: red.simular_trafico(([0], [1], [100.0]), 'ancho_banda'),
+    lambda red: red.registrar_criterio('ancho_banda', latencia=1),
+])
+def test_operaciones_aditivas_rechazan_ancho_banda(red_desde_filas, operacion):
+    red = red_desde_filas(FILAS_RODEO)
+    with pytest.raises(ValueError):
+        operacion(red)
+    assert not red.es_aditivo('ancho_banda')
+
+# dos conexiones A - B en paralelo: la primera de 100 Mbps y la segunda de 1500 Mbps
+FILAS_PARALELAS = [('A', 'B', 1, 1, 100), ('A', 'B', 1, 1, 1500), ('B', 'C', 1, 1, 1500),
+                   ('A', 'C', 1, 1, 900)]
+
+def test_camino_mas_ancho_usa_la_conexion_paralela_mas_ancha(red_desde_filas):
+    red = red_desde_filas(FILAS_PARALELAS)
+    assert red.ruta_mas_ancha('A', 'C') == (['A', 'B', 'C'], 1500)
+    assert red.obtener_metricas_ruta(['A', 'B', 'C'])['ancho_banda_limitante'] == 1500
+    assert red.metricas_rutas([['A', 'B', 'C']])[0]['ancho_banda_limitante'] == 1500
+    assert red.ancho_maximo_entre('A', 'C') == 1500
+    assert red.metricas_desde_origen('A', 'ancho_banda')['C'][1]['ancho_banda_limitante'] == 1500
+    anchos = [metricas['ancho_banda_limitante'] for _, metricas in red.rutas_pareto('A', 'C')]
+    assert max(anchos) == 1500
+
+def test_lote_usa_la_conexion_paralela_mas_ancha(red_desde_filas):
+    red = red_desde_filas(FILAS_PARALELAS)
+    resultado, = red.rutas_en_lote([{'origen': 'A', 'destino': 'C', 'criterio': 'ancho_banda'}], procesos=1)
+    assert resultado['ruta'] == ['A', 'B', 'C']
+    assert resultado['distancia'] == resultado['metricas']['ancho_banda_limitante'] == 1500
@@ -0,0 +1,36 @@
+import numpy as np
+
+from flujo_maximo import arbol_gomory_hu, flujo_maximo
+
+def _componente(padre, i):
+    """Ciudades que quedan con i al quitar el tramo i - padre[i] del árbol"""
+    hijos = {}
+    for v in range(1, len(padre)):
+        hijos.setdefault(padre[v], []).append(v)
+    lado, pila = {i}, [i]
+    while pila:
+        for hijo in hijos.get(pila.pop(), ()):
+            lado.add(hijo)
+            pila.append(hijo)
+    return lado
+
+def test_tramos_del_arbol_son_cortes_minimos(red_generada):
+    red = red_generada(40, semilla=3)
+    offsets, destinos, gemelo, capacidad = red._red_flujo()
+    compacto = red.compacto
+    padre, valor = arbol_gomory_hu(offsets, destinos, gemelo, capacidad)
+
+    for i in range(1, len(padre)):
+        lado = _componente(padre, i)
+        assert padre[i] not in lado
+        en_lado = np.isin(compacto.extremo_a, list(lado)) != np.isin(compacto.extremo_b, list(lado))
+        corte = compacto.ancho_banda[en_lado].sum()
+        minimo, _ = flujo_maximo(offsets, destinos, gemelo, capacidad, i, padre[i])
+        assert np.isclose(valor[i], minimo)
+        assert np.isclose(corte, minimo)
+
+def test_flujo_maximo_entre_coincide_con_dinic(red_generada):
+    red = red_generada(25, semilla=1)
+    nombres = red.compacto.nombres
+    for origen, destino in [(nombres[0], nombres[-1]), (nombres[3], nombres[7]), (nombres[10], nombres[2])]:
+        assert np.isclose(red.flujo_maximo_entre(origen, destino), red.corte_minimo(origen, destino)['flujo'])
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+from PIL import Image
+
+import galeria
+
+NOMBRE = 'ruta_Lima_Cusco_costo_latencia.png'
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    salidas = tmp_path / 'salidas'
+    salidas.mkdir()
+    monkeypatch.setattr(galeria, 'CARPETA_SALIDAS', str(salidas))
+    monkeypatch.setattr(galeria, 'CARPETA_MINIATURAS', str(salidas / '.miniaturas'))
+    monkeypatch.setattr(galeria, 'indice', galeria.IndiceSalidas(str(salidas)))
+    monkeypatch.setattr(galeria, '_paginas', {})
+    monkeypatch.setattr(galeria, '_generador', [])
+    Image.new('RGBA', (800, 600), (200, 30, 30, 255)).save(salidas / NOMBRE)
+    yield galeria.app.test_client()
+    # la página encola miniaturas en segundo plano: terminarlas antes de restaurar las carpetas
+    for generador in galeria._generador:
+        with generador.candado:
+            pendientes = list(generador.pendientes.values())
+        for listo in pendientes:
+            listo.wait(galeria.ESPERA_MINIATURA)
+
+def _fecha(nombre):
+    return os.stat(os.path.join(galeria.CARPETA_SALIDAS, nombre)).st_mtime_ns
+
+@pytest.mark.parametrize('nombre,esperado', [
+    ('ruta_Lima_Cusco_costo_latencia.png', ('Lima', 'Cusco', 'costo', 'latencia')),
+    ('ruta_Lima_Cusco_ancho_banda_costo.png', ('Lima', 'Cusco', 'ancho_banda', 'costo')),
+    ('ruta_Lima_Cusco_ancho_banda.png', ('Lima', 'Cusco', None, 'ancho_banda')),
+    ('ruta_Lima_Cusco_latencia.png', ('Lima', 'Cusco', None, 'latencia')),
+    ('grafo_completo.png', (None, None, None, None)),
+])
+def test_describir_imagen(nombre, esperado):
+    descripcion = galeria.describir_imagen(nombre)
+    assert tuple(descripcion[campo] for campo in galeria.FILTROS) == esperado
+
+def test_imagen_con_etag_responde_304(cliente):
+    respuesta = cliente.get(f'/img/{NOMBRE}')
+    assert respuesta.status_code == 200
+    etiqueta = respuesta.headers['ETag']
+    assert etiqueta.strip('"') == galeria.etiqueta_archivo(os.stat(os.path.join(galeria.CARPETA_SALIDAS, NOMBRE)))
+    assert 'immutable' not in respuesta.headers.get('Cache-Control', '')
+    respuesta = cliente.get(f'/img/{NOMBRE}', headers={'If-None-Match': etiqueta})
+    assert respuesta.status_code == 304 and not respuesta.data
+
+def test_imagen_versionada_es_inmutable(cliente):
+    version = cliente.get(f'/img/{NOMBRE}').headers['ETag'].strip('"')
+    respuesta = cliente.get(f'/img/{NOMBRE}?v={version}')
+    control = respuesta.headers['Cache-Control']
+    assert 'immutable' in control and f'max-age={galeria.MAX_EDAD_VERSIONADA}' in control
+    # una versión que ya no es la vigente se revalida
+    respuesta = cliente.get(f'/img/{NOMBRE}?v=0-0')
+    assert 'immutable' not in respuesta.headers.get('Cache-Control', '')
+
+def test_miniatura_deja_de_estar_vigente_al_cambiar_la_imagen(cliente):
+    respuesta = cliente.get(f'/miniatura/{NOMBRE}')
+    assert respuesta.status_code == 200 and respuesta.mimetype == 'image/jpeg'
+    assert galeria.miniatura_vigente(NOMBRE)
+    assert os.stat(galeria.ruta_miniatura(NOMBRE)).st_mtime_ns == _fecha(NOMBRE)
+
+    fecha = _fecha(NOMBRE) + 5_000_000_000
+    os.utime(os.path.join(galeria.CARPETA_SALIDAS, NOMBRE), ns=(fecha, fecha))
+    assert not galeria.miniatura_vigente(NOMBRE)
+    galeria.indice.actualizar(forzar=True)
+    respuesta = cliente.get(f'/miniatura/{NOMBRE}')
+    assert respuesta.status_code == 200
+    assert galeria.miniatura_vigente(NOMBRE)
+    assert os.stat(galeria.ruta_miniatura(NOMBRE)).st_mtime_ns == fecha
+
+def test_miniatura_versionada_con_la_version_de_la_imagen(cliente):
+    version = galeria.etiqueta_archivo(os.stat(os.path.join(galeria.CARPETA_SALIDAS, NOMBRE)))
+    respuesta = cliente.get(f'/miniatura/{NOMBRE}?v={version}')
+    assert respuesta.status_code == 200
+    assert 'immutable' in respuesta.headers['Cache-Control']
+
+def test_galeria_responde_304_si_no_cambio(cliente):
+    respuesta = cliente.get('/')
+    assert respuesta.status_code == 200 and NOMBRE.encode() in respuesta.data
+    respuesta = cliente.get('/', headers={'If-None-Match': respuesta.headers['ETag']})
+    assert respuesta.status_code == 304
@@ -0,0 +1,26 @@
+import pytest
+
+from generador_red import MODELOS, generar_red
+
+def _pares(archivo):
+    with open(archivo, encoding='utf-8') as entrada:
+        next(entrada)
+        return [tuple(sorted(linea.split(', ')[:2])) for linea in entrada]
+
+@pytest.mark.parametrize('modelo', MODELOS)
+@pytest.mark.parametrize('ciudades,grado_medio', [(20, 30), (300, 12), (3000, 4)])
+def test_sin_pares_repetidos(tmp_path, modelo, ciudades, grado_medio):
+    archivo = str(tmp_path / "red.csv")
+    resumen = generar_red(archivo, ciudades, modelo, grado_medio=grado_medio, semilla=5)
+    pares = _pares(archivo)
+    assert len(pares) == resumen['conexiones'] == len(set(pares))
+    assert all(a != b for a, b in pares)
+    assert resumen['conexiones'] <= ciudades * (ciudades - 1) // 2
+
+def test_libre_escala_denso_sin_repetidos_entre_bloques(tmp_path, monkeypatch):
+    # bloques chicos: los pares extra de un bloque no se repiten en los siguientes
+    monkeypatch.setattr('generador_red.TAMANO_BLOQUE', 16)
+    archivo = str(tmp_path / "red.csv")
+    resumen = generar_red(archivo, 60, grado_medio=10, semilla=2)
+    pares = _pares(archivo)
+    assert len(pares) == len(set(pares)) == resumen['conexiones'] == 300
@@ -0,0 +1,67 @@
+import random
+
+import numpy as np
+import pytest
+
+from main import RedISP
+
+CRITERIOS = ('latencia', 'costo', 'compuesto')
+
+def _pares(red, cantidad, semilla=0):
+    generador = random.Random(semilla)
+    return [tuple(generador.sample(red.ciudades, 2)) for _ in range(cantidad)]
+
+def _consultar(red, origen, destino, criterio):
+    """ruta_optima sin pasar por la caché de árboles, para que responda la jerarquía"""
+    red.limpiar_cache()
+    ruta, distancia = red.ruta_optima(origen, destino, criterio)
+    assert red.ultima_busqueda['algoritmo'] == 'jerarquia_contraccion'
+    return ruta, distancia
+
+@pytest.mark.parametrize('criterio', CRITERIOS)
+def test_jerarquia_coincide_con_dijkstra(red_generada, criterio):
+    red = red_generada(150, semilla=7)
+    red.preparar_jerarquias((criterio,))
+    for origen, destino in _pares(red, 40):
+        _, distancia = _consultar(red, origen, destino, criterio)
+        distancias, _ = red.dijkstra_optimizado(origen, criterio)
+        assert np.isclose(distancia, distancias[destino])
+    assert red.verificar_jerarquias(criterio, 50)['errores'] == 0
+
+def test_atajos_se_despliegan_en_conexiones_reales(red_generada):
+    red = red_generada(150, semilla=8)
+    red.preparar_jerarquias(('latencia',))
+    assert red.jerarquias['latencia'].num_atajos() > 0
+    compacto = red.compacto
+    pesos = red.pesos_criterio('latencia')
+    for origen, destino in _pares(red, 40, semilla=1):
+        ruta, distancia = _consultar(red, origen, destino, 'latencia')
+        assert ruta[0] == origen and ruta[-1] == destino
+        ids = [compacto.indice[ciudad] for ciudad in ruta]
+        # con conexiones paralelas la ruta usa la más liviana de cada tramo
+        tramos = [min(pesos[e] for e in red._conexiones_entre(ruta[i], ruta[i + 1]))
+                  for i in range(len(ruta) - 1)]
+        assert len(set(ids)) == len(ids)
+        assert np.isclose(sum(tramos), distancia)
+
+def test_jerarquias_guardadas_responden_igual(red_generada, tmp_path):
+    red = red_generada(120, semilla=9)
+    red.preparar_jerarquias(('latencia', 'costo'))
+    pares = _pares(red, 30, semilla=2)
+    esperadas = {(o, d, c): _consultar(red, o, d, c) for o, d in pares for c in ('latencia', 'costo')}
+
+    archivo = str(tmp_path / "jerarquias.npz")
+    red.guardar_jerarquias(archivo)
+    carpeta = str(tmp_path / "red.snapshot")
+    red.guardar_snapshot(carpeta)
+
+    desde_npz = RedISP()
+    desde_npz.cargar_snapshot(carpeta)
+    desde_npz.jerarquias = {}
+    assert desde_npz.cargar_jerarquias(archivo)
+    desde_snapshot = RedISP()
+    assert desde_snapshot.cargar_snapshot(carpeta)
+    for otra in (desde_npz, desde_snapshot):
+        assert set(otra.jerarquias) == {'latencia', 'costo'}
+        for (origen, destino, criterio), esperada in esperadas.items():
+            assert _consultar(otra, origen, destino, criterio) == esperada
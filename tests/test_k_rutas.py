@@ -0,0 +1,68 @@
+import itertools
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+def _filas(n=12, extra=18, semilla=5):
+    """Anillo más cuerdas al azar, sin conexiones paralelas"""
+    generador = random.Random(semilla)
+    nombres = [f"C{i:02d}" for i in range(n)]
+    pares = {(i, (i + 1) % n) for i in range(n)}
+    candidatos = [par for par in itertools.combinations(range(n), 2)
+                  if par not in pares and par[::-1] not in pares]
+    pares |= set(generador.sample(candidatos, extra))
+    return [(nombres[a], nombres[b], generador.randint(1, 40), 0.01, 100) for a, b in sorted(pares)]
+
+def _grafo(filas):
+    grafo = nx.Graph()
+    for a, b, latencia, _, _ in filas:
+        grafo.add_edge(a, b, weight=latencia)
+    return grafo
+
+def _costo(grafo, ruta):
+    return sum(grafo[u][v]['weight'] for u, v in zip(ruta, ruta[1:]))
+
+PARES = [('C00', 'C06'), ('C03', 'C10'), ('C01', 'C02')]
+
+@pytest.mark.parametrize('origen,destino', PARES)
+def test_k_rutas_coinciden_con_networkx(red_desde_filas, origen, destino):
+    filas = _filas()
+    red = red_desde_filas(filas)
+    grafo = _grafo(filas)
+    rutas = red.k_rutas_optimas(origen, destino, 8, 'latencia')
+    esperadas = list(itertools.islice(nx.shortest_simple_paths(grafo, origen, destino, weight='weight'), 8))
+
+    assert len(rutas) == len(esperadas)
+    costos = [costo for _, costo in rutas]
+    assert costos == sorted(costos)
+    np.testing.assert_allclose(costos, [_costo(grafo, ruta) for ruta in esperadas])
+    for ruta, costo in rutas:
+        assert len(set(ruta)) == len(ruta)  # sin ciclos
+        assert ruta[0] == origen and ruta[-1] == destino
+        assert all(grafo.has_edge(u, v) for u, v in zip(ruta, ruta[1:]))
+        assert np.isclose(_costo(grafo, ruta), costo)
+    assert len({tuple(ruta) for ruta, _ in rutas}) == len(rutas)
+
+@pytest.mark.parametrize('origen,destino', PARES)
+@pytest.mark.parametrize('modo', ['enlaces', 'ciudades'])
+def test_rutas_disjuntas_son_las_mas_cortas_que_respetan_las_anteriores(red_desde_filas, origen, destino, modo):
+    filas = _filas()
+    red = red_desde_filas(filas)
+    grafo = _grafo(filas)
+    rutas = red.k_rutas_optimas(origen, destino, 5, 'latencia', disjuntas=modo)
+
+    restante = grafo.copy()
+    for ruta, costo in rutas:
+        assert all(restante.has_edge(u, v) for u, v in zip(ruta, ruta[1:]))
+        assert np.isclose(costo, nx.shortest_path_length(restante, origen, destino, weight='weight'))
+        if modo == 'enlaces':
+            restante.remove_edges_from(zip(ruta, ruta[1:]))
+        else:
+            restante.remove_nodes_from(ruta[1:-1])
+            if len(ruta) == 2:
+                restante.remove_edge(origen, destino)
+    # si se pidieron más de las que existen, ya no queda ninguna ruta
+    if len(rutas) < 5:
+        assert not nx.has_path(restante, origen, destino)
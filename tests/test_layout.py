@@ -0,0 +1,9 @@
+from layout_red import MAX_CIUDADES_SPRING
+
+def test_layout_sin_scipy_en_el_limite_de_spring(red_desde_filas):
+    # networkx pasa al solver de SciPy (no es dependencia) desde MAX_CIUDADES_SPRING ciudades
+    n = MAX_CIUDADES_SPRING
+    red = red_desde_filas([(f"C{i:03d}", f"C{(i + 1) % n:03d}", 1, 1, 100) for i in range(n)])
+    red.carpeta_layouts = None
+    posiciones = red.posiciones_grafo()
+    assert len(posiciones) == n
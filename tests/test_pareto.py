@@ -0,0 +1,69 @@
+import itertools
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+def _filas(n=9, extra=8, semilla=3):
+    """Anillo más cuerdas al azar (sin conexiones paralelas) con métricas que compiten entre sí"""
+    generador = random.Random(semilla)
+    nombres = [f"C{i}" for i in range(n)]
+    pares = {(i, (i + 1) % n) for i in range(n)}
+    candidatos = [par for par in itertools.combinations(range(n), 2)
+                  if par not in pares and par[::-1] not in pares]
+    pares |= set(generador.sample(candidatos, extra))
+    return [(nombres[a], nombres[b], generador.randint(1, 30), generador.randint(1, 30) / 100,
+             generador.choice([100, 200, 500, 1000])) for a, b in sorted(pares)]
+
+def _metricas(grafo, ruta):
+    tramos = [grafo[u][v] for u, v in zip(ruta, ruta[1:])]
+    return (sum(t['latencia'] for t in tramos), sum(t['costo'] for t in tramos),
+            min(t['ancho'] for t in tramos))
+
+def _domina(a, b, factor=1.0):
+    return a[0] <= b[0] * factor and a[1] <= b[1] * factor and a[2] * factor >= b[2]
+
+def _frontera_exacta(filas, origen, destino):
+    """Todas las rutas simples y sus métricas no dominadas (por fuerza bruta)"""
+    grafo = nx.Graph()
+    for a, b, latencia, costo, ancho in filas:
+        grafo.add_edge(a, b, latencia=latencia, costo=costo, ancho=ancho)
+    todas = {tuple(np.round(_metricas(grafo, ruta), 9)) for ruta in nx.all_simple_paths(grafo, origen, destino)}
+    frontera = {m for m in todas if not any(o != m and _domina(o, m) for o in todas)}
+    return grafo, todas, frontera
+
+def _obtenidas(rutas):
+    return [tuple(np.round((m['latencia_total'], m['costo_total'], m['ancho_banda_limitante']), 9))
+            for _, m in rutas]
+
+@pytest.mark.parametrize('origen,destino', [('C0', 'C3'), ('C1', 'C6'), ('C3', 'C8'), ('C5', 'C6')])
+def test_frontera_coincide_con_fuerza_bruta(red_desde_filas, origen, destino):
+    filas = _filas()
+    red = red_desde_filas(filas)
+    grafo, _, frontera = _frontera_exacta(filas, origen, destino)
+    rutas = red.rutas_pareto(origen, destino)
+    obtenidas = _obtenidas(rutas)
+    assert len(obtenidas) == len(set(obtenidas))
+    assert set(obtenidas) == frontera
+    for (ruta, _), metricas in zip(rutas, obtenidas):
+        assert ruta[0] == origen and ruta[-1] == destino and len(set(ruta)) == len(ruta)
+        assert np.allclose(_metricas(grafo, ruta), metricas)
+    assert [m[0] for m in obtenidas] == sorted(m[0] for m in obtenidas)
+
+@pytest.mark.parametrize('epsilon', [0.1, 0.5])
+def test_frontera_epsilon_cubre_la_exacta(red_desde_filas, epsilon):
+    filas = _filas(n=10, extra=12, semilla=4)
+    red = red_desde_filas(filas)
+    _, todas, frontera = _frontera_exacta(filas, 'C0', 'C7')
+    obtenidas = _obtenidas(red.rutas_pareto('C0', 'C7', epsilon))
+    assert set(obtenidas) <= todas
+    assert len(obtenidas) <= len(frontera)
+    factor = 1 + epsilon
+    for exacta in frontera:
+        assert any(_domina(obtenida, exacta, factor) for obtenida in obtenidas)
+
+def test_epsilon_negativo_es_invalido(red_desde_filas):
+    red = red_desde_filas(_filas())
+    with pytest.raises(ValueError):
+        red.rutas_pareto('C0', 'C4', -0.1)
@@ -0,0 +1,9 @@
+from render_lote import _preparar_trabajo, calcular_ruta
+
+def test_trabajo_ancho_banda_dibuja_el_camino_mas_ancho(red_desde_filas):
+    # con los pesos aditivos (1000 - ancho) gana la directa A - C de 800 Mbps
+    red = red_desde_filas([('A', 'C', 1, 1, 800), ('A', 'B', 5, 1, 900), ('B', 'C', 5, 1, 850)])
+    trabajo = {'origen': 'A', 'destino': 'C', 'criterio': 'ancho_banda'}
+    ruta, error = _preparar_trabajo(red, trabajo)
+    assert error is None
+    assert ruta == ['A', 'B', 'C'] == calcular_ruta(red, 'A', 'C', 'ancho_banda')[0]
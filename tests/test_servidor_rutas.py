@@ -0,0 +1,85 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from servidor_rutas import ConsultaInvalida, ServicioRutas, ServidorRutas
+
+FILAS = [('A', 'B', 10, 1.0, 1000), ('B', 'C', 10, 1.0, 1000), ('A', 'C', 5, 1.0, 100), ('C', 'D', 3, 0.5, 500)]
+
+@pytest.fixture
+def servicio(red_desde_filas, tmp_path):
+    return ServicioRutas(red_desde_filas(FILAS), carpeta_imagenes=str(tmp_path / 'salidas'))
+
+@pytest.mark.parametrize('endpoint,parametros', [
+    ('ruta', {'destino': 'B'}),
+    ('ruta', {'origen': 'A'}),
+    ('ruta', {'origen': 'X', 'destino': 'B'}),
+    ('ruta', {'origen': 'A', 'destino': 'X'}),
+    ('ruta', {'origen': 'A', 'destino': 'B', 'criterio': 'rapidez'}),
+    ('desde', {'origen': 'A', 'criterio': 'rapidez'}),
+    ('comparar', {'origen': 'A', 'destino': 'X'}),
+    ('imagen', {'origen': 'A', 'destino': 'B', 'visual': 'otro'}),
+    ('otro', {'origen': 'A', 'destino': 'B'}),
+])
+def test_consultas_invalidas(servicio, endpoint, parametros):
+    with pytest.raises(ConsultaInvalida):
+        servicio.consultar(endpoint, parametros)
+    assert servicio.contadores['calculadas'] == 0
+
+def test_respuesta_400(servicio):
+    servidor = ServidorRutas(servicio, hilos=1)
+    respuesta = asyncio.run(servidor._responder('GET', '/api/ruta?origen=A&destino=X', {}, True))
+    assert respuesta.startswith(b"HTTP/1.1 400 Bad Request")
+    assert 'no válida' in json.loads(respuesta.split(b"\r\n\r\n", 1)[1])['error']
+
+def test_ancho_banda_es_el_camino_mas_ancho(servicio):
+    datos = json.loads(servicio.consultar('ruta', {'origen': 'A', 'destino': 'C', 'criterio': 'ancho_banda'}))
+    assert datos['ruta'] == ['A', 'B', 'C']
+    assert datos['metricas']['ancho_banda_limitante'] == 1000
+    latencia = json.loads(servicio.consultar('ruta', {'origen': 'A', 'destino': 'C'}))
+    assert latencia['ruta'] == ['A', 'C']
+
+def test_respuestas_guardadas_por_version(servicio):
+    parametros = {'origen': 'A', 'destino': 'C'}
+    primera = servicio.consultar('ruta', parametros)
+    assert servicio.consultar('ruta', parametros) == primera
+    assert servicio.contadores['calculadas'] == 1 and servicio.contadores['en_cache'] == 1
+
+    version = servicio.red.version
+    servicio.red.actualizar_conexion('A', 'C', latencia=50)
+    assert servicio.red.version != version
+    nueva = json.loads(servicio.consultar('ruta', parametros))
+    assert servicio.contadores['calculadas'] == 2
+    assert nueva['ruta'] == ['A', 'B', 'C'] and nueva['distancia'] == 20
+
+def test_consultas_identicas_concurrentes_se_calculan_una_vez(servicio):
+    servidor = ServidorRutas(servicio, hilos=4)
+    liberar = threading.Event()
+    ruta_json = servicio._ruta_json
+
+    def lento(*argumentos):
+        liberar.wait(5)
+        return ruta_json(*argumentos)
+
+    servicio._ruta_json = lento
+    parametros = {'origen': 'A', 'destino': 'D', 'criterio': 'costo'}
+
+    async def consultas():
+        tareas = [asyncio.create_task(servidor.resolver('ruta', dict(parametros))) for _ in range(5)]
+        while servicio.contadores['coalescidas'] < 4:
+            await asyncio.sleep(0.01)
+        liberar.set()
+        return await asyncio.gather(*tareas)
+
+    try:
+        respuestas = asyncio.run(asyncio.wait_for(consultas(), 10))
+    finally:
+        liberar.set()
+        servidor.pool.shutdown()
+    assert len(set(respuestas)) == 1
+    assert json.loads(respuestas[0])['ruta'] == ['A', 'C', 'D']
+    assert servicio.contadores['calculadas'] == 1
+    assert servicio.contadores['coalescidas'] == 4
+    assert not servidor.en_curso
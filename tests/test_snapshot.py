@@ -0,0 +1,111 @@
+import json
+import os
+
+import numpy as np
+
+from generador_red import generar_red
+from main import ARREGLOS_SNAPSHOT, FORMATO_SNAPSHOT, RedISP, carpeta_snapshot, hash_archivo
+
+def _csv(tmp_path, ciudades=40, semilla=1):
+    archivo = str(tmp_path / "red.csv")
+    generar_red(archivo, ciudades, semilla=semilla)
+    return archivo
+
+def _desde_snapshot(red):
+    return isinstance(red.compacto.destinos, np.memmap)
+
+def _iguales(red, otra):
+    assert red.ciudades == otra.ciudades
+    for nombre in ARREGLOS_SNAPSHOT:
+        assert np.array_equal(getattr(red.compacto, nombre), getattr(otra.compacto, nombre))
+
+def test_snapshot_se_reutiliza_mapeado_en_memoria(tmp_path):
+    archivo = _csv(tmp_path)
+    red = RedISP()
+    assert red.cargar_red_con_snapshot(archivo)
+    assert not _desde_snapshot(red)
+    with open(os.path.join(carpeta_snapshot(archivo), "meta.json"), encoding='utf-8') as entrada:
+        meta = json.load(entrada)
+    assert meta['formato'] == FORMATO_SNAPSHOT and meta['hash_csv'] == hash_archivo(archivo)
+
+    copia = RedISP()
+    assert copia.cargar_red_con_snapshot(archivo)
+    assert _desde_snapshot(copia)
+    _iguales(red, copia)
+    origen, destino = red.ciudades[0], red.ciudades[-1]
+    assert copia.ruta_optima(origen, destino, 'costo') == red.ruta_optima(origen, destino, 'costo')
+
+def test_tablas_y_jerarquias_se_recargan(tmp_path):
+    archivo = _csv(tmp_path)
+    red = RedISP()
+    red.cargar_red_desde_archivo(archivo)
+    red.calcular_tablas(('latencia', 'costo'), procesos=1)
+    red.preparar_jerarquias(('latencia',))
+    carpeta = str(tmp_path / "snapshot")
+    red.guardar_snapshot(carpeta, hash_archivo(archivo))
+
+    copia = RedISP()
+    assert copia.cargar_snapshot(carpeta, hash_archivo(archivo))
+    assert set(copia.tablas) == {'latencia', 'costo'} and set(copia.jerarquias) == {'latencia'}
+    for criterio, tabla in red.tablas.items():
+        assert isinstance(copia.tablas[criterio]['distancias'], np.memmap)
+        assert np.array_equal(copia.tablas[criterio]['distancias'], tabla['distancias'])
+        assert np.array_equal(copia.tablas[criterio]['siguiente'], tabla['siguiente'])
+    origen, destino = red.ciudades[3], red.ciudades[-2]
+    assert copia.ruta_desde_tablas(origen, destino, 'costo') == red.ruta_desde_tablas(origen, destino, 'costo')
+    assert copia.verificar_jerarquias('latencia', 30)['errores'] == 0
+
+def test_csv_modificado_invalida_el_snapshot(tmp_path):
+    archivo = _csv(tmp_path)
+    assert RedISP().cargar_red_con_snapshot(archivo)
+    anterior = hash_archivo(archivo)
+    with open(archivo, "a", encoding='utf-8') as salida:
+        salida.write("Nueva_A,Nueva_B,5,0.1,100\n")
+
+    assert not RedISP().cargar_snapshot(carpeta_snapshot(archivo), hash_archivo(archivo))
+    red = RedISP()
+    assert red.cargar_red_con_snapshot(archivo)
+    assert not _desde_snapshot(red) and 'Nueva_A' in red.ciudades
+    # el snapshot se reescribió con el hash nuevo
+    assert not RedISP().cargar_snapshot(carpeta_snapshot(archivo), anterior)
+    copia = RedISP()
+    assert copia.cargar_red_con_snapshot(archivo)
+    assert _desde_snapshot(copia) and 'Nueva_A' in copia.ciudades
+
+def test_otra_politica_u_otro_formato_no_se_reutilizan(tmp_path):
+    archivo = _csv(tmp_path)
+    assert RedISP().cargar_red_con_snapshot(archivo)
+    carpeta = carpeta_snapshot(archivo)
+    assert not RedISP().cargar_snapshot(carpeta, hash_archivo(archivo), 'min_latencia')
+    assert RedISP().cargar_snapshot(carpeta, hash_archivo(archivo), 'conservar')
+
+    ruta_meta = os.path.join(carpeta, "meta.json")
+    with open(ruta_meta, encoding='utf-8') as entrada:
+        meta = json.load(entrada)
+    meta['formato'] = FORMATO_SNAPSHOT - 1
+    with open(ruta_meta, "w", encoding='utf-8') as salida:
+        json.dump(meta, salida)
+    assert not RedISP().cargar_snapshot(carpeta, hash_archivo(archivo))
+
+def test_snapshot_danado_vuelve_al_csv(tmp_path):
+    archivo = _csv(tmp_path)
+    assert RedISP().cargar_red_con_snapshot(archivo)
+    os.remove(os.path.join(carpeta_snapshot(archivo), "destinos.npy"))
+    assert not RedISP().cargar_snapshot(carpeta_snapshot(archivo), hash_archivo(archivo))
+    red = RedISP()
+    assert red.cargar_red_con_snapshot(archivo)
+    assert len(red.ciudades) == 40
+
+def test_cambios_en_memoria_no_tocan_el_snapshot(tmp_path):
+    archivo = _csv(tmp_path)
+    assert RedISP().cargar_red_con_snapshot(archivo)
+    red = RedISP()
+    assert red.cargar_red_con_snapshot(archivo) and _desde_snapshot(red)
+    a, b = red.ciudades[red.compacto.extremo_a[0]], red.ciudades[red.compacto.extremo_b[0]]
+    latencia = float(red.compacto.latencia[0])
+    red.actualizar_conexion(a, b, latencia=latencia + 100)
+    assert float(red.compacto.latencia[0]) == latencia + 100
+
+    copia = RedISP()
+    assert copia.cargar_red_con_snapshot(archivo) and _desde_snapshot(copia)
+    assert float(copia.compacto.latencia[0]) == latencia
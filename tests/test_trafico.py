@@ -0,0 +1,23 @@
+import numpy as np
+
+def _demanda_a_c(mbps):
+    return np.array([0]), np.array([2]), np.array([mbps])  # A -> C (ids en orden alfabético)
+
+def test_carga_en_la_conexion_paralela_mas_barata(red_desde_filas):
+    red = red_desde_filas([('A', 'B', 10, 1, 100), ('A', 'B', 5, 1, 100), ('B', 'C', 5, 1, 1000)])
+    simulacion = red.simular_trafico(_demanda_a_c(150), 'latencia')
+    np.testing.assert_allclose(simulacion['carga'][:2].sum(axis=1), [0, 150])
+
+def test_congestion_reparte_conexiones_paralelas(red_desde_filas):
+    red = red_desde_filas([('A', 'B', 5, 1, 100), ('A', 'B', 5, 1, 100), ('B', 'C', 5, 1, 1000)])
+    simulacion = red.simular_trafico(_demanda_a_c(150), 'latencia', iteraciones=5)
+    carga = simulacion['carga'][:2].sum(axis=1)
+    assert np.isclose(carga.sum(), 150)
+    assert carga.min() > 0
+    assert simulacion['utilizacion'][:2].max() < 1.5
+
+def test_tablas_y_dijkstra_cargan_la_misma_conexion(red_desde_filas):
+    red = red_desde_filas([('A', 'B', 10, 1, 100), ('A', 'B', 5, 1, 100), ('B', 'C', 5, 1, 1000)])
+    sin_tablas = red.simular_trafico(_demanda_a_c(150), 'latencia')['carga']
+    red.calcular_tablas(('latencia',), procesos=1)
+    np.testing.assert_allclose(red.simular_trafico(_demanda_a_c(150), 'latencia')['carga'], sin_tablas)
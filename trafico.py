@@ -0,0 +1,246 @@
+"""
+Simulación de tráfico: demandas entre pares de ciudades (Mbps) enrutadas sobre la red
+Las demandas se agregan por par y se calculan los árboles de caminos mínimos de las
+ciudades de destino (en bloques que caben en memoria y en paralelo con tablas_rutas).
+La carga por enlace se acumula de forma vectorizada sobre todos los árboles del bloque:
+con muchas demandas, sumando cada subárbol de las hojas hacia la raíz; con pocas,
+avanzando todas las demandas un salto por vuelta. Así un millón de demandas son unas
+pocas decenas de pasadas de NumPy.
+La carga se cuenta por sentido (a -> b y b -> a) y la utilización de cada conexión es la
+del sentido más cargado respecto de su ancho de banda, como en un enlace full dúplex.
+Entre dos ciudades con conexiones paralelas la carga va a la de menor peso, la misma que
+usó Dijkstra para el árbol; con la congestión, las vueltas siguientes pasan a la otra.
+Formato del archivo de demandas: ciudad_origen,ciudad_destino,demanda_mbps
+"""
+import numpy as np
+
+from cargador_csv import MAX_EJEMPLOS_ERROR, abrir_texto, es_encabezado, leer_bloques
+from rutas_csr import buscar_aristas, indice_arcos
+from tablas_rutas import calcular_tablas
+
+# Memoria máxima (bytes) para los árboles de un bloque de destinos y los arreglos
+# auxiliares de la acumulación (unos BYTES_POR_ENTRADA por ciudad de cada árbol)
+MEMORIA_ARBOLES = 256 * 1024 * 1024
+BYTES_POR_ENTRADA = 48
+
+# Con menos de una demanda cada DEMANDAS_POR_ENTRADA ciudades de los árboles del bloque se
+# avanza salto por salto; con más, se acumula cada árbol completo de las hojas a la raíz
+DEMANDAS_POR_ENTRADA = 16
+
+# Función de congestión BPR: peso * (1 + ALFA * utilización ^ BETA)
+ALFA_CONGESTION = 0.15
+BETA_CONGESTION = 4
+
+def _ids_ciudades(nombres, ciudades):
+    """Ids de un arreglo de nombres (los nombres de la red están en orden alfabético); -1 si no existe"""
+    nombres = np.asarray(nombres)
+    if len(nombres) == 0:
+        return np.full(len(ciudades), -1, dtype=np.int64)
+    posicion = np.minimum(np.searchsorted(nombres, ciudades), len(nombres) - 1)
+    return np.where(nombres[posicion] == ciudades, posicion, -1)
+
+def leer_demandas(archivo, nombres):
+    """
+    Lee un CSV de demandas (también .gz) en bloques
+    Devuelve (origenes, destinos, mbps, reporte) con ids de ciudad; las filas inválidas
+    o con ciudades que no están en la red se cuentan en el reporte y se omiten
+    """
+    origenes, destinos, mbps = [], [], []
+    reporte = {'filas': 0, 'cargadas': 0, 'errores': 0, 'ejemplos_error': []}
+    with abrir_texto(archivo) as texto:
+        for i, (numeros, lineas) in enumerate(leer_bloques(texto)):
+            if i == 0 and es_encabezado(lineas[0], (2, 3)):
+                numeros, lineas = numeros[1:], lineas[1:]
+            if not lineas:
+                continue
+            reporte['filas'] += len(lineas)
+            try:
+                pares = np.loadtxt(lineas, delimiter=',', quotechar='"', comments=None, dtype=str,
+                                   usecols=(0, 1), ndmin=2)
+                valores = np.loadtxt(lineas, delimiter=',', quotechar='"', comments=None,
+                                     dtype=np.float64, usecols=(2,), ndmin=1)
+            except ValueError:
+                pares, valores = _parsear_por_filas(lineas)
+            s = _ids_ciudades(nombres, np.char.strip(pares[:, 0]))
+            t = _ids_ciudades(nombres, np.char.strip(pares[:, 1]))
+            validas = (s >= 0) & (t >= 0) & np.isfinite(valores) & (valores >= 0)
+
+            invalidas = np.flatnonzero(~validas)
+            reporte['errores'] += len(invalidas)
+            for j in invalidas[:MAX_EJEMPLOS_ERROR - len(reporte['ejemplos_error'])].tolist():
+                motivo = "ciudad desconocida" if s[j] < 0 or t[j] < 0 else "demanda inválida"
+                reporte['ejemplos_error'].append((numeros[j], motivo, lineas[j]))
+            origenes.append(s[validas])
+            destinos.append(t[validas])
+            mbps.append(valores[validas])
+            reporte['cargadas'] += int(validas.sum())
+
+    if not origenes:
+        return np.array([], np.int64), np.array([], np.int64), np.array([], np.float64), reporte
+    return np.concatenate(origenes), np.concatenate(destinos), np.concatenate(mbps), reporte
+
+def _parsear_por_filas(lineas):
+    """Lectura fila por fila de un bloque con líneas dañadas (quedan como demanda NaN)"""
+    import csv
+
+    pares, valores = [], []
+    for campos in csv.reader(lineas):
+        try:
+            valor = float(campos[2]) if len(campos) >= 3 else float('nan')
+        except ValueError:
+            valor = float('nan')
+        pares.append((campos[0] if campos else '', campos[1] if len(campos) > 1 else ''))
+        valores.append(valor)
+    return np.array(pares, dtype=str).reshape(-1, 2), np.array(valores, dtype=np.float64)
+
+def demandas_gravedad(masas, total_mbps, cantidad=None, semilla=0):
+    """
+    Matriz de tráfico por modelo de gravedad: la demanda entre i y j es proporcional a masas[i] * masas[j]
+    Sin cantidad se generan todos los pares i != j (solo para redes chicas); con cantidad
+    se muestrean esa cantidad de pares con probabilidad proporcional al producto de masas
+    y cada uno recibe total_mbps / cantidad
+    Devuelve (origenes, destinos, mbps)
+    """
+    masas = np.asarray(masas, dtype=np.float64)
+    n = len(masas)
+    if n < 2 or masas.sum() <= 0:
+        return np.array([], np.int64), np.array([], np.int64), np.array([], np.float64)
+
+    if cantidad is None:
+        origenes, destinos = np.nonzero(~np.eye(n, dtype=bool))
+        producto = masas[origenes] * masas[destinos]
+        return origenes, destinos, total_mbps * producto / producto.sum()
+
+    # muestreo: origen y destino independientes con probabilidad masa / total, sin repetir ciudad
+    generador = np.random.default_rng(semilla)
+    probabilidad = masas / masas.sum()
+    origenes = generador.choice(n, size=cantidad, p=probabilidad)
+    destinos = generador.choice(n, size=cantidad, p=probabilidad)
+    repetidos = np.flatnonzero(origenes == destinos)
+    while len(repetidos):
+        destinos[repetidos] = generador.choice(n, size=len(repetidos), p=probabilidad)
+        repetidos = repetidos[origenes[repetidos] == destinos[repetidos]]
+    return origenes, destinos, np.full(cantidad, total_mbps / cantidad)
+
+def agrupar_demandas(origenes, destinos, mbps, n):
+    """Suma las demandas del mismo par (origen, destino) y descarta las de una ciudad a sí misma"""
+    origenes = np.asarray(origenes, dtype=np.int64)
+    destinos = np.asarray(destinos, dtype=np.int64)
+    mbps = np.asarray(mbps, dtype=np.float64)
+    distintas = origenes != destinos
+    claves, inversa = np.unique(origenes[distintas] * n + destinos[distintas], return_inverse=True)
+    suma = np.bincount(inversa.ravel(), weights=mbps[distintas], minlength=len(claves))
+    return claves // n, claves % n, suma
+
+def _bloques_arboles(offsets, destinos, pesos, raices, procesos, arboles, memoria):
+    """
+    Árboles de las raíces en bloques que caben en memoria: (raíces del bloque, predecesores)
+    Si ya se tienen los árboles de todas las ciudades (arboles) solo se toman sus filas
+    """
+    n = len(offsets) - 1
+    por_bloque = max(1, memoria // (n * BYTES_POR_ENTRADA))
+    for inicio in range(0, len(raices), por_bloque):
+        bloque = raices[inicio:inicio + por_bloque]
+        if arboles is not None:
+            yield bloque, arboles[bloque]
+        else:
+            _, predecesores = calcular_tablas(offsets, destinos, pesos, procesos, fuentes=bloque)
+            yield bloque, predecesores[0]  # fila i: árbol con raíz bloque[i]
+
+def _caminar_saltos(predecesores, fila, actual, volumen, objetivo, indice, carga):
+    """Todas las demandas avanzan un salto por vuelta hacia su destino (conviene con pocas demandas por árbol)"""
+    extremo_a, clave_arco, arista_de_clave, n = indice
+    siguiente = predecesores[fila, actual].astype(np.int64)
+    while len(actual):
+        aristas = buscar_aristas(clave_arco, arista_de_clave, n, actual, siguiente)
+        sentido = (extremo_a[aristas] != actual).astype(np.int64)
+        carga += np.bincount(2 * aristas + sentido, weights=volumen, minlength=len(carga))
+
+        seguir = siguiente != objetivo
+        fila, objetivo, volumen, actual = fila[seguir], objetivo[seguir], volumen[seguir], siguiente[seguir]
+        siguiente = predecesores[fila, actual].astype(np.int64)
+
+def _acumular_arboles(predecesores, fila, actual, volumen, indice, carga):
+    """
+    Suma las demandas de cada árbol desde las hojas hacia la raíz, nivel por nivel y para
+    todos los árboles del bloque a la vez: el tráfico que sale de una ciudad por su tramo
+    hacia la raíz es la demanda de todo su subárbol (conviene con muchas demandas por árbol)
+    """
+    extremo_a, clave_arco, arista_de_clave, n = indice
+    filas = predecesores.shape[0]
+    tipo = np.int32 if filas * n < 2**31 else np.int64
+
+    # padre de cada (árbol, ciudad) como índice plano; la raíz apunta a sí misma
+    padre = predecesores.astype(tipo)
+    raiz = padre < 0
+    padre[raiz] = np.broadcast_to(np.arange(n, dtype=tipo), padre.shape)[raiz]
+    padre += (np.arange(filas, dtype=tipo) * n)[:, None]
+    padre = padre.ravel()
+
+    # profundidad por saltos de puntero (duplicando la distancia en cada vuelta)
+    profundidad = (~raiz).ravel().astype(np.int32)
+    ancestro = padre
+    while True:
+        extra = profundidad[ancestro]
+        if not extra.any():
+            break
+        profundidad += extra
+        ancestro = ancestro[ancestro]
+
+    flujo = np.bincount(fila.astype(np.int64) * n + actual, weights=volumen, minlength=filas * n)
+    maxima = int(profundidad.max(initial=0))
+    # orden estable por profundidad decreciente (radix sort con enteros de 16 bits)
+    clave = (maxima - profundidad).astype(np.int16 if maxima < 2**15 else np.int32)
+    orden = np.argsort(clave, kind='stable')
+    limites = np.searchsorted(clave[orden], np.arange(maxima + 1))
+    for nivel in range(maxima):
+        ciudades = orden[limites[nivel]:limites[nivel + 1]]
+        np.add.at(flujo, padre[ciudades], flujo[ciudades])
+
+    usados = np.flatnonzero((flujo > 0) & (profundidad > 0))
+    desde, hacia = usados % n, padre[usados] % n
+    aristas = buscar_aristas(clave_arco, arista_de_clave, n, desde, hacia)
+    sentido = (extremo_a[aristas] != desde).astype(np.int64)
+    carga += np.bincount(2 * aristas + sentido, weights=flujo[usados], minlength=len(carga))
+
+def asignar_demandas(offsets, destinos, pesos, extremo_a, arista, num_conexiones,
+                     origenes, destinos_demanda, mbps, procesos=None, arboles=None, memoria=MEMORIA_ARBOLES):
+    """
+    Enruta las demandas (ya agrupadas) por caminos mínimos según los pesos por arco
+    arista: conexión de cada arco; entre conexiones paralelas se carga la de menor peso
+    arboles (opcional): matriz n x n ya calculada con fila t = árbol con raíz t (tablas todos-contra-todos)
+    Devuelve (carga, no_enrutada): carga es una matriz (conexiones x 2) con los Mbps en
+    el sentido extremo_a -> extremo_b (columna 0) y en el contrario (columna 1)
+    """
+    n = len(offsets) - 1
+    clave_arco, arista_de_clave = indice_arcos(offsets, destinos, arista, pesos)
+    indice = (np.asarray(extremo_a), clave_arco, arista_de_clave, n)
+    carga = np.zeros(2 * num_conexiones, dtype=np.float64)
+    no_enrutada = 0.0
+    raices = np.unique(destinos_demanda)
+
+    for bloque, predecesores in _bloques_arboles(offsets, destinos, pesos, raices, procesos, arboles, memoria):
+        en_bloque = (destinos_demanda >= bloque[0]) & (destinos_demanda <= bloque[-1])
+        objetivo = destinos_demanda[en_bloque]
+        fila = np.searchsorted(bloque, objetivo)
+        actual = origenes[en_bloque]
+        volumen = mbps[en_bloque]
+
+        # sin salto desde el origen: el destino no es alcanzable
+        con_ruta = predecesores[fila, actual] >= 0
+        no_enrutada += float(volumen[~con_ruta].sum())
+        fila, objetivo, actual, volumen = fila[con_ruta], objetivo[con_ruta], actual[con_ruta], volumen[con_ruta]
+
+        if len(actual) * DEMANDAS_POR_ENTRADA < predecesores.size:
+            _caminar_saltos(predecesores, fila, actual, volumen, objetivo, indice, carga)
+        else:
+            _acumular_arboles(predecesores, fila, actual, volumen, indice, carga)
+    return carga.reshape(-1, 2), no_enrutada
+
+def utilizacion(carga, ancho_banda):
+    """Utilización de cada conexión: el sentido más cargado sobre su ancho de banda"""
+    return carga.max(axis=1) / np.asarray(ancho_banda, dtype=np.float64)
+
+def factor_congestion(utilizaciones, alfa=ALFA_CONGESTION, beta=BETA_CONGESTION):
+    """Multiplicador de peso de cada conexión según su utilización (función BPR)"""
+    return 1 + alfa * np.power(utilizaciones, beta)